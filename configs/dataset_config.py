@@ -10,11 +10,28 @@ val_img_prefix = data_root + 'val/Raw/'
 test_ann_file = data_root + 'test/annotations.json'
 test_img_prefix = data_root + 'test/Raw/'
 
+# gen_spec.py writes these statistics to norms.json for every split it generates; configs with a _base_ can
+# load them with `normalization_values = load_norms(data_root + 'train/norms.json')` (from mmdet.utils)
 normalization_values = {
     'mean': [44.34, 125.08, 138.27],
     'std': [26.87, 26.33, 14.68]
 }
 
+# Set to True to keep the decoded images in a cache in shared memory (/dev/shm) for all workers, so only the first
+# epoch decodes PNGs. /dev/shm is node RAM on top of the job's --mem, so the cache lives in a folder of the job, is
+# removed when training exits (slurm/scripts/train.slurm also removes it) and is kept to 4 GB next to the 32 GB that
+# train.slurm requests
+use_image_cache = False
+if use_image_cache:
+    image_loader = dict(
+        type='CachedImageLoader',
+        loader=dict(type='LoadImageFromFile'),
+        cache_dir='/dev/shm/mmdet_image_cache_{{$SLURM_JOB_ID:local}}',
+        cache_size_mb=4096,  # Least recently used images are removed beyond this size
+        remove_on_exit=True)
+else:
+    image_loader = dict(type='LoadImageFromFile')
+
 data = dict(
     samples_per_gpu=2, #How many images per batch
     workers_per_gpu=2, #Number of CPU workers to load data for each GPU
@@ -23,7 +40,7 @@ data = dict(
         ann_file=train_ann_file,
         img_prefix=train_img_prefix,
         pipeline=[
-            dict(type='LoadImageFromFile'),
+            image_loader,
             dict(type='LoadAnnotations', with_bbox=True),
             dict(type='Normalize', **normalization_values, to_rgb=True),
             dict(type='DefaultFormatBundle'), #Processes annotations (such as converting to tensor)
@@ -35,7 +52,7 @@ data = dict(
         ann_file=val_ann_file,
         img_prefix=val_img_prefix,
         pipeline=[
-            dict(type='LoadImageFromFile'),
+            image_loader,
             dict(type='Normalize', **normalization_values, to_rgb=True),
             dict(type='DefaultFormatBundle'),
             dict(type='Collect', keys=['img']),
@@ -46,7 +63,7 @@ data = dict(
         ann_file=test_ann_file,
         img_prefix=test_img_prefix,
         pipeline=[
-            dict(type='LoadImageFromFile'),
+            image_loader,
             dict(type='Normalize', **normalization_values, to_rgb=True),
             dict(type='ImageToTensor', keys=['img']),
             dict(type='Collect', keys=['img']),
@@ -0,0 +1,82 @@
+_base_ = [
+    './model_config.py'
+]
+
+import os
+
+from mmdet.utils import load_norms
+
+# Single-channel float16 dB spectrograms from `gen_spec.py --raw_format npy`
+dataset_type = 'CocoDataset'
+data_root = '/home/d86p233/Desktop/BMW-spec/specs/single_freq_npy_specs/'
+
+train_ann_file = data_root + 'train/annotations.json'
+train_img_prefix = data_root + 'train/Raw/'
+
+val_ann_file = data_root + 'val/annotations.json'
+val_img_prefix = data_root + 'val/Raw/'
+
+test_ann_file = data_root + 'test/annotations.json'
+test_img_prefix = data_root + 'test/Raw/'
+
+# dB statistics of the training spectrograms, one value for the single channel,
+# written by gen_spec.py while it generated the train split. Without the data tree (e.g. to print or browse the
+# config), mean 0 and std 1 are used, which leave the dB values unnormalized
+norms_file = data_root + 'train/norms.json'
+if os.path.exists(norms_file):
+    normalization_values = load_norms(norms_file)
+else:
+    normalization_values = {
+        'mean': [0.0],
+        'std': [1.0]
+    }
+
+# With `gen_spec.py --memmap`, LoadImageFromNpyFile can be replaced by
+# dict(type='LoadImageFromMemmap', memmap_file=data_root + 'train/spectrograms.npy', to_float32=True) (etc.),
+# which reads every image as a view on one memory-mapped file shared by all workers
+
+model = dict(
+    data_preprocessor=dict(
+        type='DetDataPreprocessor',
+        mean=normalization_values['mean'],
+        std=normalization_values['std'],
+        bgr_to_rgb=False,  # There is no color to convert
+        pad_size_divisor=32),
+    backbone=dict(
+        in_channels=1  # The pretrained RGB stem is summed over its input channels when loaded
+    )
+)
+
+data = dict(
+    samples_per_gpu=2, #How many images per batch
+    workers_per_gpu=2, #Number of CPU workers to load data for each GPU
+    train=dict(
+        type=dataset_type,
+        ann_file=train_ann_file,
+        img_prefix=train_img_prefix,
+        pipeline=[
+            dict(type='LoadImageFromNpyFile'),
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='PackDetInputs'),
+        ]
+    ),
+    val=dict(
+        type=dataset_type,
+        ann_file=val_ann_file,
+        img_prefix=val_img_prefix,
+        pipeline=[
+            dict(type='LoadImageFromNpyFile'),
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='PackDetInputs'),
+        ]
+    ),
+    test=dict(
+        type=dataset_type,
+        ann_file=test_ann_file,
+        img_prefix=test_img_prefix,
+        pipeline=[
+            dict(type='LoadImageFromNpyFile'),
+            dict(type='PackDetInputs'),
+        ]
+    )
+)
@@ -0,0 +1,71 @@
+# model settings
+# Single-stage model for full-width frequency bands: the FPN features are pooled over time and the bands are
+# predicted along frequency only, without an RPN and RoIAlign. The head makes every anchor and prediction as wide
+# as the image, so it needs the pixel-space, full-width boxes that gen_spec.py writes with bbox_units 'pixels'
+# (older output folders can be updated with gen_spec.py --relabel). It has not been compared with
+# faster-rcnn_r50_fpn.py in a training run on the real annotation files yet. To try it, change the _base_ of
+# model_config.py to this file and set num_classes in bbox_head instead of roi_head.bbox_head.
+model = dict(
+    type='FrequencyBandDetector',
+    data_preprocessor=dict(
+        type='DetDataPreprocessor',
+        mean=[123.675, 116.28, 103.53],
+        std=[58.395, 57.12, 57.375],
+        bgr_to_rgb=True,
+        pad_size_divisor=32),
+    backbone=dict(
+        type='ResNet',
+        depth=50,
+        num_stages=4,
+        out_indices=(0, 1, 2, 3),
+        frozen_stages=1,
+        norm_cfg=dict(type='BN', requires_grad=True),
+        norm_eval=True,
+        style='pytorch',
+        init_cfg=dict(type='Pretrained', checkpoint='torchvision://resnet50')),
+    neck=dict(
+        type='FPN',
+        in_channels=[256, 512, 1024, 2048],
+        out_channels=256,
+        num_outs=5),
+    bbox_head=dict(
+        type='FrequencyBandHead',
+        num_classes=80,
+        in_channels=256,
+        feat_channels=256,
+        stacked_convs=2,
+        anchor_generator=dict(
+            type='FrequencyBandAnchorGenerator',
+            scales=[2, 4, 8],  # Band heights in units of the stride
+            strides=[4, 8, 16, 32, 64],
+            cache_size=4),  # Spectrograms share a few padded sizes
+        bbox_coder=dict(
+            type='DeltaXYWHBBoxCoder',
+            target_means=[.0, .0, .0, .0],
+            target_stds=[1.0, 1.0, 1.0, 1.0]),
+        loss_cls=dict(
+            type='FocalLoss',
+            use_sigmoid=True,
+            gamma=2.0,
+            alpha=0.25,
+            loss_weight=1.0),
+        loss_bbox=dict(type='L1Loss', loss_weight=1.0)),
+    # model training and testing settings
+    train_cfg=dict(
+        assigner=dict(
+            type='MaxIoUAssigner',
+            pos_iou_thr=0.5,
+            neg_iou_thr=0.4,
+            min_pos_iou=0,
+            ignore_iof_thr=-1),
+        sampler=dict(
+            type='PseudoSampler'),  # Focal loss needs no sampling
+        allowed_border=-1,
+        pos_weight=-1,
+        debug=False),
+    test_cfg=dict(
+        nms_pre=1000,
+        min_bbox_size=0,
+        score_thr=0.05,
+        nms=dict(type='nms', iou_threshold=0.5),  # Full-width boxes, so the IoU of their frequency ranges
+        max_per_img=100))
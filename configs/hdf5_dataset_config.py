@@ -0,0 +1,58 @@
+dataset_type = 'SpectrogramDataset'
+data_root = '/home/d86p233/Desktop/BMW-spec/splits/'
+
+# Spectrograms are computed from the HDF5 captures on the fly, no PNGs needed. They are resampled to the 775x462 raw
+# images of gen_spec.py and get the same boxes, so the filter and band settings below must match its arguments
+# With `split_data.py --link-mode manifest`, set ann_file=data_root + 'train.txt' (etc.) instead of data_prefix
+range_bins = list(range(120, 131))
+
+spectrogram_loader = dict(
+    type='LoadSpectrogramFromHDF5',
+    nfft=256,
+    noverlap=192,
+    filter_order=None,  # gen_spec.py --filter_order
+    filter_sos=False,  # gen_spec.py --filter_sos
+    cache_size=2048  # Computed spectrograms kept per worker
+)
+
+data = dict(
+    samples_per_gpu=2, #How many images per batch
+    workers_per_gpu=2, #Number of CPU workers to load data for each GPU
+    train=dict(
+        type=dataset_type,
+        data_root=data_root,
+        data_prefix=dict(img='train/'),
+        range_bins=range_bins,
+        band_hz=40,  # gen_spec.py --band_hz
+        pipeline=[
+            spectrogram_loader,
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='PackDetInputs'),
+        ]
+    ),
+    val=dict(
+        type=dataset_type,
+        data_root=data_root,
+        data_prefix=dict(img='val/'),
+        range_bins=range_bins,
+        band_hz=40,  # gen_spec.py --band_hz
+        test_mode=True,
+        pipeline=[
+            spectrogram_loader,
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='PackDetInputs'),
+        ]
+    ),
+    test=dict(
+        type=dataset_type,
+        data_root=data_root,
+        data_prefix=dict(img='test/'),
+        range_bins=range_bins,
+        band_hz=40,  # gen_spec.py --band_hz
+        test_mode=True,
+        pipeline=[
+            spectrogram_loader,
+            dict(type='PackDetInputs'),
+        ]
+    )
+)
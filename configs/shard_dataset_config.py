@@ -0,0 +1,57 @@
+dataset_type = 'CocoShardDataset'
+data_root = '/home/d86p233/Desktop/BMW-spec/specs/single_freq_raw_shards/'
+
+# Images are read from the tar shards written by `pack_shards.py`; annotations.json holds their offsets
+shard_loader = dict(
+    type='LoadImageFromShard',
+    max_open_files=16  # Shards kept open per worker
+)
+
+# Shuffles the shards and the images within each shard, so every shard is read in one run per epoch
+train_sampler = dict(type='ShardShuffleSampler', shuffle=True)
+
+data = dict(
+    samples_per_gpu=2, #How many images per batch
+    workers_per_gpu=2, #Number of CPU workers to load data for each GPU
+    train=dict(
+        type=dataset_type,
+        ann_file=data_root + 'train/annotations.json',
+        data_prefix=dict(img=data_root + 'train/'),
+        pipeline=[
+            shard_loader,
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='PackDetInputs'),
+        ]
+    ),
+    val=dict(
+        type=dataset_type,
+        ann_file=data_root + 'val/annotations.json',
+        data_prefix=dict(img=data_root + 'val/'),
+        test_mode=True,
+        pipeline=[
+            shard_loader,
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(type='PackDetInputs'),
+        ]
+    ),
+    test=dict(
+        type=dataset_type,
+        ann_file=data_root + 'test/annotations.json',
+        data_prefix=dict(img=data_root + 'test/'),
+        test_mode=True,
+        pipeline=[
+            shard_loader,
+            dict(type='PackDetInputs'),
+        ]
+    )
+)
+
+# The sampler is set on train_dataloader, which mmdet 3.x builds the training loader from; the legacy data block above
+# has no sampler slot
+train_dataloader = dict(
+    batch_size=data['samples_per_gpu'],
+    num_workers=data['workers_per_gpu'],
+    persistent_workers=True,
+    sampler=train_sampler,
+    dataset=data['train']
+)
@@ -1,10 +1,10 @@
 #!/bin/bash
 
-# Variables
+# Variables (the directory paths can be overridden with ./script.sh <source path> <destination path>)
 SOURCE_ENDPOINT_ID="0dc1297f-9868-4c68-8637-c9b6bd65d3aa"                          # Tempest
 DESTINATION_ENDPOINT_ID="5485832e-723e-4b52-8472-0410e90902ad"                     # Blackmore
-SOURCE_DIRECTORY_PATH="/home/d86p233/Desktop/BMW-spec/specs/spectrograms"          # Tempest
-DESTINATION_DIRECTORY_PATH="/ece-bmw-lab/drone-lidar/summer2024/all_spectrograms/" # Blackmore
+SOURCE_DIRECTORY_PATH="${1:-/home/d86p233/Desktop/BMW-spec/specs/spectrograms}"          # Tempest
+DESTINATION_DIRECTORY_PATH="${2:-/ece-bmw-lab/drone-lidar/summer2024/all_spectrograms/}" # Blackmore
 TRANSFER_LABEL="Save_spec:tempest->blackmore"
 
 # Ensure Globus CLI is installed
@@ -9,6 +9,7 @@ from .coco import CocoDataset
 from .coco_caption import CocoCaptionDataset
 from .coco_panoptic import CocoPanopticDataset
 from .coco_semantic import CocoSegDataset
+from .coco_shard import CocoShardDataset
 from .crowdhuman import CrowdHumanDataset
 from .dataset_wrappers import ConcatDataset, MultiImageMixDataset
 from .deepfashion import DeepFashionDataset
@@ -26,8 +27,9 @@ from .refcoco import RefCocoDataset
 from .reid_dataset import ReIDDataset
 from .samplers import (AspectRatioBatchSampler, ClassAwareSampler,
                        CustomSampleSizeSampler, GroupMultiSourceSampler,
-                       MultiSourceSampler, TrackAspectRatioBatchSampler,
-                       TrackImgSampler)
+                       MultiSourceSampler, ShardShuffleSampler,
+                       TrackAspectRatioBatchSampler, TrackImgSampler)
+from .spectrogram import SpectrogramDataset
 from .utils import get_loading_pipeline
 from .v3det import V3DetDataset
 from .voc import VOCDataset
@@ -49,5 +51,6 @@ __all__ = [
     'BaseSegDataset', 'ADE20KSegDataset', 'CocoSegDataset',
     'ADE20KInstanceDataset', 'iSAIDDataset', 'V3DetDataset', 'ConcatDataset',
     'ODVGDataset', 'MDETRStyleRefCocoDataset', 'DODDataset',
-    'CustomSampleSizeSampler', 'Flickr30kDataset'
+    'CustomSampleSizeSampler', 'Flickr30kDataset', 'SpectrogramDataset',
+    'CocoShardDataset', 'ShardShuffleSampler'
 ]
@@ -1,5 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from .coco_api import COCO, COCOeval, COCOPanoptic
+from .coco_api import (COCO, COCOeval, COCOPanoptic, dump_cache,
+                       get_cache_file, load_cache)
 from .cocoeval_mp import COCOevalMP
 
-__all__ = ['COCO', 'COCOeval', 'COCOPanoptic', 'COCOevalMP']
+__all__ = [
+    'COCO', 'COCOeval', 'COCOPanoptic', 'COCOevalMP', 'get_cache_file',
+    'load_cache', 'dump_cache'
+]
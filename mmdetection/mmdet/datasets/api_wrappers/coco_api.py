@@ -1,28 +1,108 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 # This file add snake case alias for coco api
 
+import hashlib
+import os
+import os.path as osp
+import pickle
 import warnings
 from collections import defaultdict
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
 import pycocotools
 from pycocotools.coco import COCO as _COCO
 from pycocotools.cocoeval import COCOeval as _COCOeval
 
 
+def get_cache_file(annotation_file: str, cache_dir: str, tag: str) -> str:
+    """Path of the cache of an annotation file.
+
+    The name contains the SHA-256 of the annotation file's contents, so an
+    edited file gets a new cache, and ``tag``, which tells apart the data
+    cached for it.
+
+    Args:
+        annotation_file (str): Path of the annotation file.
+        cache_dir (str): Folder of the cache files.
+        tag (str): Name of the cached data.
+
+    Returns:
+        str: Path of the cache file.
+    """
+    sha256 = hashlib.sha256()
+    with open(annotation_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    stem = osp.splitext(osp.basename(annotation_file))[0]
+    return osp.join(cache_dir, f'{stem}.{sha256.hexdigest()[:16]}.{tag}.pkl')
+
+
+def load_cache(cache_file: str) -> Optional[Any]:
+    """Load a cache written by :func:`dump_cache`, or None if there is no
+    readable one."""
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def dump_cache(obj: Any, cache_file: str) -> None:
+    """Pickle ``obj`` to ``cache_file``.
+
+    The file is written under a temporary name and renamed, so processes
+    that build the same cache at the same time never read a partial file.
+    Failing to write the cache, e.g. to a read-only folder, only warns.
+    """
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(osp.dirname(cache_file) or '.', exist_ok=True)
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        warnings.warn(f'Failed to write the cache {cache_file}: {e}')
+        if osp.exists(tmp_file):
+            os.remove(tmp_file)
+
+
 class COCO(_COCO):
     """This class is almost the same as official pycocotools package.
 
     It implements some snake case function aliases. So that the COCO class has
     the same interface as LVIS class.
+
+    Args:
+        annotation_file (str, optional): Path of annotation file.
+            Defaults to None.
+        cache_dir (str, optional): Folder in which the loaded annotations and
+            the index built by ``createIndex`` are cached. Later instances
+            for an annotation file with the same contents load the cache
+            instead of parsing the JSON and building the index again.
+            Defaults to None, i.e. no cache.
     """
 
-    def __init__(self, annotation_file=None):
+    INDEX_ATTRS = ('dataset', 'anns', 'cats', 'imgs', 'imgToAnns', 'catToImgs')
+
+    def __init__(self, annotation_file=None, cache_dir=None):
         if getattr(pycocotools, '__version__', '0') >= '12.0.2':
             warnings.warn(
                 'mmpycocotools is deprecated. Please install official pycocotools by "pip install pycocotools"',  # noqa: E501
                 UserWarning)
-        super().__init__(annotation_file=annotation_file)
+        if annotation_file is not None and cache_dir is not None:
+            cache_file = get_cache_file(annotation_file, cache_dir,
+                                        self.__class__.__name__)
+            index = load_cache(cache_file)
+            if index is None:
+                super().__init__(annotation_file=annotation_file)
+                dump_cache(
+                    {attr: getattr(self, attr)
+                     for attr in self.INDEX_ATTRS}, cache_file)
+            else:
+                print(f'loaded annotations and index from {cache_file}')
+                self.__dict__.update(index)
+        else:
+            super().__init__(annotation_file=annotation_file)
         self.img_ann_map = self.imgToAnns
         self.cat_img_map = self.catToImgs
 
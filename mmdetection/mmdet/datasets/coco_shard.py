@@ -0,0 +1,40 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+from typing import List, Union
+
+from mmdet.registry import DATASETS
+from .coco import CocoDataset
+
+
+@DATASETS.register_module()
+class CocoShardDataset(CocoDataset):
+    """COCO-style dataset whose images are packed into tar shards.
+
+    The annotation file is the offset index written by
+    ``specs/pack_shards.py``: a COCO file whose image records also hold the
+    ``shard`` they are stored in and the byte ``offset`` and ``length`` of
+    their data in it. ``data_prefix['img']`` is the folder of the shards.
+    Images are loaded with :class:`LoadImageFromShard`, which reads them
+    with one positioned read instead of opening one small file per image.
+
+    ``img_path`` still points to ``<data_prefix['img']>/<file_name>`` so
+    that visualization and evaluation keep their usual names, although no
+    such file exists.
+    """
+
+    def parse_data_info(self, raw_data_info: dict) -> Union[dict, List[dict]]:
+        """Parse raw annotation to target format.
+
+        Args:
+            raw_data_info (dict): Raw data information load from ``ann_file``
+
+        Returns:
+            Union[dict, List[dict]]: Parsed annotation.
+        """
+        data_info = super().parse_data_info(raw_data_info)
+        img_info = raw_data_info['raw_img_info']
+        data_info['shard_path'] = osp.join(self.data_prefix['img'],
+                                           img_info['shard'])
+        data_info['shard_offset'] = img_info['offset']
+        data_info['shard_length'] = img_info['length']
+        return data_info
@@ -0,0 +1,118 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import pickle
+from typing import List, Sequence, Union
+
+import numpy as np
+
+INSTANCE_KEYS = ('bbox', 'bbox_label', 'ignore_flag')
+IMAGE_KEYS = ('img_path', 'img_id', 'height', 'width', 'instances')
+
+
+class CompactDataList(Sequence):
+    """A read-only data list that keeps detection data infos in flat arrays.
+
+    A list of data info dicts costs about a kilobyte of Python objects per
+    image, and DataLoader workers that read them bump their reference
+    counts, which copies the pages holding them into every worker (copy on
+    write). Here, the image paths are stored in one string table, the image
+    ids and sizes in arrays, and the ``bbox``, ``bbox_label`` and
+    ``ignore_flag`` of all instances in flat arrays with per-image offsets,
+    so the memory shared with the workers is a handful of NumPy buffers
+    that are never written. Any other keys of an image or its instances,
+    such as ``seg_map_path`` or ``mask``, are pickled per image.
+
+    Items are rebuilt as new dicts on access, with the boxes as lists of
+    float32 values, so they can be modified freely.
+
+    Args:
+        data_list (List[dict]): Data infos with ``img_path``, ``img_id``,
+            ``height``, ``width`` and ``instances``, as given by
+            :meth:`CocoDataset.parse_data_info`.
+    """
+
+    def __init__(self, data_list: List[dict]) -> None:
+        paths = [data_info['img_path'].encode() for data_info in data_list]
+        self.path_offsets = np.cumsum(
+            [0] + [len(path) for path in paths], dtype=np.int64)
+        self.path_bytes = np.frombuffer(b''.join(paths), dtype=np.uint8)
+        self.img_ids = np.array(
+            [data_info['img_id'] for data_info in data_list], dtype=np.int64)
+        self.sizes = np.array([[data_info['height'], data_info['width']]
+                               for data_info in data_list],
+                              dtype=np.int32).reshape(-1, 2)
+
+        instances = [
+            instance for data_info in data_list
+            for instance in data_info['instances']
+        ]
+        self.instance_offsets = np.cumsum(
+            [0] + [len(data_info['instances']) for data_info in data_list],
+            dtype=np.int64)
+        self.bboxes = np.array([instance['bbox'] for instance in instances],
+                               dtype=np.float32).reshape(-1, 4)
+        self.bbox_labels = np.array(
+            [instance['bbox_label'] for instance in instances], dtype=np.int32)
+        self.ignore_flags = np.array(
+            [instance['ignore_flag'] for instance in instances],
+            dtype=np.uint8)
+
+        extras = []
+        for data_info in data_list:
+            extra = {
+                key: value
+                for key, value in data_info.items() if key not in IMAGE_KEYS
+            }
+            instance_extras = [{
+                key: value
+                for key, value in instance.items() if key not in INSTANCE_KEYS
+            } for instance in data_info['instances']]
+            if any(instance_extras):
+                extra['_instances'] = instance_extras
+            extras.append(pickle.dumps(extra, protocol=4))
+        self.extra_offsets = np.cumsum(
+            [0] + [len(x) for x in extras], dtype=np.int64)
+        self.extra_bytes = np.frombuffer(b''.join(extras), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.img_ids)
+
+    def __getitem__(self, idx: Union[int,
+                                     slice]) -> Union[dict, 'CompactDataList']:
+        if isinstance(idx, slice):
+            return self.take(range(*idx.indices(len(self))))
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f'index {idx} is out of range')
+
+        extra_start, extra_end = self.extra_offsets[idx:idx + 2]
+        extra = pickle.loads(
+            memoryview(self.extra_bytes[extra_start:extra_end]))
+        instance_extras = extra.pop('_instances', None)
+        start, end = self.instance_offsets[idx:idx + 2]
+        bboxes = self.bboxes[start:end].tolist()
+        bbox_labels = self.bbox_labels[start:end].tolist()
+        ignore_flags = self.ignore_flags[start:end].tolist()
+        instances = [
+            dict(bbox=bbox, bbox_label=bbox_label, ignore_flag=ignore_flag)
+            for bbox, bbox_label, ignore_flag in zip(bboxes, bbox_labels,
+                                                     ignore_flags)
+        ]
+        if instance_extras is not None:
+            for instance, instance_extra in zip(instances, instance_extras):
+                instance.update(instance_extra)
+
+        path_start, path_end = self.path_offsets[idx:idx + 2]
+        path = self.path_bytes[path_start:path_end].tobytes().decode()
+        data_info = dict(
+            img_path=path,
+            img_id=int(self.img_ids[idx]),
+            height=int(self.sizes[idx, 0]),
+            width=int(self.sizes[idx, 1]))
+        data_info.update(extra)
+        data_info['instances'] = instances
+        return data_info
+
+    def take(self, indices: Sequence[int]) -> 'CompactDataList':
+        """Return a compact data list of the items at ``indices``."""
+        return CompactDataList([self[idx] for idx in indices])
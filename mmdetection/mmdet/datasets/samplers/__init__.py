@@ -6,11 +6,13 @@ from .class_aware_sampler import ClassAwareSampler
 from .custom_sample_size_sampler import CustomSampleSizeSampler
 from .multi_data_sampler import MultiDataSampler
 from .multi_source_sampler import GroupMultiSourceSampler, MultiSourceSampler
+from .shard_sampler import ShardShuffleSampler
 from .track_img_sampler import TrackImgSampler
 
 __all__ = [
     'ClassAwareSampler', 'AspectRatioBatchSampler', 'MultiSourceSampler',
     'GroupMultiSourceSampler', 'TrackImgSampler',
     'TrackAspectRatioBatchSampler', 'MultiDataSampler',
-    'MultiDataAspectRatioBatchSampler', 'CustomSampleSizeSampler'
+    'MultiDataAspectRatioBatchSampler', 'CustomSampleSizeSampler',
+    'ShardShuffleSampler'
 ]
@@ -0,0 +1,69 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from typing import Iterator, Optional, Sized
+
+import torch
+from mmengine.dataset import DefaultSampler
+
+from mmdet.registry import DATA_SAMPLERS
+
+
+@DATA_SAMPLERS.register_module()
+class ShardShuffleSampler(DefaultSampler):
+    """Shuffle a sharded dataset while keeping the reads of each shard close.
+
+    Instead of a global permutation, the order of the shards and the order
+    of the images within every shard are shuffled, so consecutive samples
+    come from the same shard file and an epoch reads the shards one after
+    the other rather than seeking across all of them. The shard of each
+    sample is read from the ``shard_path`` of its data info, as given by
+    :class:`CocoShardDataset`.
+
+    Args:
+        dataset (Sized): The dataset.
+        shuffle (bool): Whether shuffle the dataset or not. Without
+            shuffling the samples are returned in the dataset order, which
+            is the order they are stored in. Defaults to True.
+        seed (int, optional): Random seed used to shuffle the sampler if
+            :attr:`shuffle=True`. This number should be identical across all
+            processes in the distributed group. Defaults to None.
+        round_up (bool): Whether to add extra samples to make the number of
+            samples evenly divisible by the world size. Defaults to True.
+    """
+
+    def __init__(self,
+                 dataset: Sized,
+                 shuffle: bool = True,
+                 seed: Optional[int] = None,
+                 round_up: bool = True) -> None:
+        super().__init__(
+            dataset=dataset, shuffle=shuffle, seed=seed, round_up=round_up)
+        shards = {}
+        for idx in range(len(dataset)):
+            shard_path = dataset.get_data_info(idx)['shard_path']
+            shards.setdefault(shard_path, []).append(idx)
+        self.shard_indices = list(shards.values())
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate the indices."""
+        if self.shuffle:
+            g = torch.Generator()
+            g.manual_seed(self.seed + self.epoch)
+            indices = []
+            for shard in torch.randperm(
+                    len(self.shard_indices), generator=g).tolist():
+                shard_indices = self.shard_indices[shard]
+                indices.extend(shard_indices[i] for i in torch.randperm(
+                    len(shard_indices), generator=g).tolist())
+        else:
+            indices = torch.arange(len(self.dataset)).tolist()
+
+        # add extra samples to make it evenly divisible
+        if self.round_up:
+            indices = (
+                indices *
+                int(self.total_size / len(indices) + 1))[:self.total_size]
+
+        # subsample
+        indices = indices[self.rank:self.total_size:self.world_size]
+
+        return iter(indices)
@@ -0,0 +1,172 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from mmengine.fileio import list_from_file
+
+from mmdet.registry import DATASETS
+from .base_det_dataset import BaseDetDataset
+from .spectrogram_utils import band_bbox, raw_image_size, sampling_freq
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+PROPELLERS = {
+    'fr': 'front_right',
+    'br': 'back_right',
+    'fl': 'front_left',
+    'bl': 'back_left'
+}
+
+
+@DATASETS.register_module()
+class SpectrogramDataset(BaseDetDataset):
+    """Dataset of LiDAR spectrograms computed on the fly from HDF5 captures.
+
+    Every requested range bin of every capture is one image. The dataset
+    only reads the capture metadata (data shape, timestamps and
+    ``parameters/prop_frequency``) to build the annotations; the
+    spectrogram itself is computed by :class:`LoadSpectrogramFromHDF5`
+    in the pipeline, so no PNGs have to be written or decoded.
+
+    The image of a range bin is its spectrogram resampled to ``img_size``,
+    with frequency decreasing from top to bottom, as the raw PNGs of
+    ``specs/gen_spec.py``. The ground truth box is the full-width band
+    around the propeller frequency that ``gen_spec.py`` writes for them,
+    computed by the same :func:`band_bbox`, so both datasets have the same
+    images and labels.
+
+    Args:
+        ann_file (str): Optional text file listing the captures to use,
+            one file name per line, relative to ``data_prefix['img']``.
+            Absolute paths, such as in the split lists written by
+            ``split_data.py --link-mode manifest``, are used as they are.
+            If empty, every ``.h5``/``.hdf5`` file in ``data_prefix['img']``
+            is used. Defaults to ''.
+        range_bins (Sequence[int]): Range bins to turn into images.
+            Out-of-bounds bins are skipped. Defaults to (0, ).
+        band_hz (float): Half height of the ground truth band in Hz.
+            Defaults to 40.
+        n_pixels (int, optional): Half height of the ground truth band in
+            image rows, used instead of ``band_hz``. Defaults to None.
+        img_size (tuple[int], optional): (width, height) of the images.
+            Defaults to the size of the raw images of ``gen_spec.py``, see
+            :func:`raw_image_size`.
+        nfft (int): Number of samples per FFT segment. Defaults to 256.
+    """
+
+    METAINFO = {
+        'classes': ('drone_frequency', ),
+        # palette is a list of color tuples, which is used for visualization.
+        'palette': [(255, 165, 0)]
+    }
+
+    def __init__(self,
+                 *args,
+                 ann_file: str = '',
+                 range_bins: Sequence[int] = (0, ),
+                 band_hz: float = 40.,
+                 n_pixels: Optional[int] = None,
+                 img_size: Optional[Tuple[int, int]] = None,
+                 nfft: int = 256,
+                 **kwargs) -> None:
+        if h5py is None:
+            raise RuntimeError(
+                'Package h5py is not installed. Please run "pip install h5py".'
+            )
+        self.range_bins = list(range_bins)
+        self.band_hz = band_hz
+        self.n_pixels = n_pixels
+        self.img_size = tuple(img_size) if img_size else raw_image_size()
+        self.nfft = nfft
+        super().__init__(*args, ann_file=ann_file, **kwargs)
+
+    def load_data_list(self) -> List[dict]:
+        """Build one data info per capture and range bin.
+
+        Returns:
+            List[dict]: A list of annotation.
+        """
+        img_dir = self.data_prefix.get('img', '')
+        if self.ann_file:
+            file_names = list_from_file(
+                self.ann_file, backend_args=self.backend_args)
+        else:
+            file_names = sorted(
+                f for f in os.listdir(img_dir) if f.endswith(('.h5', '.hdf5')))
+
+        data_list = []
+        for file_name in file_names:
+            data_list.extend(
+                self.parse_data_info(
+                    dict(
+                        file_name=file_name,
+                        img_path=osp.join(img_dir, file_name),
+                        img_id=len(data_list))))
+        return data_list
+
+    def parse_data_info(self, raw_data_info: dict) -> List[dict]:
+        """Parse the range-bin images of one capture.
+
+        Args:
+            raw_data_info (dict): Raw data information with ``file_name``,
+                ``img_path`` and the ``img_id`` of the first image.
+
+        Returns:
+            List[dict]: One parsed annotation per valid range bin.
+        """
+        img_path = raw_data_info['img_path']
+        with h5py.File(img_path, 'r') as f:
+            data_shape = f['data/data'].shape
+            fs = sampling_freq(f['data/timestamps'][()])
+            propeller = PROPELLERS.get(self._propeller(img_path), '')
+            prop_path = f'parameters/prop_frequency/{propeller}/avg'
+            prop_freq = f[prop_path][()] if propeller and \
+                prop_path in f else None
+
+        freqs = np.fft.rfftfreq(self.nfft, 1 / fs)
+        width, height = self.img_size
+
+        instances = []
+        if prop_freq is not None:
+            x, y, w, h = band_bbox(freqs, round(prop_freq[0]), self.img_size,
+                                   self.band_hz, self.n_pixels)
+            instances.append(
+                dict(bbox=[x, y, x + w, y + h], bbox_label=0, ignore_flag=0))
+
+        data_infos = []
+        for range_bin in self.range_bins:
+            if range_bin < 0 or range_bin >= data_shape[-2]:
+                continue
+            data_infos.append(
+                dict(
+                    img_path=img_path,
+                    img_id=raw_data_info['img_id'] + len(data_infos),
+                    range_bin=range_bin,
+                    sampling_freq=fs,
+                    height=height,
+                    width=width,
+                    instances=[dict(instance) for instance in instances]))
+        return data_infos
+
+    @staticmethod
+    def _propeller(img_path: str) -> str:
+        """Propeller abbreviation from a capture file name, e.g. ``'fr'``."""
+        base_name = osp.splitext(osp.basename(img_path))[0]
+        return base_name.split('-')[-2]
+
+    def filter_data(self) -> List[dict]:
+        """Filter images without ground truth when ``filter_empty_gt``.
+
+        Returns:
+            List[dict]: Filtered results.
+        """
+        if self.test_mode or self.filter_cfg is None:
+            return self.data_list
+        if not self.filter_cfg.get('filter_empty_gt', False):
+            return self.data_list
+        return [info for info in self.data_list if len(info['instances'])]
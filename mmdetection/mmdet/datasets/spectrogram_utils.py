@@ -0,0 +1,249 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+# Spectrogram helpers shared by SpectrogramDataset, LoadSpectrogramFromHDF5
+# and specs/gen_spec.py, so images and boxes computed on the fly match the
+# rendered PNG datasets. gen_spec.py loads this file by its path without
+# importing mmdet, so it must not import anything from mmdet, and scipy
+# and matplotlib are only imported by the functions that need them.
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+def sampling_freq(timestamps: np.ndarray) -> float:
+    """Sampling frequency in Hz of a capture.
+
+    Args:
+        timestamps (np.ndarray): ``data/timestamps`` of the capture in ns,
+            with shape (1, num_samples) or (num_samples, ).
+
+    Returns:
+        float: The inverse of the mean sampling period.
+    """
+    timestamps = np.atleast_2d(timestamps) / 1e9
+    return 1 / np.mean(np.diff(timestamps[0, :]))
+
+
+def nominal_sampling_freq(fs: float, digits: int = 4) -> float:
+    """Round a measured sampling frequency to ``digits`` significant digits,
+    e.g. 4999.87 Hz to 5000 Hz."""
+    return float(f'{fs:.{digits}g}')
+
+
+@lru_cache(maxsize=16)
+def design_high_pass(order: int,
+                     cutoff: float,
+                     fs: float,
+                     sos: bool = False) -> tuple:
+    """Butterworth high-pass coefficients, cached per (order, cutoff, fs).
+
+    Callers pass a nominal frequency from :func:`nominal_sampling_freq`,
+    since the frequency measured from the timestamps of every capture
+    differs slightly.
+    """
+    from scipy.signal import butter
+    normal_cutoff = cutoff / (0.5 * fs)
+    if sos:
+        return butter(order, normal_cutoff, btype='high', output='sos')
+    return butter(order, normal_cutoff, btype='high')
+
+
+def high_pass_filter(data: np.ndarray,
+                     cutoff: float,
+                     fs: float,
+                     order: int = 1,
+                     sos: bool = False) -> np.ndarray:
+    """Zero-phase Butterworth high-pass filter along the last (time) axis.
+
+    The filter is designed for the nominal frequency of ``fs``, which moves
+    the cut-off by less than 0.05%.
+
+    Args:
+        data (np.ndarray): Signals with shape (..., num_samples).
+        cutoff (float): Cut-off frequency in Hz.
+        fs (float): Sampling frequency in Hz.
+        order (int): Filter order. Defaults to 1.
+        sos (bool): Whether to filter with second-order sections, which
+            stay numerically stable at higher orders. Defaults to False.
+
+    Returns:
+        np.ndarray: The filtered signals.
+    """
+    from scipy.signal import filtfilt, sosfiltfilt
+    fs = nominal_sampling_freq(fs)
+    if sos:
+        return sosfiltfilt(
+            design_high_pass(order, cutoff, fs, sos=True), data, axis=-1)
+    b, a = design_high_pass(order, cutoff, fs)
+    return filtfilt(b, a, data, axis=-1)
+
+
+def spectrogram_psd(
+        signals: np.ndarray,
+        fs: float,
+        nfft: int = 256,
+        noverlap: int = 192,
+        pad_to: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute the one-sided PSD spectrograms of the rows of ``signals``.
+
+    This matches ``matplotlib.pyplot.specgram`` with its default Hann
+    window, no detrending and a PSD scaled by frequency.
+
+    Args:
+        signals (np.ndarray): Signals with shape (..., num_samples).
+        fs (float): Sampling frequency in Hz.
+        nfft (int): Number of samples per FFT segment. Defaults to 256.
+        noverlap (int): Number of overlapping samples between segments.
+            Defaults to 192.
+        pad_to (int, optional): FFT length the segments are zero padded
+            to. Defaults to ``nfft``.
+
+    Returns:
+        tuple[np.ndarray]: The PSD with shape (..., num_freqs, num_segments),
+        the frequencies and the segment centre times.
+    """
+    signals = np.asarray(signals)
+    if pad_to is None:
+        pad_to = nfft
+    # zero pad short signals up to nfft, as matplotlib does
+    if signals.shape[-1] < nfft:
+        pad_width = [(0, 0)] * (signals.ndim - 1) + \
+            [(0, nfft - signals.shape[-1])]
+        signals = np.pad(signals, pad_width)
+    num_samples = signals.shape[-1]
+
+    window = np.hanning(nfft)
+    segments = np.lib.stride_tricks.sliding_window_view(
+        signals, nfft, axis=-1)[..., ::nfft - noverlap, :]
+    result = np.fft.rfft(segments * window, n=pad_to, axis=-1)
+    psd = np.swapaxes(result.real**2 + result.imag**2, -1, -2)
+
+    # one-sided scaling of everything but DC (and nfft / 2 for an even nfft)
+    if not nfft % 2:
+        psd[..., 1:-1, :] *= 2.
+    else:
+        psd[..., 1:, :] *= 2.
+    psd /= fs * (window**2).sum()
+
+    freqs = np.fft.rfftfreq(pad_to, 1 / fs)
+    times = np.arange(nfft / 2, num_samples - nfft / 2 + 1,
+                      nfft - noverlap) / fs
+    return psd, freqs, times
+
+
+def raw_image_size(figsize: Tuple[float, float] = (10, 6),
+                   dpi: int = 100) -> Tuple[int, int]:
+    """(width, height) of the raw spectrogram images of ``gen_spec.py``.
+
+    This is the axes area of a matplotlib figure of ``figsize``, which a
+    tightly cropped ``plt.specgram`` figure has, i.e. (775, 462) with the
+    default rcParams.
+    """
+    import matplotlib
+    params = matplotlib.rcParams
+    width = figsize[0] * dpi * (
+        params['figure.subplot.right'] - params['figure.subplot.left'])
+    height = figsize[1] * dpi * (
+        params['figure.subplot.top'] - params['figure.subplot.bottom'])
+    return int(round(width)), int(round(height))
+
+
+def resample_image(img: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """Resample a 2D float array to ``size`` (width, height).
+
+    Nearest neighbour is used to stretch the spectrogram and area averaging
+    to shrink it.
+    """
+    width, height = size
+    if width >= img.shape[1] and height >= img.shape[0]:
+        resample = Image.NEAREST
+    else:
+        resample = Image.BOX
+    return np.asarray(
+        Image.fromarray(img).resize((width, height), resample=resample))
+
+
+def colormap_lut(cmap: Optional[str] = None) -> np.ndarray:
+    """RGB uint8 lookup table of a matplotlib colormap.
+
+    Args:
+        cmap (str, optional): Colormap name. Defaults to the default
+            colormap of ``imshow``, i.e. 'viridis'.
+
+    Returns:
+        np.ndarray: Lookup table with shape (num_colors, 3).
+    """
+    import matplotlib
+    colormap = matplotlib.colormaps[cmap or matplotlib.rcParams['image.cmap']]
+    return colormap(np.arange(colormap.N), bytes=True)[:, :3]
+
+
+def spectrogram_image(psd: np.ndarray,
+                      size: Tuple[int, int],
+                      lut: Optional[np.ndarray] = None) -> np.ndarray:
+    """Turn a PSD spectrogram into a raw image of ``size`` (width, height).
+
+    The PSD is converted to dB, flipped so that frequency decreases from
+    the top row to the bottom row and resampled to ``size``. With a ``lut``
+    from :func:`colormap_lut`, the dB values are mapped through it with the
+    min/max of the spectrogram before resampling, like ``imshow`` does for
+    the rendered PNGs.
+
+    Args:
+        psd (np.ndarray): PSD with shape (num_freqs, num_segments).
+        size (tuple[int]): (width, height) of the image.
+        lut (np.ndarray, optional): Colormap lookup table. If None, the
+            float32 dB values are returned. Defaults to None.
+
+    Returns:
+        np.ndarray: The (height, width) dB image or the (height, width, 3)
+        colormapped image.
+    """
+    spec = np.flipud(10. * np.log10(psd)).astype(np.float32)
+    vmin, vmax = spec.min(), spec.max()
+    spec = resample_image(spec, size)
+    if lut is None:
+        return spec
+
+    num_colors = len(lut)
+    if vmax > vmin:
+        indices = ((spec - vmin) / (vmax - vmin) * num_colors).astype(int)
+    else:
+        indices = np.zeros(spec.shape, dtype=int)
+    return lut[np.clip(indices, 0, num_colors - 1)]
+
+
+def band_bbox(freqs: np.ndarray,
+              freq: float,
+              size: Tuple[int, int],
+              band_hz: float = 40.,
+              n_pixels: Optional[float] = None) -> List[int]:
+    """COCO box of the full-width band around ``freq`` in a raw image.
+
+    The images show ``freqs[-1]`` in their top row and ``freqs[0]`` in
+    their bottom row. The box is centred on the row of the frequency bin
+    nearest to ``freq``, reaches ``band_hz`` above and below it, or
+    ``n_pixels`` rows if given, clipped to the image, and spans the full
+    width of the image, i.e. the whole capture.
+
+    Args:
+        freqs (np.ndarray): Frequencies of the spectrogram rows in Hz.
+        freq (float): Centre frequency of the band in Hz.
+        size (tuple[int]): (width, height) of the image.
+        band_hz (float): Half height of the band in Hz. Defaults to 40.
+        n_pixels (float, optional): Half height of the band in image rows,
+            used instead of ``band_hz``. Defaults to None.
+
+    Returns:
+        list[int]: The box as [x, y, width, height] in pixels.
+    """
+    width, height = size
+    if n_pixels is None:
+        n_pixels = band_hz / (freqs[-1] - freqs[0]) * height
+    band_freq = freqs[np.abs(freqs - freq).argmin()]
+    row = (freqs[-1] - band_freq) / (freqs[-1] - freqs[0]) * height
+    y1 = int(round(max(row - n_pixels, 0)))
+    y2 = int(round(min(row + n_pixels, height)))
+    return [0, y1, int(width), y2 - y1]
@@ -10,9 +10,11 @@ from .geometric import (GeomTransform, Rotate, ShearX, ShearY, TranslateX,
                         TranslateY)
 from .instaboost import InstaBoost
 from .loading import (FilterAnnotations, InferencerLoader, LoadAnnotations,
-                      LoadEmptyAnnotations, LoadImageFromNDArray,
-                      LoadMultiChannelImageFromFiles, LoadPanopticAnnotations,
-                      LoadProposals, LoadTrackAnnotations)
+                      LoadEmptyAnnotations, LoadImageFromMemmap,
+                      LoadImageFromNDArray, LoadImageFromNpyFile,
+                      LoadImageFromShard, LoadMultiChannelImageFromFiles,
+                      LoadPanopticAnnotations, LoadProposals,
+                      LoadSpectrogramFromHDF5, LoadTrackAnnotations)
 from .text_transformers import LoadTextAnnotations, RandomSamplingNegPos
 from .transformers_glip import GTBoxSubOne_GLIP, RandomFlip_GLIP
 from .transforms import (Albu, CachedMixUp, CachedMosaic, CopyPaste, CutOut,
@@ -22,7 +24,8 @@ from .transforms import (Albu, CachedMixUp, CachedMosaic, CopyPaste, CutOut,
                          RandomCenterCropPad, RandomCrop, RandomErasing,
                          RandomFlip, RandomShift, Resize, ResizeShortestEdge,
                          SegRescale, YOLOXHSVRandomAug)
-from .wrappers import MultiBranch, ProposalBroadcaster, RandomOrder
+from .wrappers import (CachedImageLoader, MultiBranch, ProposalBroadcaster,
+                       RandomOrder)
 
 __all__ = [
     'PackDetInputs', 'ToTensor', 'ImageToTensor', 'Transpose',
@@ -41,5 +44,7 @@ __all__ = [
     'LoadTrackAnnotations', 'BaseFrameSample', 'UniformRefFrameSample',
     'PackTrackInputs', 'PackReIDInputs', 'FixScaleResize',
     'ResizeShortestEdge', 'GTBoxSubOne_GLIP', 'RandomFlip_GLIP',
-    'RandomSamplingNegPos', 'LoadTextAnnotations'
+    'RandomSamplingNegPos', 'LoadTextAnnotations', 'LoadSpectrogramFromHDF5',
+    'LoadImageFromNpyFile', 'LoadImageFromShard', 'LoadImageFromMemmap',
+    'CachedImageLoader'
 ]
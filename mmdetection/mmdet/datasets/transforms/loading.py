@@ -1,4 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import io
+import os
+from collections import OrderedDict
 from typing import Optional, Tuple, Union
 
 import mmcv
@@ -8,13 +11,21 @@ import torch
 from mmcv.transforms import BaseTransform
 from mmcv.transforms import LoadAnnotations as MMCV_LoadAnnotations
 from mmcv.transforms import LoadImageFromFile
-from mmengine.fileio import get
+from mmengine.fileio import get, load
 from mmengine.structures import BaseDataElement
 
 from mmdet.registry import TRANSFORMS
 from mmdet.structures.bbox import get_box_type
 from mmdet.structures.bbox.box_type import autocast_box_type
 from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from ..spectrogram_utils import (colormap_lut, high_pass_filter,
+                                 raw_image_size, sampling_freq,
+                                 spectrogram_image, spectrogram_psd)
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
 
 
 @TRANSFORMS.register_module()
@@ -151,6 +162,449 @@ class LoadMultiChannelImageFromFiles(BaseTransform):
         return repr_str
 
 
+@TRANSFORMS.register_module()
+class LoadSpectrogramFromHDF5(BaseTransform):
+    """Compute the spectrogram image of one range bin of an HDF5 capture.
+
+    Only the row of ``data/data`` that belongs to ``results['range_bin']``
+    is read. It is filtered, transformed and turned into an image with the
+    helpers of :mod:`mmdet.datasets.spectrogram_utils`, which
+    ``specs/gen_spec.py`` uses for the raw PNGs: the PSD spectrogram is
+    converted to dB, flipped so that frequency decreases from top to
+    bottom, resampled to the image size and mapped through ``cmap`` with
+    the min/max of the spectrogram. This yields the BGR uint8 image
+    :obj:`LoadImageFromFile` would return for the PNG. With ``cmap=None``
+    the colormap is skipped and the image is the single-channel float32 dB
+    spectrogram of shape (H, W, 1), as written by
+    ``gen_spec.py --raw_format npy``.
+
+    The capture is opened on every call, so the transform is safe to use
+    in forked DataLoader workers. The spectrograms are kept in a per-worker
+    LRU cache of ``cache_size`` entries before they are resampled, which is
+    about 30 KB each with the defaults, so later epochs skip the FFT.
+
+    Required Keys:
+
+    - img_path
+    - range_bin
+    - sampling_freq (optional, read from ``data/timestamps`` if missing)
+    - width, height (optional, the size of the raw images of
+      ``gen_spec.py`` if missing)
+
+    Modified Keys:
+
+    - img
+    - img_shape
+    - ori_shape
+
+    Args:
+        nfft (int): Number of samples per FFT segment. Defaults to 256.
+        noverlap (int): Number of overlapping samples between segments.
+            Defaults to 192.
+        filter_order (int, optional): Order of the Butterworth high-pass
+            filter applied before the FFT. No filter if None.
+            Defaults to None.
+        cutoff (float): Cut-off frequency of the high-pass filter in Hz.
+            Defaults to 50.
+        filter_sos (bool): Whether to run the filter as second-order
+            sections, like ``gen_spec.py --filter_sos``. Defaults to False.
+        cmap (str, optional): Matplotlib colormap name. If None, the dB
+            values are returned without colormapping. Defaults to 'viridis'.
+        to_float32 (bool): Whether to convert the image to a float32
+            numpy array. Defaults to False.
+        cache_size (int): Maximum number of spectrograms kept in the cache.
+            0 disables caching. Defaults to 0.
+    """
+
+    def __init__(self,
+                 nfft: int = 256,
+                 noverlap: int = 192,
+                 filter_order: Optional[int] = None,
+                 cutoff: float = 50.,
+                 filter_sos: bool = False,
+                 cmap: Optional[str] = 'viridis',
+                 to_float32: bool = False,
+                 cache_size: int = 0) -> None:
+        if h5py is None:
+            raise RuntimeError(
+                'Package h5py is not installed. Please run "pip install h5py".'
+            )
+        self.nfft = nfft
+        self.noverlap = noverlap
+        self.filter_order = filter_order
+        self.cutoff = cutoff
+        self.filter_sos = filter_sos
+        self.cmap = cmap
+        self.to_float32 = to_float32
+        self.cache_size = cache_size
+        self._lut = None
+        if cmap is not None:
+            # colormap lookup table in BGR order
+            self._lut = colormap_lut(cmap)[:, ::-1]
+        self._cache = OrderedDict()
+
+    def _compute(self, img_path: str, range_bin: int,
+                 fs: Optional[float]) -> np.ndarray:
+        """Read one range bin and compute its PSD spectrogram."""
+        with h5py.File(img_path, 'r') as f:
+            dataset = f['data/data']
+            if dataset.ndim == 3:
+                signal = dataset[0, range_bin, :]
+            else:
+                signal = dataset[range_bin, :]
+            if fs is None:
+                fs = sampling_freq(f['data/timestamps'][()])
+
+        if self.filter_order:
+            signal = high_pass_filter(signal, self.cutoff, fs,
+                                      self.filter_order, self.filter_sos)
+        psd, _, _ = spectrogram_psd(signal, fs, self.nfft, self.noverlap)
+        return psd
+
+    def transform(self, results: dict) -> dict:
+        """Transform function to compute the spectrogram image.
+
+        Args:
+            results (dict): Result dict from
+                :obj:`mmdet.datasets.SpectrogramDataset`.
+
+        Returns:
+            dict: The dict contains the spectrogram image and meta
+            information.
+        """
+        key = (results['img_path'], results['range_bin'])
+        psd = self._cache.get(key)
+        if psd is None:
+            psd = self._compute(results['img_path'], results['range_bin'],
+                                results.get('sampling_freq'))
+            if self.cache_size > 0:
+                self._cache[key] = psd
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        if 'width' in results and 'height' in results:
+            size = (results['width'], results['height'])
+        else:
+            size = raw_image_size()
+        img = spectrogram_image(psd, size, self._lut)
+        if self._lut is None:
+            # a copy, since the resampled array is read-only
+            img = img[..., None].copy()
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        results['img'] = img
+        results['img_shape'] = img.shape[:2]
+        results['ori_shape'] = img.shape[:2]
+        return results
+
+    def __repr__(self) -> str:
+        repr_str = (f'{self.__class__.__name__}('
+                    f'nfft={self.nfft}, '
+                    f'noverlap={self.noverlap}, '
+                    f'filter_order={self.filter_order}, '
+                    f'cutoff={self.cutoff}, '
+                    f'filter_sos={self.filter_sos}, '
+                    f'cmap={self.cmap!r}, '
+                    f'to_float32={self.to_float32}, '
+                    f'cache_size={self.cache_size})')
+        return repr_str
+
+
+@TRANSFORMS.register_module()
+class LoadImageFromNpyFile(BaseTransform):
+    """Load an image stored as a NumPy ``.npy`` array.
+
+    Unlike :obj:`LoadImageFromFile`, no decoding or color conversion takes
+    place, so float images such as the single-channel float16 dB
+    spectrograms written by ``gen_spec.py --raw_format npy`` are loaded
+    with their full precision. 2D arrays get a trailing channel axis.
+
+    Required Keys:
+
+    - img_path
+
+    Modified Keys:
+
+    - img
+    - img_shape
+    - ori_shape
+
+    Args:
+        to_float32 (bool): Whether to convert the loaded image to a float32
+            numpy array. float16 images are not supported by most
+            transforms, so this defaults to True.
+        ignore_empty (bool): Whether to allow loading empty image or file
+            path not existent. Defaults to False.
+        backend_args (dict, optional): Arguments to instantiate the
+            corresponding backend. Defaults to None.
+    """
+
+    def __init__(self,
+                 to_float32: bool = True,
+                 ignore_empty: bool = False,
+                 backend_args: Optional[dict] = None) -> None:
+        self.to_float32 = to_float32
+        self.ignore_empty = ignore_empty
+        self.backend_args = backend_args.copy() if backend_args else None
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Functions to load image.
+
+        Args:
+            results (dict): Result dict from
+                :class:`mmengine.dataset.BaseDataset`.
+
+        Returns:
+            dict: The dict contains loaded image and meta information.
+        """
+        filename = results['img_path']
+        try:
+            img_bytes = get(filename, backend_args=self.backend_args)
+            img = np.load(io.BytesIO(img_bytes), allow_pickle=False)
+        except Exception as e:
+            if self.ignore_empty:
+                return None
+            else:
+                raise e
+        if img.ndim == 2:
+            img = img[..., None]
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        results['img'] = img
+        results['img_shape'] = img.shape[:2]
+        results['ori_shape'] = img.shape[:2]
+        return results
+
+    def __repr__(self) -> str:
+        repr_str = (f'{self.__class__.__name__}('
+                    f'to_float32={self.to_float32}, '
+                    f'ignore_empty={self.ignore_empty}, '
+                    f'backend_args={self.backend_args})')
+        return repr_str
+
+
+@TRANSFORMS.register_module()
+class LoadImageFromShard(LoadImageFromFile):
+    """Load an image from a tar shard written by ``specs/pack_shards.py``.
+
+    The image bytes are read with a single positioned read at the offset
+    given by :class:`CocoShardDataset`, so loading an image costs no file
+    open or directory lookup once its shard is open. Each process keeps up
+    to ``max_open_files`` shards open, closing the least recently used one
+    when it needs another. ``.npy`` members are loaded as arrays like
+    :class:`LoadImageFromNpyFile` does, all others are decoded as images.
+
+    Shards must be on a local or mounted file system.
+
+    Required Keys:
+
+    - img_path
+    - shard_path
+    - shard_offset
+    - shard_length
+
+    Modified Keys:
+
+    - img
+    - img_shape
+    - ori_shape
+
+    Args:
+        max_open_files (int): Maximum number of shards kept open by each
+            process. Defaults to 16.
+        to_float32 (bool): Whether to convert the loaded image to a float32
+            numpy array. If set to False, the loaded image is an uint8 array.
+            Defaults to False.
+        color_type (str): The flag argument for :func:`mmcv.imfrombytes`.
+            Defaults to 'color'.
+        imdecode_backend (str): The image decoding backend type. The backend
+            argument for :func:`mmcv.imfrombytes`.
+            See :func:`mmcv.imfrombytes` for details.
+            Defaults to 'cv2'.
+        ignore_empty (bool): Whether to allow loading empty image or file
+            path not existent. Defaults to False.
+    """
+
+    def __init__(self, max_open_files: int = 16, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.max_open_files = max_open_files
+        self._shards = OrderedDict()
+
+    def _read(self, shard_path: str, offset: int, length: int) -> bytes:
+        """Read ``length`` bytes at ``offset`` of a shard."""
+        fd = self._shards.get(shard_path)
+        if fd is None:
+            if len(self._shards) >= self.max_open_files:
+                os.close(self._shards.popitem(last=False)[1])
+            fd = os.open(shard_path, os.O_RDONLY)
+            self._shards[shard_path] = fd
+        else:
+            self._shards.move_to_end(shard_path)
+        # pread does not move a file position, so forked workers can share
+        # descriptors opened before the fork
+        data = os.pread(fd, length, offset)
+        if len(data) != length:
+            raise IOError(f'{shard_path} ends before offset {offset} + '
+                          f'{length}, it may be truncated.')
+        return data
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Functions to load image.
+
+        Args:
+            results (dict): Result dict from
+                :class:`mmengine.dataset.BaseDataset`.
+
+        Returns:
+            dict: The dict contains loaded image and meta information.
+        """
+        try:
+            img_bytes = self._read(results['shard_path'],
+                                   results['shard_offset'],
+                                   results['shard_length'])
+            if results['img_path'].endswith('.npy'):
+                img = np.load(io.BytesIO(img_bytes), allow_pickle=False)
+                if img.ndim == 2:
+                    img = img[..., None]
+            else:
+                img = mmcv.imfrombytes(
+                    img_bytes,
+                    flag=self.color_type,
+                    backend=self.imdecode_backend)
+        except Exception as e:
+            if self.ignore_empty:
+                return None
+            else:
+                raise e
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        results['img'] = img
+        results['img_shape'] = img.shape[:2]
+        results['ori_shape'] = img.shape[:2]
+        return results
+
+    def __getstate__(self) -> dict:
+        # Descriptors are per process and cannot be pickled for spawned
+        # workers, which open their own shards
+        state = self.__dict__.copy()
+        state['_shards'] = OrderedDict()
+        return state
+
+    def __del__(self) -> None:
+        for fd in getattr(self, '_shards', {}).values():
+            os.close(fd)
+
+    def __repr__(self) -> str:
+        repr_str = (f'{self.__class__.__name__}('
+                    f'max_open_files={self.max_open_files}, '
+                    f'ignore_empty={self.ignore_empty}, '
+                    f'to_float32={self.to_float32}, '
+                    f"color_type='{self.color_type}', "
+                    f"imdecode_backend='{self.imdecode_backend}')")
+        return repr_str
+
+
+@TRANSFORMS.register_module()
+class LoadImageFromMemmap(BaseTransform):
+    """Load an image from the memory-mapped image array of a split.
+
+    ``gen_spec.py --memmap`` packs all raw images of a split into one
+    ``.npy`` array of shape (num_images, height, width, channels), uint8 or
+    float16, and writes an index with the row and ``file_name`` of every
+    image. This transform looks up the row of ``img_path`` by its file name
+    and returns that row of the array without reading or decoding a file.
+
+    The array is mapped copy-on-write the first time an image is loaded in
+    a process, so the image is a view on the shared OS page cache rather
+    than a private copy, and transforms that modify it in place only copy
+    the pages they touch. DataLoader workers thereby share one cached copy
+    of the data.
+
+    Required Keys:
+
+    - img_path
+
+    Modified Keys:
+
+    - img
+    - img_shape
+    - ori_shape
+
+    Args:
+        memmap_file (str): Path of the ``.npy`` image array.
+        index_file (str, optional): Path of its index. Defaults to
+            ``spectrograms_index.json`` next to ``memmap_file``.
+        to_float32 (bool): Whether to convert the loaded image to a float32
+            numpy array, which copies it. float16 arrays should be
+            converted, as most transforms do not support them. Defaults to
+            False.
+    """
+
+    def __init__(self,
+                 memmap_file: str,
+                 index_file: Optional[str] = None,
+                 to_float32: bool = False) -> None:
+        self.memmap_file = memmap_file
+        if index_file is None:
+            index_file = os.path.join(
+                os.path.dirname(memmap_file), 'spectrograms_index.json')
+        self.index_file = index_file
+        self.to_float32 = to_float32
+        index = load(index_file)
+        self.rows = {
+            image['file_name']: image['row']
+            for image in index['images']
+        }
+        self._images = None
+
+    @property
+    def images(self) -> np.ndarray:
+        """The image array, mapped on first use in each process."""
+        if self._images is None:
+            self._images = np.load(self.memmap_file, mmap_mode='c')
+        return self._images
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Functions to load image.
+
+        Args:
+            results (dict): Result dict from
+                :class:`mmengine.dataset.BaseDataset`.
+
+        Returns:
+            dict: The dict contains loaded image and meta information.
+        """
+        file_name = os.path.basename(results['img_path'])
+        if file_name not in self.rows:
+            raise KeyError(f'{file_name} is not in {self.index_file}')
+        img = self.images[self.rows[file_name]]
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        results['img'] = img
+        results['img_shape'] = img.shape[:2]
+        results['ori_shape'] = img.shape[:2]
+        return results
+
+    def __getstate__(self) -> dict:
+        # Pickling a memmap would copy the whole array into spawned workers
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    def __repr__(self) -> str:
+        repr_str = (f'{self.__class__.__name__}('
+                    f"memmap_file='{self.memmap_file}', "
+                    f"index_file='{self.index_file}', "
+                    f'to_float32={self.to_float32})')
+        return repr_str
+
+
 @TRANSFORMS.register_module()
 class LoadAnnotations(MMCV_LoadAnnotations):
     """Load and process the ``instances`` and ``seg_map`` annotation provided
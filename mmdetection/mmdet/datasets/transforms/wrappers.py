@@ -1,5 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import atexit
 import copy
+import hashlib
+import os
+import os.path as osp
+import shutil
 from typing import Callable, Dict, List, Optional, Union
 
 import numpy as np
@@ -275,3 +280,180 @@ class ProposalBroadcaster(BaseTransform):
         outputs = output_scatters[0]
         outputs['proposals'] = output_scatters[1]['gt_bboxes']
         return outputs
+
+
+@TRANSFORMS.register_module()
+class CachedImageLoader(BaseTransform):
+    """A wrapper that keeps the images decoded by a loading transform in a
+    size-bounded cache directory shared by all processes.
+
+    Decoded images are stored as ``.npy`` files keyed by the image path,
+    its modification time and size, and the wrapped loader's settings, so
+    a changed image or loader is decoded again. On a hit, the array is read
+    back without calling the wrapped loader, so once the dataset fits into
+    the cache only the first epoch decodes images. Every DataLoader worker
+    and rank on a machine uses the same files. The cache outlives the run
+    unless ``remove_on_exit`` is set, so point ``cache_dir`` at a folder of
+    the job, e.g. named after ``$SLURM_JOB_ID``, on shared nodes.
+
+    The default ``cache_dir`` is in ``/dev/shm``, i.e. in shared memory.
+    When the files in the cache exceed ``cache_size_mb``, the least
+    recently used ones are removed until ``evict_ratio`` of the budget is
+    left. Each process checks the size after writing 1/64 of the budget,
+    so the cache can exceed it by a few percent in between.
+
+    Images whose path cannot be checked on the local file system are
+    loaded without the cache.
+
+    Required Keys:
+
+    - img_path
+
+    Modified Keys:
+
+    - img
+    - img_shape
+    - ori_shape
+
+    Args:
+        loader (dict or callable): The loading transform or its config.
+            Defaults to ``dict(type='LoadImageFromFile')``.
+        cache_dir (str): Folder of the cache files. Defaults to
+            '/dev/shm/mmdet_image_cache'.
+        cache_size_mb (int): Size budget of the cache in MB. Defaults to
+            8192.
+        evict_ratio (float): Fraction of the budget kept after an
+            eviction. Defaults to 0.9.
+        remove_on_exit (bool): Whether to remove ``cache_dir`` when the
+            process that built the transform exits. DataLoader workers do
+            not remove it. Defaults to False.
+
+    Examples:
+        >>> pipeline = [
+        >>>     dict(
+        >>>         type='CachedImageLoader',
+        >>>         loader=dict(type='LoadImageFromFile'),
+        >>>         cache_size_mb=16384),
+        >>>     dict(type='LoadAnnotations', with_bbox=True),
+        >>>     dict(type='PackDetInputs')]
+    """
+
+    def __init__(self,
+                 loader: Union[dict,
+                               Callable] = dict(type='LoadImageFromFile'),
+                 cache_dir: str = '/dev/shm/mmdet_image_cache',
+                 cache_size_mb: int = 8192,
+                 evict_ratio: float = 0.9,
+                 remove_on_exit: bool = False) -> None:
+        if isinstance(loader, dict):
+            loader = TRANSFORMS.build(loader)
+        self.loader = loader
+        self.cache_dir = cache_dir
+        self.cache_size_mb = cache_size_mb
+        self.evict_ratio = evict_ratio
+        self.remove_on_exit = remove_on_exit
+        self._cache_size = cache_size_mb * 1024**2
+        self._written = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        if remove_on_exit:
+            # forked workers leave with os._exit, which skips atexit
+            atexit.register(self.remove)
+
+    def _cache_path(self, img_path: str) -> Optional[str]:
+        """Path of the cache file of an image, or None if it cannot be
+        stat'ed."""
+        try:
+            stat = os.stat(img_path)
+        except (OSError, TypeError):
+            return None
+        key = f'{self.loader!r}|{osp.abspath(img_path)}|' \
+            f'{stat.st_mtime_ns}|{stat.st_size}'
+        return osp.join(self.cache_dir,
+                        hashlib.sha1(key.encode()).hexdigest() + '.npy')
+
+    def _write(self, cache_path: str, img: np.ndarray) -> None:
+        """Write a cache file atomically and evict old files if needed."""
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, img)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # e.g. a full file system; the image is simply not cached
+            if osp.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._written += img.nbytes
+        if self._written >= self._cache_size // 64:
+            self._written = 0
+            self.evict()
+
+    def remove(self) -> None:
+        """Remove the cache directory with all its files."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def evict(self) -> None:
+        """Remove the least recently used files until the cache is within
+        ``evict_ratio`` of its budget."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.npy'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= self._cache_size:
+            return
+        target = self._cache_size * self.evict_ratio
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # removed by another process
+                pass
+            total -= size
+            if total <= target:
+                break
+
+    def transform(self, results: dict) -> Optional[dict]:
+        """Load the image from the cache or with the wrapped loader.
+
+        Args:
+            results (dict): Result dict from
+                :class:`mmengine.dataset.BaseDataset`.
+
+        Returns:
+            dict: The dict contains loaded image and meta information.
+        """
+        cache_path = self._cache_path(results['img_path'])
+        if cache_path is None:
+            return self.loader(results)
+        try:
+            img = np.load(cache_path)
+            # mark the file as recently used
+            os.utime(cache_path)
+        except (OSError, ValueError):
+            img = None
+        if img is None:
+            results = self.loader(results)
+            if results is not None:
+                self._write(cache_path, results['img'])
+            return results
+
+        results['img'] = img
+        results['img_shape'] = img.shape[:2]
+        results['ori_shape'] = img.shape[:2]
+        return results
+
+    def __repr__(self) -> str:
+        repr_str = (f'{self.__class__.__name__}('
+                    f'loader={self.loader}, '
+                    f"cache_dir='{self.cache_dir}', "
+                    f'cache_size_mb={self.cache_size_mb}, '
+                    f'evict_ratio={self.evict_ratio}, '
+                    f'remove_on_exit={self.remove_on_exit})')
+        return repr_str
@@ -64,6 +64,8 @@ class CocoMetric(BaseMetric):
         sort_categories (bool): Whether sort categories in annotations. Only
             used for `Objects365V1Dataset`. Defaults to False.
         use_mp_eval (bool): Whether to use mul-processing evaluation
+        cache_dir (str, optional): Folder in which the loaded ``ann_file``
+            and its index are cached, see :class:`COCO`. Defaults to None.
     """
     default_prefix: Optional[str] = 'coco'
 
@@ -81,7 +83,8 @@ class CocoMetric(BaseMetric):
                  collect_device: str = 'cpu',
                  prefix: Optional[str] = None,
                  sort_categories: bool = False,
-                 use_mp_eval: bool = False) -> None:
+                 use_mp_eval: bool = False,
+                 cache_dir: Optional[str] = None) -> None:
         super().__init__(collect_device=collect_device, prefix=prefix)
         # coco evaluation metrics
         self.metrics = metric if isinstance(metric, list) else [metric]
@@ -127,7 +130,7 @@ class CocoMetric(BaseMetric):
         if ann_file is not None:
             with get_local_path(
                     ann_file, backend_args=self.backend_args) as local_path:
-                self._coco_api = COCO(local_path)
+                self._coco_api = COCO(local_path, cache_dir=cache_dir)
                 if sort_categories:
                     # 'categories' list in objects365_train.json and
                     # objects365_val.json is inconsistent, need sort
@@ -610,6 +610,29 @@ class ResNet(BaseModule):
             self.relu = nn.ReLU(inplace=True)
         self.maxpool = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
 
+    def _load_from_state_dict(self, state_dict, prefix, local_metadata, strict,
+                              missing_keys, unexpected_keys, error_msgs):
+        """Adapt the stem of checkpoints trained with a different number of
+        input channels, e.g. ImageNet weights for single-channel input.
+
+        The pretrained kernels are summed over their input channels and
+        spread evenly over ``in_channels``, so an input with the same value
+        in every channel gives the same stem response as before.
+        """
+        if self.deep_stem:
+            stem_key, stem_conv = prefix + 'stem.0.weight', self.stem[0]
+        else:
+            stem_key, stem_conv = prefix + 'conv1.weight', self.conv1
+        weight = state_dict.get(stem_key)
+        in_channels = stem_conv.weight.shape[1]
+        if weight is not None and weight.dim() == 4 \
+                and weight.shape[1] != in_channels:
+            weight = weight.sum(dim=1, keepdim=True) / in_channels
+            state_dict[stem_key] = weight.repeat(1, in_channels, 1, 1)
+        super()._load_from_state_dict(state_dict, prefix, local_metadata,
+                                      strict, missing_keys, unexpected_keys,
+                                      error_msgs)
+
     def _freeze_stages(self):
         if self.frozen_stages >= 0:
             if self.deep_stem:
@@ -0,0 +1,211 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from typing import List, Tuple, Union
+
+import torch
+import torch.nn as nn
+from mmcv.cnn import ConvModule
+from mmengine.config import ConfigDict
+from mmengine.structures import InstanceData
+from torch import Tensor
+
+from mmdet.registry import MODELS
+from mmdet.utils import ConfigType, OptConfigType, OptMultiConfig
+from .anchor_head import AnchorHead
+
+
+@MODELS.register_module()
+class FrequencyBandHead(AnchorHead):
+    """Dense head for the full-width frequency bands of spectrograms.
+
+    The targets of spectrogram detectors span the whole time (x) axis, so
+    the features of every level are averaged over time before the head
+    convolutions, which are (3, 1) convolutions along the frequency (y) axis
+    only. For every anchor of a :class:`FrequencyBandAnchorGenerator`, the
+    head predicts a score and the deltas of the band center and height. The
+    x deltas are always 0 and the anchors are given the width of their
+    image, so every prediction is a full-width band. Overlapping bands are
+    removed by the usual ``batched_nms`` of ``test_cfg.nms``: the 2-D IoU
+    of two full-width boxes is the IoU of their y ranges.
+
+    Args:
+        num_classes (int): Number of categories excluding the background
+            category.
+        in_channels (int): Number of channels in the input feature map.
+        stacked_convs (int): Number of (3, 1) convolutions before the
+            predictors, shared by the classification and regression
+            branches. Defaults to 2.
+        conv_cfg (:obj:`ConfigDict` or dict, optional): Config dict for
+            convolution layer. Defaults to None.
+        norm_cfg (:obj:`ConfigDict` or dict, optional): Config dict for
+            normalization layer. Defaults to None.
+        anchor_generator (:obj:`ConfigDict` or dict): Config dict for the
+            anchor generator, which tiles anchors along the frequency axis.
+        init_cfg (:obj:`ConfigDict` or list[:obj:`ConfigDict`] or dict or \
+            list[dict]): Initialization config dict.
+
+    Example:
+        >>> import torch
+        >>> self = FrequencyBandHead(11, 7)
+        >>> x = torch.rand(1, 7, 32, 64)
+        >>> cls_score, bbox_pred = self.forward_single(x)
+        >>> # One prediction per row of the feature map
+        >>> assert cls_score.shape == (1, self.num_anchors * 11, 32, 1)
+        >>> assert bbox_pred.shape == (1, self.num_anchors * 4, 32, 1)
+    """
+
+    def __init__(self,
+                 num_classes: int,
+                 in_channels: int,
+                 stacked_convs: int = 2,
+                 conv_cfg: OptConfigType = None,
+                 norm_cfg: OptConfigType = None,
+                 anchor_generator: ConfigType = dict(
+                     type='FrequencyBandAnchorGenerator',
+                     scales=[2, 4, 8],
+                     strides=[4, 8, 16, 32, 64]),
+                 init_cfg: OptMultiConfig = dict(
+                     type='Normal',
+                     layer='Conv2d',
+                     std=0.01,
+                     override=dict(
+                         type='Normal',
+                         name='band_cls',
+                         std=0.01,
+                         bias_prob=0.01)),
+                 **kwargs) -> None:
+        assert stacked_convs >= 0, \
+            '`stacked_convs` must be non-negative integers, ' \
+            f'but got {stacked_convs} instead.'
+        self.stacked_convs = stacked_convs
+        self.conv_cfg = conv_cfg
+        self.norm_cfg = norm_cfg
+        super().__init__(
+            num_classes,
+            in_channels,
+            anchor_generator=anchor_generator,
+            init_cfg=init_cfg,
+            **kwargs)
+
+    def _init_layers(self) -> None:
+        """Initialize layers of the head."""
+        self.band_convs = nn.ModuleList()
+        in_channels = self.in_channels
+        for i in range(self.stacked_convs):
+            self.band_convs.append(
+                ConvModule(
+                    in_channels,
+                    self.feat_channels, (3, 1),
+                    stride=1,
+                    padding=(1, 0),
+                    conv_cfg=self.conv_cfg,
+                    norm_cfg=self.norm_cfg))
+            in_channels = self.feat_channels
+        self.band_cls = nn.Conv2d(in_channels,
+                                  self.num_base_priors * self.cls_out_channels,
+                                  1)
+        # the deltas of the band center and height
+        self.band_reg = nn.Conv2d(in_channels, self.num_base_priors * 2, 1)
+
+    def forward_single(self, x: Tensor) -> Tuple[Tensor, Tensor]:
+        """Forward feature of a single scale level.
+
+        Args:
+            x (Tensor): Features of a single scale level.
+
+        Returns:
+            tuple:
+                cls_score (Tensor): Cls scores for a single scale level
+                    the channels number is num_anchors * num_classes and
+                    the width is 1.
+                bbox_pred (Tensor): Box deltas for a single scale level,
+                    the channels number is num_anchors * 4 with the x
+                    deltas set to 0, and the width is 1.
+        """
+        band_feat = x.mean(dim=3, keepdim=True)
+        for band_conv in self.band_convs:
+            band_feat = band_conv(band_feat)
+        cls_score = self.band_cls(band_feat)
+        band_pred = self.band_reg(band_feat)
+
+        num_imgs, _, height, width = band_pred.shape
+        band_pred = band_pred.view(num_imgs, self.num_base_priors, 2, height,
+                                   width)
+        zeros = band_pred.new_zeros(num_imgs, self.num_base_priors, 1, height,
+                                    width)
+        # (dx, dy, dw, dh) deltas for the bbox coder
+        bbox_pred = torch.cat(
+            [zeros, band_pred[:, :, :1], zeros, band_pred[:, :, 1:]], dim=2)
+        return cls_score, bbox_pred.view(num_imgs, -1, height, width)
+
+    def _fit_width(self, anchors: Tensor, img_meta: dict) -> Tensor:
+        """Make the anchors span the width of the image."""
+        anchors = anchors.clone()
+        anchors[:, 0] = 0
+        anchors[:, 2] = img_meta['img_shape'][1]
+        return anchors
+
+    def get_anchors(self,
+                    featmap_sizes: List[tuple],
+                    batch_img_metas: List[dict],
+                    device: Union[torch.device, str] = 'cuda') \
+            -> Tuple[List[List[Tensor]], List[List[Tensor]]]:
+        """Get anchors according to feature map sizes.
+
+        The feature maps are pooled over time, so the width of the anchors
+        is taken from the images instead.
+
+        Args:
+            featmap_sizes (list[tuple]): Multi-level feature map sizes.
+            batch_img_metas (list[dict]): Image meta info.
+            device (torch.device | str): Device for returned tensors.
+                Defaults to cuda.
+
+        Returns:
+            tuple:
+
+                - anchor_list (list[list[Tensor]]): Anchors of each image.
+                - valid_flag_list (list[list[Tensor]]): Valid flags of each
+                  image.
+        """
+        multi_level_anchors = self.prior_generator.grid_priors(
+            featmap_sizes, device=device)
+        anchor_list = []
+        valid_flag_list = []
+        for img_meta in batch_img_metas:
+            anchor_list.append([
+                self._fit_width(anchors, img_meta)
+                for anchors in multi_level_anchors
+            ])
+            valid_flag_list.append(
+                self.prior_generator.valid_flags(featmap_sizes,
+                                                 img_meta['pad_shape'],
+                                                 device))
+        return anchor_list, valid_flag_list
+
+    def _predict_by_feat_single(self,
+                                cls_score_list: List[Tensor],
+                                bbox_pred_list: List[Tensor],
+                                score_factor_list: List[Tensor],
+                                mlvl_priors: List[Tensor],
+                                img_meta: dict,
+                                cfg: ConfigDict,
+                                rescale: bool = False,
+                                with_nms: bool = True) -> InstanceData:
+        """Transform a single image's features extracted from the head into
+        bbox results, with the anchors fitted to the width of the image.
+
+        See :meth:`BaseDenseHead._predict_by_feat_single` for the arguments
+        and results.
+        """
+        mlvl_priors = [
+            self._fit_width(priors, img_meta) for priors in mlvl_priors
+        ]
+        return super()._predict_by_feat_single(
+            cls_score_list=cls_score_list,
+            bbox_pred_list=bbox_pred_list,
+            score_factor_list=score_factor_list,
+            mlvl_priors=mlvl_priors,
+            img_meta=img_meta,
+            cfg=cfg,
+            rescale=rescale,
+            with_nms=with_nms)
@@ -115,6 +115,15 @@ class MaxIoUAssigner(BaseAssigner):
         gpu_assign_thr (int): The upper bound of the number of GT for GPU
             assign. When the number of gt is above this threshold, will assign
             on CPU device. Negative values mean not assign on CPU.
+        assign_chunk_size (int): The upper bound of the number of priors
+            whose overlaps with the gts are computed at once. When there are
+            more priors, they are assigned in chunks of this size, keeping
+            the running max overlaps of every gt, so the memory used for the
+            overlaps is O(num_gts * assign_chunk_size) instead of
+            O(num_gts * num_priors), at the cost of computing the overlaps
+            twice if ``gt_max_assign_all`` and ``match_low_quality`` are
+            True. The result is the same. Negative values mean not assign in
+            chunks. Defaults to -1.
         iou_calculator (dict): Config of overlaps Calculator.
         perm_repeat_gt_cfg (dict): Config of permute repeated gt bboxes.
     """
@@ -128,6 +137,7 @@ class MaxIoUAssigner(BaseAssigner):
                  ignore_wrt_candidates: bool = True,
                  match_low_quality: bool = True,
                  gpu_assign_thr: float = -1,
+                 assign_chunk_size: int = -1,
                  iou_calculator: dict = dict(type='BboxOverlaps2D'),
                  perm_repeat_gt_cfg=None):
         self.pos_iou_thr = pos_iou_thr
@@ -137,6 +147,7 @@ class MaxIoUAssigner(BaseAssigner):
         self.ignore_iof_thr = ignore_iof_thr
         self.ignore_wrt_candidates = ignore_wrt_candidates
         self.gpu_assign_thr = gpu_assign_thr
+        self.assign_chunk_size = assign_chunk_size
         self.match_low_quality = match_low_quality
         self.iou_calculator = TASK_UTILS.build(iou_calculator)
         self.perm_repeat_gt_cfg = perm_repeat_gt_cfg
@@ -217,7 +228,26 @@ class MaxIoUAssigner(BaseAssigner):
                                                   self.perm_repeat_gt_cfg)
         else:
             gt_bboxes_unique = gt_bboxes
-        overlaps = self.iou_calculator(gt_bboxes_unique, priors)
+
+        if 0 < self.assign_chunk_size < priors.size(0):
+            assign_result = self.assign_in_chunks(gt_bboxes_unique, priors,
+                                                  gt_labels, gt_bboxes_ignore)
+        else:
+            overlaps = self._overlaps(gt_bboxes_unique, priors,
+                                      gt_bboxes_ignore)
+            assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
+        if assign_on_cpu:
+            assign_result.gt_inds = assign_result.gt_inds.to(device)
+            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
+            if assign_result.labels is not None:
+                assign_result.labels = assign_result.labels.to(device)
+        return assign_result
+
+    def _overlaps(self, gt_bboxes: Tensor, priors: Tensor,
+                  gt_bboxes_ignore: Optional[Tensor]) -> Tensor:
+        """Compute the overlaps of the gts with the priors, set to -1 for
+        the priors ignored because of ``gt_bboxes_ignore``."""
+        overlaps = self.iou_calculator(gt_bboxes, priors)
 
         if (self.ignore_iof_thr > 0 and gt_bboxes_ignore is not None
                 and gt_bboxes_ignore.numel() > 0 and priors.numel() > 0):
@@ -230,14 +260,116 @@ class MaxIoUAssigner(BaseAssigner):
                     gt_bboxes_ignore, priors, mode='iof')
                 ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
             overlaps[:, ignore_max_overlaps > self.ignore_iof_thr] = -1
+        return overlaps
 
-        assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
-        if assign_on_cpu:
-            assign_result.gt_inds = assign_result.gt_inds.to(device)
-            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
-            if assign_result.labels is not None:
-                assign_result.labels = assign_result.labels.to(device)
-        return assign_result
+    def assign_in_chunks(
+            self,
+            gt_bboxes: Tensor,
+            priors: Tensor,
+            gt_labels: Tensor,
+            gt_bboxes_ignore: Optional[Tensor] = None) -> AssignResult:
+        """Assign w.r.t. the overlaps of priors with gts, computed for
+        ``assign_chunk_size`` priors at a time.
+
+        It gives the same result as :meth:`assign_wrt_overlaps` with the
+        overlaps of all the priors, but only keeps the max overlaps of every
+        prior and the running max overlaps of every gt.
+
+        Args:
+            gt_bboxes (Tensor): Ground truth bboxes, shape (k, 4).
+            priors (Tensor): Priors to be assigned, shape (n, 4).
+            gt_labels (Tensor): Labels of k gt_bboxes, shape (k, ).
+            gt_bboxes_ignore (Tensor, optional): Ground truth bboxes to be
+                ignored, shape (m, 4). Defaults to None.
+
+        Returns:
+            :obj:`AssignResult`: The assign result.
+        """
+        num_gts, num_bboxes = gt_bboxes.size(0), priors.size(0)
+        if num_gts == 0 or num_bboxes == 0:
+            return self.assign_wrt_overlaps(
+                priors.new_zeros((num_gts, num_bboxes)), gt_labels)
+        chunks = torch.split(priors, self.assign_chunk_size)
+
+        # for each anchor, the max iou of all gts and which gt it is, and
+        # the running max iou of every gt over the anchors seen so far
+        max_overlaps, argmax_overlaps = [], []
+        gt_max_overlaps, gt_argmax_overlaps = None, None
+        start = 0
+        for chunk in chunks:
+            overlaps = self._overlaps(gt_bboxes, chunk, gt_bboxes_ignore)
+            chunk_max, chunk_argmax = overlaps.max(dim=0)
+            max_overlaps.append(chunk_max)
+            argmax_overlaps.append(chunk_argmax)
+            chunk_gt_max, chunk_gt_argmax = overlaps.max(dim=1)
+            chunk_gt_argmax += start
+            if gt_max_overlaps is None:
+                gt_max_overlaps, gt_argmax_overlaps = \
+                    chunk_gt_max, chunk_gt_argmax
+            else:
+                # keep the first anchor with the max iou on ties
+                update = chunk_gt_max > gt_max_overlaps
+                gt_max_overlaps = torch.where(update, chunk_gt_max,
+                                              gt_max_overlaps)
+                gt_argmax_overlaps = torch.where(update, chunk_gt_argmax,
+                                                 gt_argmax_overlaps)
+            start += chunk.size(0)
+        max_overlaps = torch.cat(max_overlaps)
+        argmax_overlaps = torch.cat(argmax_overlaps)
+
+        # 1. assign -1 by default
+        assigned_gt_inds = max_overlaps.new_full((num_bboxes, ),
+                                                 -1,
+                                                 dtype=torch.long)
+
+        # 2. assign negative: below
+        if isinstance(self.neg_iou_thr, float):
+            assigned_gt_inds[(max_overlaps >= 0)
+                             & (max_overlaps < self.neg_iou_thr)] = 0
+        elif isinstance(self.neg_iou_thr, tuple):
+            assert len(self.neg_iou_thr) == 2
+            assigned_gt_inds[(max_overlaps >= self.neg_iou_thr[0])
+                             & (max_overlaps < self.neg_iou_thr[1])] = 0
+
+        # 3. assign positive: above positive IoU threshold
+        pos_inds = max_overlaps >= self.pos_iou_thr
+        assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+
+        # 4. low-quality matching, see `assign_wrt_overlaps`
+        if self.match_low_quality:
+            matched = gt_max_overlaps >= self.min_pos_iou
+            if self.gt_max_assign_all:
+                # the last matched gt wins, as in the loop over the gts
+                gt_inds = torch.arange(
+                    1, num_gts + 1, device=priors.device)[:, None]
+                start = 0
+                for chunk in chunks:
+                    overlaps = self._overlaps(gt_bboxes, chunk,
+                                              gt_bboxes_ignore)
+                    max_iou_inds = (overlaps == gt_max_overlaps[:, None]
+                                    ) & matched[:, None]
+                    chunk_gt_inds, _ = (max_iou_inds * gt_inds).max(dim=0)
+                    chunk_inds = assigned_gt_inds[start:start + chunk.size(0)]
+                    chunk_inds[chunk_gt_inds > 0] = \
+                        chunk_gt_inds[chunk_gt_inds > 0]
+                    start += chunk.size(0)
+            else:
+                for i in range(num_gts):
+                    if matched[i]:
+                        assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
+
+        assigned_labels = assigned_gt_inds.new_full((num_bboxes, ), -1)
+        pos_inds = torch.nonzero(
+            assigned_gt_inds > 0, as_tuple=False).squeeze()
+        if pos_inds.numel() > 0:
+            assigned_labels[pos_inds] = gt_labels[assigned_gt_inds[pos_inds] -
+                                                  1]
+
+        return AssignResult(
+            num_gts=num_gts,
+            gt_inds=assigned_gt_inds,
+            max_overlaps=max_overlaps,
+            labels=assigned_labels)
 
     def assign_wrt_overlaps(self, overlaps: Tensor,
                             gt_labels: Tensor) -> AssignResult:
@@ -1,11 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from .anchor_generator import (AnchorGenerator, LegacyAnchorGenerator,
-                               SSDAnchorGenerator, YOLOAnchorGenerator)
+from .anchor_generator import (AnchorGenerator, FrequencyBandAnchorGenerator,
+                               LegacyAnchorGenerator, SSDAnchorGenerator,
+                               YOLOAnchorGenerator)
 from .point_generator import MlvlPointGenerator, PointGenerator
 from .utils import anchor_inside_flags, calc_region
 
 __all__ = [
     'AnchorGenerator', 'LegacyAnchorGenerator', 'anchor_inside_flags',
     'PointGenerator', 'calc_region', 'YOLOAnchorGenerator',
-    'MlvlPointGenerator', 'SSDAnchorGenerator'
+    'MlvlPointGenerator', 'SSDAnchorGenerator', 'FrequencyBandAnchorGenerator'
 ]
@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import warnings
-from typing import List, Optional, Tuple, Union
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
@@ -45,6 +46,13 @@ class AnchorGenerator:
             width and height. By default it is 0 in V2.0.
         use_box_type (bool): Whether to warp anchors with the box type data
             structure. Defaults to False.
+        cache_size (int): Number of results of ``grid_priors`` and
+            ``valid_flags`` kept in a least recently used cache, keyed by
+            the feature map sizes, device, dtype and pad shape. With inputs
+            of a fixed size, the anchors and flags are computed once instead
+            of for every batch. The cached tensors are returned to every
+            caller, so they must not be modified in place. Defaults to 0,
+            i.e. no cache.
 
     Examples:
         >>> from mmdet.models.task_modules.
@@ -76,7 +84,8 @@ class AnchorGenerator:
                  scales_per_octave: Optional[int] = None,
                  centers: Optional[List[Tuple[float, float]]] = None,
                  center_offset: float = 0.,
-                 use_box_type: bool = False) -> None:
+                 use_box_type: bool = False,
+                 cache_size: int = 0) -> None:
         # check center and center_offset
         if center_offset != 0:
             assert centers is None, 'center cannot be set when center_offset' \
@@ -121,6 +130,8 @@ class AnchorGenerator:
         self.center_offset = center_offset
         self.base_anchors = self.gen_base_anchors()
         self.use_box_type = use_box_type
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
 
     @property
     def num_base_anchors(self) -> List[int]:
@@ -227,6 +238,20 @@ class AnchorGenerator:
         else:
             return yy, xx
 
+    def _cached(self, key: tuple,
+                compute: Callable[[], List[Tensor]]) -> List[Tensor]:
+        """Return ``compute()``, looked up in the cache of ``cache_size``
+        results first."""
+        if self.cache_size <= 0:
+            return compute()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+        else:
+            self._cache[key] = compute()
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(self._cache[key])
+
     def grid_priors(self,
                     featmap_sizes: List[Tuple],
                     dtype: torch.dtype = torch.float32,
@@ -249,12 +274,18 @@ class AnchorGenerator:
                 num_base_anchors is the number of anchors for that level.
         """
         assert self.num_levels == len(featmap_sizes)
-        multi_level_anchors = []
-        for i in range(self.num_levels):
-            anchors = self.single_level_grid_priors(
-                featmap_sizes[i], level_idx=i, dtype=dtype, device=device)
-            multi_level_anchors.append(anchors)
-        return multi_level_anchors
+
+        def compute() -> List[Tensor]:
+            multi_level_anchors = []
+            for i in range(self.num_levels):
+                anchors = self.single_level_grid_priors(
+                    featmap_sizes[i], level_idx=i, dtype=dtype, device=device)
+                multi_level_anchors.append(anchors)
+            return multi_level_anchors
+
+        key = ('priors', tuple(tuple(size) for size in featmap_sizes),
+               torch.device(device), dtype)
+        return self._cached(key, compute)
 
     def single_level_grid_priors(self,
                                  featmap_size: Tuple[int, int],
@@ -429,19 +460,25 @@ class AnchorGenerator:
             list(torch.Tensor): Valid flags of anchors in multiple levels.
         """
         assert self.num_levels == len(featmap_sizes)
-        multi_level_flags = []
-        for i in range(self.num_levels):
-            anchor_stride = self.strides[i]
-            feat_h, feat_w = featmap_sizes[i]
-            h, w = pad_shape[:2]
-            valid_feat_h = min(int(np.ceil(h / anchor_stride[1])), feat_h)
-            valid_feat_w = min(int(np.ceil(w / anchor_stride[0])), feat_w)
-            flags = self.single_level_valid_flags((feat_h, feat_w),
-                                                  (valid_feat_h, valid_feat_w),
-                                                  self.num_base_anchors[i],
-                                                  device=device)
-            multi_level_flags.append(flags)
-        return multi_level_flags
+
+        def compute() -> List[Tensor]:
+            multi_level_flags = []
+            for i in range(self.num_levels):
+                anchor_stride = self.strides[i]
+                feat_h, feat_w = featmap_sizes[i]
+                h, w = pad_shape[:2]
+                valid_feat_h = min(int(np.ceil(h / anchor_stride[1])), feat_h)
+                valid_feat_w = min(int(np.ceil(w / anchor_stride[0])), feat_w)
+                flags = self.single_level_valid_flags(
+                    (feat_h, feat_w), (valid_feat_h, valid_feat_w),
+                    self.num_base_anchors[i],
+                    device=device)
+                multi_level_flags.append(flags)
+            return multi_level_flags
+
+        key = ('flags', tuple(tuple(size) for size in featmap_sizes),
+               tuple(pad_shape[:2]), torch.device(device))
+        return self._cached(key, compute)
 
     def single_level_valid_flags(self,
                                  featmap_size: Tuple[int, int],
@@ -516,6 +553,9 @@ class SSDAnchorGenerator(AnchorGenerator):
             same scales. It is always set to be False in SSD.
         use_box_type (bool): Whether to warp anchors with the box type data
             structure. Defaults to False.
+        cache_size (int): Number of ``grid_priors`` and ``valid_flags``
+            results kept in a cache, see :class:`AnchorGenerator`.
+            Defaults to 0, i.e. no cache.
     """
 
     def __init__(self,
@@ -526,7 +566,8 @@ class SSDAnchorGenerator(AnchorGenerator):
                  basesize_ratio_range: Tuple[float] = (0.15, 0.9),
                  input_size: int = 300,
                  scale_major: bool = True,
-                 use_box_type: bool = False) -> None:
+                 use_box_type: bool = False,
+                 cache_size: int = 0) -> None:
         assert len(strides) == len(ratios)
         assert not (min_sizes is None) ^ (max_sizes is None)
         self.strides = [_pair(stride) for stride in strides]
@@ -598,6 +639,8 @@ class SSDAnchorGenerator(AnchorGenerator):
         self.center_offset = 0
         self.base_anchors = self.gen_base_anchors()
         self.use_box_type = use_box_type
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
 
     def gen_base_anchors(self) -> List[Tensor]:
         """Generate base anchors.
@@ -776,12 +819,16 @@ class YOLOAnchorGenerator(AnchorGenerator):
             in multiple feature levels.
         base_sizes (list[list[tuple[int, int]]]): The basic sizes
             of anchors in multiple levels.
+        cache_size (int): Number of ``grid_priors`` and ``valid_flags``
+            results kept in a cache, see :class:`AnchorGenerator`.
+            Defaults to 0, i.e. no cache.
     """
 
     def __init__(self,
                  strides: Union[List[int], List[Tuple[int, int]]],
                  base_sizes: List[List[Tuple[int, int]]],
-                 use_box_type: bool = False) -> None:
+                 use_box_type: bool = False,
+                 cache_size: int = 0) -> None:
         self.strides = [_pair(stride) for stride in strides]
         self.centers = [(stride[0] / 2., stride[1] / 2.)
                         for stride in self.strides]
@@ -793,6 +840,8 @@ class YOLOAnchorGenerator(AnchorGenerator):
                 [_pair(base_size) for base_size in base_sizes_per_level])
         self.base_anchors = self.gen_base_anchors()
         self.use_box_type = use_box_type
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
 
     @property
     def num_levels(self) -> int:
@@ -846,3 +895,195 @@ class YOLOAnchorGenerator(AnchorGenerator):
         base_anchors = torch.stack(base_anchors, dim=0)
 
         return base_anchors
+
+
+@TASK_UTILS.register_module()
+class FrequencyBandAnchorGenerator(AnchorGenerator):
+    """Anchor generator for full-width horizontal bands of spectrograms.
+
+    The targets of spectrogram detectors span the whole time (x) axis, so
+    anchors are only tiled along the frequency (y) axis: every row of a
+    feature map gets one anchor per scale, which spans the full width of the
+    feature map, i.e. ``feat_w * stride_w``. A feature map of size (h, w)
+    has ``h * num_base_anchors`` anchors instead of
+    ``h * w * num_base_anchors``, ordered row by row, which matches a head
+    that pools its features over the time axis.
+
+    Args:
+        strides (list[int] | list[tuple[int, int]]): Strides of anchors
+            in multiple feature levels in order (w, h).
+        scales (list[float]): Anchor heights in a single level, in units of
+            the base size.
+        base_sizes (list[int], Optional): The basic heights of anchors in
+            multiple levels. If None is given, the strides along the
+            frequency axis will be used as base_sizes.
+        center_offset (float): The offset of the anchor centers in
+            proportion to the base size. Defaults to 0.
+        use_box_type (bool): Whether to warp anchors with the box type data
+            structure. Defaults to False.
+        cache_size (int): Number of ``grid_priors`` and ``valid_flags``
+            results kept in a cache, see :class:`AnchorGenerator`.
+            Defaults to 0, i.e. no cache.
+
+    Examples:
+        >>> from mmdet.models.task_modules.
+        ... prior_generators import FrequencyBandAnchorGenerator
+        >>> self = FrequencyBandAnchorGenerator([16], [1., 2.])
+        >>> all_anchors = self.grid_priors([(2, 3)], device='cpu')
+        >>> print(all_anchors)
+        [tensor([[  0.,  -8.,  48.,   8.],
+                [  0., -16.,  48.,  16.],
+                [  0.,   8.,  48.,  24.],
+                [  0.,   0.,  48.,  32.]])]
+    """
+
+    def __init__(self,
+                 strides: Union[List[int], List[Tuple[int, int]]],
+                 scales: List[float],
+                 base_sizes: Optional[List[int]] = None,
+                 center_offset: float = 0.,
+                 use_box_type: bool = False,
+                 cache_size: int = 0) -> None:
+        if base_sizes is None:
+            base_sizes = [_pair(stride)[1] for stride in strides]
+        super().__init__(
+            strides=strides,
+            ratios=[1.],
+            scales=scales,
+            base_sizes=base_sizes,
+            center_offset=center_offset,
+            use_box_type=use_box_type,
+            cache_size=cache_size)
+
+    def gen_single_level_base_anchors(self,
+                                      base_size: Union[int, float],
+                                      scales: Tensor,
+                                      ratios: Tensor,
+                                      center: Optional[Tuple[float]] = None) \
+            -> Tensor:
+        """Generate base anchors of a single level.
+
+        The x coordinates are 0, the full width is added in
+        :meth:`single_level_grid_priors`.
+
+        Args:
+            base_size (int | float): Basic height of an anchor.
+            scales (torch.Tensor): Scales of the anchor height.
+            ratios (torch.Tensor): Unused, the width is not set by a ratio.
+            center (tuple[float], optional): Unused.
+
+        Returns:
+            torch.Tensor: Anchors in a single-level feature maps.
+        """
+        y_center = self.center_offset * base_size
+        hs = base_size * scales
+        zeros = torch.zeros_like(hs)
+        return torch.stack(
+            [zeros, y_center - 0.5 * hs, zeros, y_center + 0.5 * hs], dim=-1)
+
+    def single_level_grid_priors(self,
+                                 featmap_size: Tuple[int, int],
+                                 level_idx: int,
+                                 dtype: torch.dtype = torch.float32,
+                                 device: DeviceType = 'cuda') -> Tensor:
+        """Generate the anchors of every row of a single level.
+
+        Args:
+            featmap_size (tuple[int, int]): Size of the feature maps.
+            level_idx (int): The index of corresponding feature map level.
+            dtype (obj:`torch.dtype`): Date type of points. Defaults to
+                ``torch.float32``.
+            device (str | torch.device): The device the tensor will be put on.
+                Defaults to 'cuda'.
+
+        Returns:
+            torch.Tensor: Anchors of shape (feat_h * num_base_anchors, 4).
+        """
+        base_anchors = self.base_anchors[level_idx].to(device).to(dtype)
+        feat_h, feat_w = featmap_size
+        stride_w, stride_h = self.strides[level_idx]
+        shift_y = torch.arange(0, feat_h, device=device).to(dtype) * stride_h
+        zeros = torch.zeros_like(shift_y)
+        shifts = torch.stack(
+            [zeros, shift_y, zeros + feat_w * stride_w, shift_y], dim=-1)
+        # first A rows correspond to the A anchors of row 0, then row 1, ...
+        all_anchors = base_anchors[None, :, :] + shifts[:, None, :]
+        all_anchors = all_anchors.view(-1, 4)
+        if self.use_box_type:
+            all_anchors = HorizontalBoxes(all_anchors)
+        return all_anchors
+
+    def sparse_priors(self,
+                      prior_idxs: Tensor,
+                      featmap_size: Tuple[int, int],
+                      level_idx: int,
+                      dtype: torch.dtype = torch.float32,
+                      device: DeviceType = 'cuda') -> Tensor:
+        """Generate sparse anchors according to the ``prior_idxs``.
+
+        Args:
+            prior_idxs (Tensor): The index of corresponding anchors
+                in the feature map.
+            featmap_size (tuple[int, int]): feature map size arrange as (h, w).
+            level_idx (int): The level index of corresponding feature
+                map.
+            dtype (obj:`torch.dtype`): Date type of points. Defaults to
+                ``torch.float32``.
+            device (str | torch.device): The device where the points is
+                located.
+
+        Returns:
+            Tensor: Anchor with shape (N, 4), N should be equal to
+                the length of ``prior_idxs``.
+        """
+        height, width = featmap_size
+        num_base_anchors = self.num_base_anchors[level_idx]
+        base_anchor_id = prior_idxs % num_base_anchors
+        stride_w, stride_h = self.strides[level_idx]
+        y = (prior_idxs // num_base_anchors) % height * stride_h
+        zeros = torch.zeros_like(y)
+        priors = torch.stack([zeros, y, zeros + width * stride_w, y],
+                             1).to(dtype).to(device) + \
+            self.base_anchors[level_idx][base_anchor_id, :].to(device)
+        return priors
+
+    def single_level_valid_flags(self,
+                                 featmap_size: Tuple[int, int],
+                                 valid_size: Tuple[int, int],
+                                 num_base_anchors: int,
+                                 device: DeviceType = 'cuda') -> Tensor:
+        """Generate the valid flags of the anchors of a single level.
+
+        Only rows inside the padded image are valid; the width never makes
+        an anchor invalid.
+
+        Args:
+            featmap_size (tuple[int]): The size of feature maps, arrange
+                as (h, w).
+            valid_size (tuple[int]): The valid size of the feature maps.
+            num_base_anchors (int): The number of base anchors.
+            device (str | torch.device): Device where the flags will be put on.
+                Defaults to 'cuda'.
+
+        Returns:
+            torch.Tensor: The valid flags of each anchor in a single level \
+                feature map.
+        """
+        feat_h = featmap_size[0]
+        valid_h = valid_size[0]
+        assert valid_h <= feat_h
+        valid = torch.zeros(feat_h, dtype=torch.bool, device=device)
+        valid[:valid_h] = 1
+        return valid[:, None].expand(feat_h,
+                                     num_base_anchors).contiguous().view(-1)
+
+    def __repr__(self) -> str:
+        """str: a string that describes the module"""
+        indent_str = '    '
+        repr_str = self.__class__.__name__ + '(\n'
+        repr_str += f'{indent_str}strides={self.strides},\n'
+        repr_str += f'{indent_str}scales={self.scales},\n'
+        repr_str += f'{indent_str}base_sizes={self.base_sizes},\n'
+        repr_str += f'{indent_str}num_levels={self.num_levels},\n'
+        repr_str += f'{indent_str}center_offset={self.center_offset})'
+        return repr_str
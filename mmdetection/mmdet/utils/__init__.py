@@ -5,8 +5,8 @@ from .dist_utils import (all_reduce_dict, allreduce_grads, reduce_mean,
                          sync_random_seed)
 from .logger import get_caller_name, log_img_scale
 from .memory import AvoidCUDAOOM, AvoidOOM
-from .misc import (find_latest_checkpoint, get_test_pipeline_cfg,
-                   update_data_root)
+from .misc import (find_latest_checkpoint, get_test_pipeline_cfg, load_norms,
+                   merge_norm_stats, update_data_root)
 from .mot_error_visualize import imshow_mot_errors
 from .replace_cfg_vals import replace_cfg_vals
 from .setup_env import (register_all_modules, setup_cache_size_limit_of_dynamo,
@@ -24,5 +24,6 @@ __all__ = [
     'sync_random_seed', 'ConfigType', 'InstanceList', 'MultiConfig',
     'OptConfigType', 'OptInstanceList', 'OptMultiConfig', 'OptPixelList',
     'PixelList', 'RangeType', 'get_test_pipeline_cfg',
-    'setup_cache_size_limit_of_dynamo', 'imshow_mot_errors'
+    'setup_cache_size_limit_of_dynamo', 'imshow_mot_errors', 'load_norms',
+    'merge_norm_stats'
 ]
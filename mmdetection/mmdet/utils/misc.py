@@ -4,9 +4,11 @@ import os
 import os.path as osp
 import urllib
 import warnings
-from typing import Union
+from typing import Optional, Union
 
+import numpy as np
 import torch
+from mmengine import load
 from mmengine.config import Config, ConfigDict
 from mmengine.logging import print_log
 from mmengine.utils import scandir
@@ -147,3 +149,58 @@ def get_file_list(source_root: str) -> [list, dict]:
     source_type = dict(is_dir=is_dir, is_url=is_url, is_file=is_file)
 
     return source_file_path_list, source_type
+
+
+def merge_norm_stats(a: Optional[dict], b: Optional[dict]) -> Optional[dict]:
+    """Merge two sets of per-channel pixel statistics.
+
+    Every set is a dict with the pixel ``count`` and the per-channel
+    ``mean`` and ``m2`` (sum of squared deviations from the mean), as
+    written to ``norms.json`` by ``specs/gen_spec.py``. They are merged with
+    the parallel update of Chan et al., so the result is the same as for
+    the statistics of all the pixels at once.
+
+    Args:
+        a (dict, optional): Statistics of the first set of pixels.
+        b (dict, optional): Statistics of the second set of pixels.
+
+    Returns:
+        dict, optional: The merged ``count``, ``mean`` and ``m2``, with the
+        means and M2 as lists of floats. None if both are None.
+    """
+    if a is None or b is None:
+        return a if b is None else b
+    n_a, n_b = a['count'], b['count']
+    mean_a = np.asarray(a['mean'], dtype=np.float64)
+    mean_b = np.asarray(b['mean'], dtype=np.float64)
+    m2_a = np.asarray(a['m2'], dtype=np.float64)
+    m2_b = np.asarray(b['m2'], dtype=np.float64)
+    count = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (n_b / count)
+    m2 = m2_a + m2_b + delta**2 * (n_a * n_b / count)
+    return dict(count=count, mean=mean.tolist(), m2=m2.tolist())
+
+
+def load_norms(*norms_files: str) -> dict:
+    """Load the normalization values written by ``specs/gen_spec.py``.
+
+    Every ``norms.json`` holds the per-channel pixel count, mean and sum of
+    squared deviations of the raw images of one split. With several files,
+    e.g. of the train and val splits, the statistics are merged with
+    :func:`merge_norm_stats` as if they had been computed over all of their
+    pixels.
+
+    Args:
+        norms_files (str): Paths of one or more ``norms.json`` files.
+
+    Returns:
+        dict: The ``mean`` and ``std`` lists, e.g. for
+        ``DetDataPreprocessor``.
+    """
+    assert len(norms_files) > 0, 'At least one norms file is required.'
+    stats = None
+    for norms_file in norms_files:
+        stats = merge_norm_stats(stats, load(norms_file))
+    std = np.sqrt(np.asarray(stats['m2']) / stats['count'])
+    return dict(mean=stats['mean'], std=std.tolist())
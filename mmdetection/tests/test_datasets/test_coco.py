@@ -1,7 +1,15 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os
+import os.path as osp
+import tempfile
 import unittest
+from unittest.mock import patch
+
+from mmengine.fileio import dump
 
 from mmdet.datasets import CocoDataset
+from mmdet.datasets.api_wrappers import COCO
+from mmdet.datasets.compact_data_list import CompactDataList
 
 
 class TestCocoDataset(unittest.TestCase):
@@ -46,3 +54,101 @@ class TestCocoDataset(unittest.TestCase):
                 ann_file='tests/data/coco_wrong_format_sample.json',
                 metainfo=metainfo,
                 pipeline=[])
+
+    def test_coco_dataset_cache(self):
+        ann_json = {
+            'images': [
+                dict(id=i, file_name=f'{i}.png', height=60, width=80)
+                for i in range(3)
+            ],
+            'annotations': [
+                dict(
+                    id=i,
+                    image_id=i,
+                    category_id=1,
+                    bbox=[10, 10, 40, 40],
+                    area=1600,
+                    iscrowd=0) for i in range(3)
+            ],
+            'categories': [dict(id=1, name='drone_frequency')]
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ann_file = osp.join(tmp_dir, 'ann.json')
+            cache_dir = osp.join(tmp_dir, 'cache')
+            dump(ann_json, ann_file)
+            kwargs = dict(
+                data_prefix=dict(img='imgs'),
+                ann_file=ann_file,
+                metainfo=dict(classes=('drone_frequency', )),
+                cache_dir=cache_dir,
+                pipeline=[])
+            dataset = CocoDataset(**kwargs)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # the annotation file is not parsed again
+            with patch.object(COCO, '__init__', side_effect=AssertionError):
+                cached = CocoDataset(**kwargs)
+            self.assertEqual(len(cached), 3)
+            self.assertEqual(cached.get_data_info(2), dataset.get_data_info(2))
+            self.assertEqual(cached.cat2label, {1: 0})
+            self.assertEqual(cached.get_cat_ids(0), [0])
+
+            # other settings use another cache
+            kwargs['data_prefix'] = dict(img='other')
+            other = CocoDataset(**kwargs)
+            self.assertEqual(
+                other.get_data_info(0)['img_path'], osp.join('other', '0.png'))
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def test_coco_dataset_compact(self):
+        ann_json = {
+            'images': [
+                dict(id=i, file_name=f'{i}.png', height=60, width=80)
+                for i in range(4)
+            ],
+            'annotations': [
+                dict(
+                    id=i,
+                    image_id=i % 3,
+                    category_id=i % 2 + 1,
+                    bbox=[i, 10, 40.5, 20],
+                    area=810,
+                    segmentation=[[i, 10, 40, 10, 40, 30]],
+                    iscrowd=int(i == 4)) for i in range(6)
+            ],
+            'categories': [dict(id=1, name='bus'),
+                           dict(id=2, name='car')]
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ann_file = osp.join(tmp_dir, 'ann.json')
+            dump(ann_json, ann_file)
+            kwargs = dict(
+                data_prefix=dict(img='imgs'),
+                ann_file=ann_file,
+                metainfo=dict(classes=('bus', 'car')),
+                pipeline=[])
+            dataset = CocoDataset(**kwargs)
+            compact = CocoDataset(compact_data_list=True, **kwargs)
+
+        self.assertFalse(compact.serialize_data)
+        self.assertIsInstance(compact.data_list, CompactDataList)
+        self.assertEqual(len(compact), 4)
+        for idx in range(4):
+            self.assertEqual(
+                compact.get_data_info(idx), dataset.get_data_info(idx))
+        self.assertEqual(compact.get_data_info(-1), dataset.get_data_info(3))
+        self.assertEqual(compact.get_data_info(3)['instances'], [])
+        self.assertEqual(compact.get_cat_ids(1), dataset.get_cat_ids(1))
+
+        # rebuilt data infos do not share state
+        compact.get_data_info(0)['instances'][0]['bbox'][0] = -1
+        self.assertEqual(compact.get_data_info(0), dataset.get_data_info(0))
+
+        for indices in (2, -2, [3, 0]):
+            subset = compact.get_subset(indices)
+            self.assertIsInstance(subset.data_list, CompactDataList)
+            self.assertEqual(
+                [subset.get_data_info(i)['img_id'] for i in range(2)], [
+                    dataset.get_subset(indices).get_data_info(i)['img_id']
+                    for i in range(2)
+                ])
@@ -1,10 +1,12 @@
+import os
 import os.path as osp
 import tempfile
 import unittest
+from unittest.mock import patch
 
 from mmengine.fileio import dump
 
-from mmdet.datasets.api_wrappers import COCOPanoptic
+from mmdet.datasets.api_wrappers import COCO, COCOPanoptic
 
 
 class TestCOCOPanoptic(unittest.TestCase):
@@ -65,3 +67,56 @@ class TestCOCOPanoptic(unittest.TestCase):
         api.load_anns(1)
 
         self.assertIsNone(api.load_anns(0.1))
+
+
+class TestCOCO(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = osp.join(self.tmp_dir.name, 'cache')
+        self.annotation_file = osp.join(self.tmp_dir.name, 'ann.json')
+        self.ann_json = {
+            'images': [{
+                'id': 1,
+                'width': 80,
+                'height': 60,
+                'file_name': 'fake_name1.jpg'
+            }],
+            'annotations': [{
+                'id': 1,
+                'image_id': 1,
+                'category_id': 1,
+                'bbox': [10, 10, 10, 40],
+                'area': 400,
+                'iscrowd': 0
+            }],
+            'categories': [{
+                'id': 1,
+                'name': 'drone_frequency'
+            }]
+        }
+        dump(self.ann_json, self.annotation_file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache(self):
+        coco = COCO(self.annotation_file, cache_dir=self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # the cache is loaded without building the index
+        with patch.object(
+                COCO, 'createIndex', side_effect=AssertionError) as index:
+            cached = COCO(self.annotation_file, cache_dir=self.cache_dir)
+            index.assert_not_called()
+        self.assertEqual(cached.dataset, coco.dataset)
+        self.assertEqual(cached.get_ann_ids(img_ids=[1]), [1])
+        self.assertEqual(cached.cat_img_map[1], [1])
+        self.assertIs(cached.img_ann_map[1][0], cached.anns[1])
+
+        # an edited annotation file gets a new cache
+        self.ann_json['annotations'][0]['bbox'] = [0, 0, 5, 5]
+        dump(self.ann_json, self.annotation_file)
+        coco = COCO(self.annotation_file, cache_dir=self.cache_dir)
+        self.assertEqual(coco.anns[1]['bbox'], [0, 0, 5, 5])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
@@ -0,0 +1,59 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import json
+import os.path as osp
+import tempfile
+import unittest
+
+from mmdet.datasets import CocoShardDataset
+
+
+class TestCocoShardDataset(unittest.TestCase):
+
+    def setUp(self):
+        """Write an offset index with two images in two shards."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.ann_file = osp.join(self.tmp_dir.name, 'annotations.json')
+        coco = {
+            'images': [
+                dict(
+                    id=i,
+                    file_name=f'capture/{i}.png',
+                    height=100,
+                    width=200,
+                    shard=f'shard-0000{i}.tar',
+                    offset=512 + i * 1024,
+                    length=300 + i) for i in range(2)
+            ],
+            'annotations': [
+                dict(
+                    id=i,
+                    image_id=i,
+                    category_id=1,
+                    bbox=[0, 10, 200, 40],
+                    area=8000,
+                    iscrowd=0) for i in range(2)
+            ],
+            'categories': [dict(id=1, name='drone_frequency')]
+        }
+        with open(self.ann_file, 'w') as f:
+            json.dump(coco, f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_coco_shard_dataset(self):
+        dataset = CocoShardDataset(
+            data_prefix=dict(img='shards'),
+            ann_file=self.ann_file,
+            metainfo=dict(classes=('drone_frequency', )),
+            pipeline=[])
+        self.assertEqual(len(dataset), 2)
+        data_info = dataset.get_data_info(1)
+        self.assertEqual(data_info['img_path'],
+                         osp.join('shards', 'capture/1.png'))
+        self.assertEqual(data_info['shard_path'],
+                         osp.join('shards', 'shard-00001.tar'))
+        self.assertEqual(data_info['shard_offset'], 1536)
+        self.assertEqual(data_info['shard_length'], 301)
+        self.assertEqual(len(data_info['instances']), 1)
+        self.assertEqual(data_info['instances'][0]['bbox'], [0, 10, 200, 50])
@@ -0,0 +1,54 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+from unittest.mock import patch
+
+from mmdet.datasets import ShardShuffleSampler
+
+
+class DummyShardDataset:
+
+    def __init__(self, shard_sizes):
+        self.shard_paths = [
+            f'shard-{shard}.tar' for shard, size in enumerate(shard_sizes)
+            for _ in range(size)
+        ]
+
+    def __len__(self):
+        return len(self.shard_paths)
+
+    def get_data_info(self, idx):
+        return dict(shard_path=self.shard_paths[idx])
+
+
+class TestShardShuffleSampler(TestCase):
+
+    @patch('mmengine.dataset.sampler.get_dist_info', return_value=(0, 1))
+    def test_shuffle(self, mock):
+        dataset = DummyShardDataset([4, 3, 5])
+        sampler = ShardShuffleSampler(dataset, seed=0)
+        self.assertEqual(len(sampler), 12)
+        indices = list(sampler)
+        self.assertEqual(sorted(indices), list(range(12)))
+        # every shard is read in one run
+        shards = [dataset.shard_paths[idx] for idx in indices]
+        runs = [
+            s for i, s in enumerate(shards) if i == 0 or s != shards[i - 1]
+        ]
+        self.assertEqual(sorted(runs), sorted(set(dataset.shard_paths)))
+
+        # the order changes with the epoch
+        sampler.set_epoch(1)
+        self.assertNotEqual(list(sampler), indices)
+
+    @patch('mmengine.dataset.sampler.get_dist_info', return_value=(0, 1))
+    def test_no_shuffle(self, mock):
+        dataset = DummyShardDataset([4, 3])
+        sampler = ShardShuffleSampler(dataset, shuffle=False, seed=0)
+        self.assertEqual(list(sampler), list(range(7)))
+
+    @patch('mmengine.dataset.sampler.get_dist_info', return_value=(1, 2))
+    def test_distributed(self, mock):
+        dataset = DummyShardDataset([4, 3])
+        sampler = ShardShuffleSampler(dataset, seed=0)
+        self.assertEqual(len(sampler), 4)
+        self.assertEqual(len(list(sampler)), 4)
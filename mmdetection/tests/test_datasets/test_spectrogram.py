@@ -0,0 +1,139 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import tempfile
+import unittest
+
+import numpy as np
+
+from mmdet.datasets import SpectrogramDataset
+from mmdet.datasets.spectrogram_utils import band_bbox, spectrogram_psd
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+def create_dummy_capture(file_path,
+                         num_range_bins=4,
+                         num_samples=2048,
+                         fs=5000.,
+                         prop_freq=500.):
+    t = np.arange(num_samples) / fs
+    data = np.sin(2 * np.pi * prop_freq * t) * np.ones((1, num_range_bins, 1))
+    with h5py.File(file_path, 'w') as f:
+        f['data/data'] = data.astype(np.float32)
+        f['data/timestamps'] = (t * 1e9)[None, :]
+        for propeller in ('front_right', 'back_right'):
+            f[f'parameters/prop_frequency/{propeller}/avg'] = np.array(
+                [prop_freq, prop_freq])
+
+
+@unittest.skipIf(h5py is None, 'h5py is not installed')
+class TestSpectrogramDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        create_dummy_capture(
+            osp.join(self.tmp_dir.name, 'drone-2024-07-10-12-30-0-fr-40.hdf5'))
+        create_dummy_capture(
+            osp.join(self.tmp_dir.name, 'drone-2024-07-11-12-30-5-xx-40.hdf5'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_spectrogram_dataset(self):
+        dataset = SpectrogramDataset(
+            data_root=self.tmp_dir.name,
+            data_prefix=dict(img=''),
+            range_bins=[0, 2, 9],
+            n_pixels=10,
+            pipeline=[])
+        dataset.full_init()
+        # bin 9 is out of bounds
+        self.assertEqual(len(dataset), 4)
+
+        data_info = dataset.get_data_info(0)
+        self.assertEqual(data_info['range_bin'], 0)
+        # the size of the raw images of gen_spec.py
+        self.assertEqual(data_info['height'], 462)
+        self.assertEqual(data_info['width'], 775)
+        self.assertAlmostEqual(data_info['sampling_freq'], 5000.)
+        self.assertEqual(len(data_info['instances']), 1)
+        # 500 Hz is frequency bin 25.6 -> 26 (507.8 Hz), i.e. row 368.2
+        self.assertEqual(data_info['instances'][0]['bbox'], [0, 358, 775, 378])
+        self.assertEqual(
+            [dataset.get_data_info(i)['img_id'] for i in range(4)],
+            [0, 1, 2, 3])
+
+        # the propeller of the second capture is unknown
+        self.assertEqual(len(dataset.get_data_info(2)['instances']), 0)
+        dataset = SpectrogramDataset(
+            data_root=self.tmp_dir.name,
+            data_prefix=dict(img=''),
+            range_bins=[0],
+            filter_cfg=dict(filter_empty_gt=True),
+            pipeline=[])
+        dataset.full_init()
+        self.assertEqual(len(dataset), 1)
+        # +-40 Hz by default
+        self.assertEqual(
+            dataset.get_data_info(0)['instances'][0]['bbox'],
+            [0, 361, 775, 376])
+
+        dataset = SpectrogramDataset(
+            data_root=self.tmp_dir.name,
+            data_prefix=dict(img=''),
+            range_bins=[0],
+            img_size=(100, 50),
+            pipeline=[])
+        dataset.full_init()
+        data_info = dataset.get_data_info(0)
+        self.assertEqual((data_info['width'], data_info['height']), (100, 50))
+        self.assertEqual(data_info['instances'][0]['bbox'], [0, 39, 100, 41])
+
+    def test_spectrogram_dataset_ann_file(self):
+        ann_file = osp.join(self.tmp_dir.name, 'train.txt')
+        with open(ann_file, 'w') as f:
+            f.write('drone-2024-07-11-12-30-5-xx-40.hdf5\n')
+        dataset = SpectrogramDataset(
+            data_root=self.tmp_dir.name,
+            ann_file='train.txt',
+            data_prefix=dict(img=''),
+            range_bins=[0, 1],
+            pipeline=[])
+        dataset.full_init()
+        self.assertEqual(len(dataset), 2)
+
+        # absolute paths, as in the split lists of split_data.py
+        img_path = osp.join(self.tmp_dir.name,
+                            'drone-2024-07-10-12-30-0-fr-40.hdf5')
+        with open(ann_file, 'w') as f:
+            f.write(img_path + '\n')
+        dataset = SpectrogramDataset(
+            ann_file=ann_file,
+            data_prefix=dict(img='unused/'),
+            range_bins=[0],
+            pipeline=[])
+        dataset.full_init()
+        self.assertEqual(dataset.get_data_info(0)['img_path'], img_path)
+
+    def test_spectrogram_psd(self):
+        signals = np.random.randn(3, 1000)
+        psd, freqs, times = spectrogram_psd(signals, 100., 256, 192)
+        self.assertEqual(psd.shape, (3, 129, 12))
+        self.assertEqual(freqs[-1], 50.)
+        self.assertEqual(len(times), 12)
+        # every row is transformed on its own
+        np.testing.assert_allclose(
+            spectrogram_psd(signals[1], 100., 256, 192)[0], psd[1])
+
+    def test_band_bbox(self):
+        freqs = np.linspace(0, 2500, 129)
+        # row 462 * (2500 - 507.8) / 2500 = 368.2, +-40 Hz is +-7.4 rows
+        self.assertEqual(band_bbox(freqs, 500, (775, 462)), [0, 361, 775, 15])
+        self.assertEqual(
+            band_bbox(freqs, 500, (775, 462), n_pixels=10), [0, 358, 775, 20])
+        # clipped to the image
+        self.assertEqual(
+            band_bbox(freqs, 2500, (775, 462), band_hz=100), [0, 0, 775, 18])
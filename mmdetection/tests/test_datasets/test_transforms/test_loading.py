@@ -1,19 +1,28 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
+import json
 import os
 import os.path as osp
 import sys
+import tarfile
+import tempfile
 import unittest
 from unittest.mock import MagicMock, Mock, patch
 
 import mmcv
 import numpy as np
 
+# yapf: disable
 from mmdet.datasets.transforms import (FilterAnnotations, LoadAnnotations,
                                        LoadEmptyAnnotations,
+                                       LoadImageFromMemmap,
                                        LoadImageFromNDArray,
+                                       LoadImageFromNpyFile,
+                                       LoadImageFromShard,
                                        LoadMultiChannelImageFromFiles,
-                                       LoadProposals, LoadTrackAnnotations)
+                                       LoadProposals, LoadSpectrogramFromHDF5,
+                                       LoadTrackAnnotations)
+# yapf: enable
 from mmdet.evaluation import INSTANCE_OFFSET
 from mmdet.structures.mask import BitmapMasks, PolygonMasks
 
@@ -22,6 +31,11 @@ try:
 except ImportError:
     panopticapi = None
 
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
 
 class TestLoadAnnotations(unittest.TestCase):
 
@@ -369,6 +383,173 @@ class TestLoadImageFromNDArray(unittest.TestCase):
                               'backend_args=None)'))
 
 
+class TestLoadImageFromNpyFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img_path = osp.join(self.tmp_dir.name, 'spec.npy')
+        self.img = np.random.randn(46, 77).astype(np.float16)
+        np.save(self.img_path, self.img)
+        self.results = {'img_path': self.img_path}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transform(self):
+        transform = LoadImageFromNpyFile()
+        results = transform(copy.deepcopy(self.results))
+        self.assertEqual(results['img'].shape, (46, 77, 1))
+        self.assertEqual(results['img'].dtype, np.float32)
+        self.assertEqual(results['img_shape'], (46, 77))
+        self.assertEqual(results['ori_shape'], (46, 77))
+        np.testing.assert_array_equal(results['img'][..., 0], self.img)
+
+        # keep float16
+        transform = LoadImageFromNpyFile(to_float32=False)
+        results = transform(copy.deepcopy(self.results))
+        self.assertEqual(results['img'].dtype, np.float16)
+
+        # ignore_empty
+        transform = LoadImageFromNpyFile(ignore_empty=True)
+        self.assertIsNone(
+            transform(dict(img_path=osp.join(self.tmp_dir.name, 'x.npy'))))
+        transform = LoadImageFromNpyFile()
+        with self.assertRaises(FileNotFoundError):
+            transform(dict(img_path=osp.join(self.tmp_dir.name, 'x.npy')))
+
+    def test_repr(self):
+        transform = LoadImageFromNpyFile()
+        self.assertEqual(
+            repr(transform), ('LoadImageFromNpyFile('
+                              'to_float32=True, '
+                              'ignore_empty=False, '
+                              'backend_args=None)'))
+
+
+class TestLoadImageFromShard(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img = np.random.randint(0, 255, (20, 30, 3), dtype=np.uint8)
+        self.spec = np.random.randn(46, 77).astype(np.float16)
+        img_path = osp.join(self.tmp_dir.name, '0.png')
+        mmcv.imwrite(self.img, img_path)
+        spec_path = osp.join(self.tmp_dir.name, '1.npy')
+        np.save(spec_path, self.spec)
+        self.shard_path = osp.join(self.tmp_dir.name, 'shard-00000.tar')
+        with tarfile.open(self.shard_path, 'w') as tar:
+            tar.add(img_path, 'capture/0.png')
+            tar.add(spec_path, 'capture/1.npy')
+        with tarfile.open(self.shard_path) as tar:
+            members = {
+                member.name: (member.offset_data, member.size)
+                for member in tar
+            }
+        self.results = []
+        for name in ('capture/0.png', 'capture/1.npy'):
+            offset, length = members[name]
+            self.results.append(
+                dict(
+                    img_path=osp.join(self.tmp_dir.name, name),
+                    shard_path=self.shard_path,
+                    shard_offset=offset,
+                    shard_length=length))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transform(self):
+        transform = LoadImageFromShard()
+        results = transform(copy.deepcopy(self.results[0]))
+        np.testing.assert_array_equal(results['img'], self.img)
+        self.assertEqual(results['img_shape'], (20, 30))
+        self.assertEqual(results['ori_shape'], (20, 30))
+
+        results = transform(copy.deepcopy(self.results[1]))
+        self.assertEqual(results['img'].shape, (46, 77, 1))
+        np.testing.assert_array_equal(results['img'][..., 0], self.spec)
+        self.assertEqual(len(transform._shards), 1)
+
+        transform = LoadImageFromShard(to_float32=True)
+        results = transform(copy.deepcopy(self.results[0]))
+        self.assertEqual(results['img'].dtype, np.float32)
+
+        # shards that are no longer needed are closed
+        transform = LoadImageFromShard(max_open_files=1)
+        transform(copy.deepcopy(self.results[0]))
+        other_shard = osp.join(self.tmp_dir.name, 'shard-00001.tar')
+        os.link(self.shard_path, other_shard)
+        transform(dict(self.results[0], shard_path=other_shard))
+        self.assertEqual(list(transform._shards), [other_shard])
+
+        # truncated shard
+        with self.assertRaises(IOError):
+            transform(dict(self.results[0], shard_offset=10**6))
+        transform = LoadImageFromShard(ignore_empty=True)
+        self.assertIsNone(transform(dict(self.results[0], shard_offset=10**6)))
+
+    def test_repr(self):
+        transform = LoadImageFromShard()
+        self.assertEqual(
+            repr(transform), ('LoadImageFromShard('
+                              'max_open_files=16, '
+                              'ignore_empty=False, '
+                              'to_float32=False, '
+                              "color_type='color', "
+                              "imdecode_backend='cv2')"))
+
+
+class TestLoadImageFromMemmap(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.memmap_file = osp.join(self.tmp_dir.name, 'spectrograms.npy')
+        self.imgs = np.random.randn(3, 46, 77, 1).astype(np.float16)
+        np.save(self.memmap_file, self.imgs)
+        index = dict(images=[
+            dict(row=row, file_name=f'spec_range_bin={row}.npy')
+            for row in range(3)
+        ])
+        with open(osp.join(self.tmp_dir.name, 'spectrograms_index.json'),
+                  'w') as f:
+            json.dump(index, f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transform(self):
+        transform = LoadImageFromMemmap(self.memmap_file)
+        results = transform(dict(img_path='Raw/capture/spec_range_bin=2.npy'))
+        np.testing.assert_array_equal(results['img'], self.imgs[2])
+        self.assertEqual(results['img'].dtype, np.float16)
+        self.assertEqual(results['img_shape'], (46, 77))
+        self.assertEqual(results['ori_shape'], (46, 77))
+        # a view on the mapped file that can still be modified in place
+        self.assertIsInstance(results['img'].base, np.memmap)
+        results['img'][:] = 0
+        np.testing.assert_array_equal(np.load(self.memmap_file), self.imgs)
+
+        transform = LoadImageFromMemmap(self.memmap_file, to_float32=True)
+        results = transform(dict(img_path='spec_range_bin=0.npy'))
+        self.assertEqual(results['img'].dtype, np.float32)
+
+        # the mapping is not pickled
+        transform = copy.deepcopy(transform)
+        self.assertIsNone(transform._images)
+
+        with self.assertRaises(KeyError):
+            transform(dict(img_path='spec_range_bin=3.npy'))
+
+    def test_repr(self):
+        transform = LoadImageFromMemmap(self.memmap_file)
+        index_file = osp.join(self.tmp_dir.name, 'spectrograms_index.json')
+        self.assertEqual(
+            repr(transform), ('LoadImageFromMemmap('
+                              f"memmap_file='{self.memmap_file}', "
+                              f"index_file='{index_file}', "
+                              'to_float32=False)'))
+
+
 class TestLoadMultiChannelImageFromFiles(unittest.TestCase):
 
     def setUp(self):
@@ -412,6 +593,87 @@ class TestLoadMultiChannelImageFromFiles(unittest.TestCase):
                               'backend_args=None)'))
 
 
+@unittest.skipIf(h5py is None, 'h5py is not installed')
+class TestLoadSpectrogramFromHDF5(unittest.TestCase):
+
+    def setUp(self):
+        """Setup the model and optimizer which are used in every test method.
+
+        TestCase calls functions in this order: setUp() -> testMethod() ->
+        tearDown() -> cleanUp()
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img_path = osp.join(self.tmp_dir.name, 'capture.hdf5')
+        fs = 5000.
+        t = np.arange(2048) / fs
+        data = np.random.randn(1, 3, 2048)
+        data[0, 1] += 5 * np.sin(2 * np.pi * 500. * t)
+        with h5py.File(self.img_path, 'w') as f:
+            f['data/data'] = data
+            f['data/timestamps'] = (t * 1e9)[None, :]
+        self.results = {'img_path': self.img_path, 'range_bin': 1}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transform(self):
+        # resampled to the size of the raw images of gen_spec.py
+        transform = LoadSpectrogramFromHDF5()
+        results = transform(copy.deepcopy(self.results))
+        self.assertEqual(results['img'].shape, (462, 775, 3))
+        self.assertEqual(results['img'].dtype, np.uint8)
+        self.assertEqual(results['img_shape'], (462, 775))
+        self.assertEqual(results['ori_shape'], (462, 775))
+        # the 500 Hz tone (frequency bin 26, spectrogram row 128 - 26) is the
+        # brightest row; viridis yellow in BGR, stretched by nearest neighbour
+        row = results['img'][:, 0].astype(int).sum(axis=1).argmax()
+        self.assertEqual(int((row + .5) * 129 / 462), 128 - 26)
+
+        # size and sampling_freq from the dataset, filter and to_float32
+        for filter_sos in (False, True):
+            transform = LoadSpectrogramFromHDF5(
+                filter_order=2, filter_sos=filter_sos, to_float32=True)
+            results = transform(
+                dict(
+                    copy.deepcopy(self.results),
+                    sampling_freq=5000.,
+                    width=29,
+                    height=129))
+            self.assertEqual(results['img'].shape, (129, 29, 3))
+            self.assertEqual(results['img'].dtype, np.float32)
+
+        # single-channel dB values without colormap
+        transform = LoadSpectrogramFromHDF5(cmap=None)
+        results = transform(
+            dict(copy.deepcopy(self.results), width=29, height=129))
+        self.assertEqual(results['img'].shape, (129, 29, 1))
+        self.assertEqual(results['img'].dtype, np.float32)
+        self.assertEqual(results['img'][:, 0, 0].argmax(), 128 - 26)
+
+    def test_cache(self):
+        transform = LoadSpectrogramFromHDF5(cache_size=1)
+        results = transform(copy.deepcopy(self.results))
+        results['img'][:] = 0
+        cached = transform(copy.deepcopy(self.results))
+        # the cached image is not modified through the returned copy
+        self.assertGreater(cached['img'].max(), 0)
+        transform(dict(copy.deepcopy(self.results), range_bin=0))
+        self.assertEqual(list(transform._cache), [(self.img_path, 0)])
+
+    def test_repr(self):
+        transform = LoadSpectrogramFromHDF5()
+        self.assertEqual(
+            repr(transform), ('LoadSpectrogramFromHDF5('
+                              'nfft=256, '
+                              'noverlap=192, '
+                              'filter_order=None, '
+                              'cutoff=50.0, '
+                              'filter_sos=False, '
+                              "cmap='viridis', "
+                              'to_float32=False, '
+                              'cache_size=0)'))
+
+
 class TestLoadProposals(unittest.TestCase):
 
     def test_transform(self):
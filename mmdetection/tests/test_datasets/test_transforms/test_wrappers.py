@@ -1,10 +1,16 @@
 import copy
+import os
 import os.path as osp
+import tempfile
 import unittest
+from unittest.mock import patch
 
-from mmcv.transforms import Compose
+import mmcv
+import numpy as np
+from mmcv.transforms import Compose, LoadImageFromFile
 
-from mmdet.datasets.transforms import MultiBranch, RandomOrder
+from mmdet.datasets.transforms import (CachedImageLoader, MultiBranch,
+                                       RandomOrder)
 from mmdet.utils import register_all_modules
 from .utils import construct_toy_data
 
@@ -171,3 +177,98 @@ class TestRandomOrder(unittest.TestCase):
         self.assertEqual(
             repr(transform), ('RandomOrder(Sharpness, Contrast, '
                               'Brightness, Rotate, ShearX, TranslateY, )'))
+
+
+class TestCachedImageLoader(unittest.TestCase):
+
+    def setUp(self):
+        """Setup the model and optimizer which are used in every test method.
+
+        TestCase calls functions in this order: setUp() -> testMethod() ->
+        tearDown() -> cleanUp()
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = osp.join(self.tmp_dir.name, 'cache')
+        self.img_paths = []
+        for i in range(3):
+            img_path = osp.join(self.tmp_dir.name, f'{i}.png')
+            mmcv.imwrite(
+                np.random.randint(0, 255, (64, 64, 3), dtype=np.uint8),
+                img_path)
+            self.img_paths.append(img_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_transform(self):
+        transform = CachedImageLoader(cache_dir=self.cache_dir)
+        results = transform(dict(img_path=self.img_paths[0]))
+        self.assertEqual(results['img_shape'], (64, 64))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # a hit does not call the loader
+        with patch.object(
+                LoadImageFromFile, 'transform',
+                side_effect=AssertionError) as loader:
+            cached = transform(dict(img_path=self.img_paths[0]))
+            loader.assert_not_called()
+        np.testing.assert_array_equal(cached['img'], results['img'])
+        self.assertEqual(cached['ori_shape'], (64, 64))
+
+        # another process shares the cache
+        other = CachedImageLoader(cache_dir=self.cache_dir)
+        np.testing.assert_array_equal(
+            other(dict(img_path=self.img_paths[0]))['img'], results['img'])
+
+        # a changed image is decoded again
+        img = np.zeros((32, 48, 3), dtype=np.uint8)
+        mmcv.imwrite(img, self.img_paths[0])
+        os.utime(self.img_paths[0], ns=(1, 1))
+        results = transform(dict(img_path=self.img_paths[0]))
+        np.testing.assert_array_equal(results['img'], img)
+
+        # other loader settings use other entries
+        transform = CachedImageLoader(
+            loader=dict(type='LoadImageFromFile', to_float32=True),
+            cache_dir=self.cache_dir)
+        results = transform(dict(img_path=self.img_paths[0]))
+        self.assertEqual(results['img'].dtype, np.float32)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+    def test_evict(self):
+        # room for two and a half images
+        transform = CachedImageLoader(cache_dir=self.cache_dir)
+        transform._cache_size = 5 * 64 * 64 * 3 // 2 + 500
+        for img_path in self.img_paths[:2]:
+            transform(dict(img_path=img_path))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        first = transform._cache_path(self.img_paths[0])
+        second = transform._cache_path(self.img_paths[1])
+        os.utime(first, ns=(1, 1))
+        os.utime(second, ns=(2, 2))
+        # a hit marks the first image as recently used
+        transform(dict(img_path=self.img_paths[0]))
+        transform(dict(img_path=self.img_paths[2]))
+        self.assertTrue(osp.exists(first))
+        self.assertFalse(osp.exists(second))
+
+    def test_remove_on_exit(self):
+        with patch('atexit.register') as register:
+            transform = CachedImageLoader(cache_dir=self.cache_dir)
+            register.assert_not_called()
+            transform = CachedImageLoader(
+                cache_dir=self.cache_dir, remove_on_exit=True)
+            register.assert_called_once_with(transform.remove)
+        transform(dict(img_path=self.img_paths[0]))
+        transform.remove()
+        self.assertFalse(osp.exists(self.cache_dir))
+        # removing it twice is fine
+        transform.remove()
+
+    def test_repr(self):
+        transform = CachedImageLoader(cache_dir=self.cache_dir)
+        self.assertEqual(
+            repr(transform), (f'CachedImageLoader(loader={transform.loader}, '
+                              f"cache_dir='{self.cache_dir}', "
+                              'cache_size_mb=8192, evict_ratio=0.9, '
+                              'remove_on_exit=False)'))
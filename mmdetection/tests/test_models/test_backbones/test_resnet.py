@@ -366,6 +366,36 @@ def test_resnest_stem():
     assert model.layer1[0].conv1.in_channels == 6
 
 
+def test_resnet_stem_in_channels():
+    # Test single-channel input
+    model = ResNet(18, in_channels=1)
+    assert model.conv1.in_channels == 1
+    imgs = torch.randn(1, 1, 64, 64)
+    feat = model(imgs)
+    assert feat[0].shape == torch.Size([1, 64, 16, 16])
+
+    # Test loading a 3-channel checkpoint into a single-channel stem
+    rgb_state_dict = ResNet(18).state_dict()
+    model.load_state_dict(rgb_state_dict)
+    assert torch.allclose(model.conv1.weight,
+                          rgb_state_dict['conv1.weight'].sum(1, keepdim=True))
+
+    # Test replicated channels give the response of the 3-channel model
+    rgb_model = ResNet(18)
+    rgb_model.load_state_dict(rgb_state_dict)
+    two_channel_model = ResNet(18, in_channels=2)
+    two_channel_model.load_state_dict(rgb_state_dict)
+    assert torch.allclose(
+        two_channel_model.conv1(imgs.repeat(1, 2, 1, 1)),
+        rgb_model.conv1(imgs.repeat(1, 3, 1, 1)),
+        atol=1e-5)
+
+    # Test deep stem
+    model = ResNetV1d(depth=18, in_channels=1)
+    model.load_state_dict(ResNetV1d(depth=18).state_dict())
+    assert model.stem[0].weight.shape[1] == 1
+
+
 def test_resnet_backbone():
     """Test resnet backbone."""
     with pytest.raises(KeyError):
@@ -0,0 +1,111 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import torch
+from mmengine import Config
+from mmengine.config import ConfigDict
+from mmengine.structures import InstanceData
+
+from mmdet import *  # noqa
+from mmdet.models.dense_heads import FrequencyBandHead
+from mmdet.structures.bbox import bbox_overlaps
+
+
+class TestFrequencyBandHead(TestCase):
+
+    def test_init(self):
+        head = FrequencyBandHead(num_classes=2, in_channels=1)
+        self.assertEqual(len(head.band_convs), 2)
+        self.assertEqual(head.band_cls.out_channels, 3 * 2)
+        self.assertEqual(head.band_reg.out_channels, 3 * 2)
+
+    def test_forward_single(self):
+        head = FrequencyBandHead(num_classes=2, in_channels=1)
+        cls_score, bbox_pred = head.forward_single(torch.rand(2, 1, 16, 32))
+        self.assertEqual(cls_score.shape, (2, 3 * 2, 16, 1))
+        self.assertEqual(bbox_pred.shape, (2, 3 * 4, 16, 1))
+        # no deltas along the time axis
+        bbox_pred = bbox_pred.view(2, 3, 4, 16, 1)
+        self.assertTrue((bbox_pred[:, :, 0::2] == 0).all())
+
+    def test_loss_by_feat(self):
+        s = 256
+        img_metas = [{
+            'img_shape': (s, 200, 3),
+            'pad_shape': (s, s, 3),
+            'scale_factor': 1,
+        }]
+        train_cfg = Config(
+            dict(
+                assigner=dict(
+                    type='MaxIoUAssigner',
+                    pos_iou_thr=0.5,
+                    neg_iou_thr=0.4,
+                    min_pos_iou=0,
+                    ignore_iof_thr=-1),
+                sampler=dict(type='PseudoSampler'),
+                allowed_border=-1,
+                pos_weight=-1,
+                debug=False))
+        head = FrequencyBandHead(
+            num_classes=1, in_channels=1, train_cfg=train_cfg)
+        feats = (
+            torch.rand(1, 1, s // stride, s // stride)
+            for stride in [4, 8, 16, 32, 64])
+        cls_scores, bbox_preds = head.forward(feats)
+
+        anchor_list, _ = head.get_anchors(
+            [cls_score.shape[-2:] for cls_score in cls_scores], img_metas,
+            'cpu')
+        for anchors in anchor_list[0]:
+            self.assertTrue((anchors[:, 0] == 0).all())
+            self.assertTrue((anchors[:, 2] == 200).all())
+
+        gt_instances = InstanceData()
+        gt_instances.bboxes = torch.empty((0, 4))
+        gt_instances.labels = torch.LongTensor([])
+        empty_gt_losses = head.loss_by_feat(cls_scores, bbox_preds,
+                                            [gt_instances], img_metas)
+        self.assertGreater(sum(empty_gt_losses['loss_cls']).item(), 0)
+        self.assertEqual(sum(empty_gt_losses['loss_bbox']).item(), 0)
+
+        # a full-width band as written by gen_spec.py
+        gt_instances = InstanceData()
+        gt_instances.bboxes = torch.Tensor([[0, 90, 200, 170]])
+        gt_instances.labels = torch.LongTensor([0])
+        one_gt_losses = head.loss_by_feat(cls_scores, bbox_preds,
+                                          [gt_instances], img_metas)
+        self.assertGreater(sum(one_gt_losses['loss_cls']).item(), 0)
+        self.assertGreater(sum(one_gt_losses['loss_bbox']).item(), 0)
+
+    def test_predict_by_feat(self):
+        s = 128
+        img_metas = [{
+            'img_shape': (s, 100, 3),
+            'pad_shape': (s, s, 3),
+            'scale_factor': (1, 1),
+        }]
+        test_cfg = ConfigDict(
+            nms_pre=1000,
+            min_bbox_size=0,
+            score_thr=0.,
+            nms=dict(iou_threshold=0.5),
+            max_per_img=100)
+        head = FrequencyBandHead(
+            num_classes=2, in_channels=1, test_cfg=test_cfg)
+        feats = (
+            torch.rand(1, 1, s // stride, s // stride)
+            for stride in [4, 8, 16, 32, 64])
+        cls_scores, bbox_preds = head.forward(feats)
+        results = head.predict_by_feat(
+            cls_scores, bbox_preds, batch_img_metas=img_metas)[0]
+
+        self.assertGreater(len(results), 0)
+        self.assertLessEqual(len(results), 100)
+        self.assertTrue((results.bboxes[:, 0] == 0).all())
+        self.assertTrue((results.bboxes[:, 2] == 100).all())
+        # no two bands of a class overlap by more than the nms threshold
+        for label in range(2):
+            bands = results.bboxes[results.labels == label]
+            ious = bbox_overlaps(bands, bands).triu(diagonal=1)
+            self.assertTrue((ious <= 0.5).all())
@@ -41,6 +41,48 @@ def test_max_iou_assigner(neg_iou_thr):
     assert torch.all(assign_result.gt_inds == expected_gt_inds)
 
 
+@pytest.mark.parametrize('gt_max_assign_all', [True, False])
+@pytest.mark.parametrize('ignore_wrt_candidates', [True, False])
+@pytest.mark.parametrize('neg_iou_thr', [0.4, (0.1, 0.4)])
+def test_max_iou_assigner_in_chunks(gt_max_assign_all, ignore_wrt_candidates,
+                                    neg_iou_thr):
+    cfg = dict(
+        pos_iou_thr=0.5,
+        neg_iou_thr=neg_iou_thr,
+        min_pos_iou=0.1,
+        gt_max_assign_all=gt_max_assign_all,
+        ignore_iof_thr=0.5,
+        ignore_wrt_candidates=ignore_wrt_candidates)
+    # boxes on a coarse grid, so that many priors tie for the max iou
+    torch.manual_seed(0)
+    xy = torch.randint(0, 20, (500, 2)).float() * 4
+    wh = torch.randint(1, 6, (500, 2)).float() * 8
+    boxes = torch.cat([xy, xy + wh], dim=1)
+    pred_instances = InstanceData(priors=boxes[:450])
+    gt_instances = InstanceData(
+        bboxes=boxes[450:480], labels=torch.randint(0, 3, (30, )))
+    gt_instances_ignore = InstanceData(bboxes=boxes[480:])
+
+    expected = MaxIoUAssigner(**cfg).assign(
+        pred_instances, gt_instances, gt_instances_ignore=gt_instances_ignore)
+    for assign_chunk_size in [1, 64, 449]:
+        assign_result = MaxIoUAssigner(
+            assign_chunk_size=assign_chunk_size, **cfg).assign(
+                pred_instances,
+                gt_instances,
+                gt_instances_ignore=gt_instances_ignore)
+        assert torch.equal(assign_result.gt_inds, expected.gt_inds)
+        assert torch.equal(assign_result.max_overlaps, expected.max_overlaps)
+        assert torch.equal(assign_result.labels, expected.labels)
+
+    # no gt
+    gt_instances = InstanceData(
+        bboxes=torch.empty(0, 4), labels=torch.empty(0))
+    assign_result = MaxIoUAssigner(
+        assign_chunk_size=64, **cfg).assign(pred_instances, gt_instances)
+    assert torch.all(assign_result.gt_inds == 0)
+
+
 def test_max_iou_assigner_with_ignore():
     self = MaxIoUAssigner(
         pos_iou_thr=0.5,
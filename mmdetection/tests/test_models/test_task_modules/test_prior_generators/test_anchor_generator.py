@@ -549,6 +549,84 @@ def test_yolo_anchor_generator():
     assert len(anchors) == 3
 
 
+def test_anchor_generator_cache():
+    from mmdet.models.task_modules.prior_generators import AnchorGenerator
+
+    uncached = AnchorGenerator([4, 8], [1.0, 0.5], [8])
+    self = AnchorGenerator([4, 8], [1.0, 0.5], [8], cache_size=2)
+    featmap_sizes = [(8, 8), (4, 4)]
+
+    anchors = self.grid_priors(featmap_sizes, device='cpu')
+    flags = self.valid_flags(featmap_sizes, (30, 32, 3), device='cpu')
+    expected_anchors = uncached.grid_priors(featmap_sizes, device='cpu')
+    expected_flags = uncached.valid_flags(
+        featmap_sizes, (30, 32, 3), device='cpu')
+    for i in range(2):
+        assert torch.equal(anchors[i], expected_anchors[i])
+        assert torch.equal(flags[i], expected_flags[i])
+
+    # hits return the same tensors in a new list
+    cached_anchors = self.grid_priors([[8, 8], [4, 4]], device='cpu')
+    assert cached_anchors is not anchors
+    assert all(a is b for a, b in zip(cached_anchors, anchors))
+    cached_flags = self.valid_flags(featmap_sizes, (30, 32), device='cpu')
+    assert all(a is b for a, b in zip(cached_flags, flags))
+    assert len(self._cache) == 2
+
+    # a different pad shape is a new entry, which evicts the least
+    # recently used one
+    other_flags = self.valid_flags(featmap_sizes, (32, 32, 3), device='cpu')
+    assert other_flags[0].all()
+    assert len(self._cache) == 2
+    assert self.grid_priors(featmap_sizes, device='cpu')[0] is not anchors[0]
+    assert self.valid_flags(
+        featmap_sizes, (32, 32, 3), device='cpu')[0] is other_flags[0]
+
+    # no cache by default
+    assert uncached.grid_priors(
+        featmap_sizes, device='cpu')[0] is not expected_anchors[0]
+    assert len(uncached._cache) == 0
+
+
+def test_frequency_band_anchor_generator():
+    from mmdet.models.task_modules import build_anchor_generator
+    if torch.cuda.is_available():
+        device = 'cuda'
+    else:
+        device = 'cpu'
+
+    anchor_generator_cfg = dict(
+        type='FrequencyBandAnchorGenerator',
+        strides=[(4, 8), 16],
+        scales=[2, 4, 8])
+    anchor_generator = build_anchor_generator(anchor_generator_cfg)
+    assert anchor_generator.num_base_priors == [3, 3]
+    assert anchor_generator.base_sizes == [8, 16]
+
+    featmap_sizes = [(6, 10), (3, 5)]
+    anchors = anchor_generator.grid_priors(featmap_sizes, device=device)
+    # one anchor per row and scale, spanning the full width
+    assert [len(level_anchors) for level_anchors in anchors] == [18, 9]
+    expected_level_0 = torch.Tensor([[0, -8, 40, 8], [0, -16, 40, 16],
+                                     [0, -32, 40, 32], [0, 0, 40, 16]])
+    assert torch.equal(anchors[0][:4].cpu(), expected_level_0)
+    assert (anchors[1][:, 2] == 80).all()
+    assert torch.equal(anchors[1][3:6, 1::2] - anchors[1][:3, 1::2],
+                       torch.full((3, 2), 16.).to(device))
+
+    prior_idxs = torch.Tensor([0, 4, 17]).long().to(device)
+    sparse_anchors = anchor_generator.sparse_priors(
+        prior_idxs, featmap_sizes[0], 0, device=device)
+    assert torch.equal(sparse_anchors, anchors[0][prior_idxs])
+
+    # rows below the padded image are invalid
+    valid_flags = anchor_generator.valid_flags(
+        featmap_sizes, (32, 40), device=device)
+    assert valid_flags[0].sum() == 4 * 3
+    assert valid_flags[1].sum() == 2 * 3
+    assert not valid_flags[0][12:].any()
+
+
 def test_retina_anchor():
     from mmdet.registry import MODELS
     if torch.cuda.is_available():
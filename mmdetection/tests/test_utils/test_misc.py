@@ -0,0 +1,65 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import json
+import os.path as osp
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from mmdet.utils import load_norms, merge_norm_stats
+
+
+def dump_norms(pixels, norms_file):
+    pixels = pixels.reshape(-1, pixels.shape[-1])
+    mean = pixels.mean(axis=0)
+    with open(norms_file, 'w') as f:
+        json.dump(
+            dict(
+                count=len(pixels),
+                mean=mean.tolist(),
+                std=pixels.std(axis=0).tolist(),
+                m2=((pixels - mean)**2).sum(axis=0).tolist()), f)
+
+
+class TestLoadNorms(TestCase):
+
+    def test_load_norms(self):
+        train_pixels = np.random.rand(100, 3) * 255
+        val_pixels = np.random.rand(40, 3) * 100
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            train_file = osp.join(tmp_dir, 'train.json')
+            val_file = osp.join(tmp_dir, 'val.json')
+            dump_norms(train_pixels, train_file)
+            dump_norms(val_pixels, val_file)
+
+            norms = load_norms(train_file)
+            np.testing.assert_allclose(norms['mean'], train_pixels.mean(0))
+            np.testing.assert_allclose(norms['std'], train_pixels.std(0))
+
+            # merged statistics equal those of all pixels
+            norms = load_norms(train_file, val_file)
+            all_pixels = np.concatenate([train_pixels, val_pixels])
+            np.testing.assert_allclose(norms['mean'], all_pixels.mean(0))
+            np.testing.assert_allclose(norms['std'], all_pixels.std(0))
+
+        with self.assertRaises(AssertionError):
+            load_norms()
+
+    def test_merge_norm_stats(self):
+        pixels = np.random.rand(50, 1)
+
+        def stats(pixels):
+            mean = pixels.mean(axis=0)
+            return dict(
+                count=len(pixels),
+                mean=mean.tolist(),
+                m2=((pixels - mean)**2).sum(axis=0).tolist())
+
+        self.assertIsNone(merge_norm_stats(None, None))
+        self.assertEqual(merge_norm_stats(stats(pixels), None), stats(pixels))
+        self.assertEqual(merge_norm_stats(None, stats(pixels)), stats(pixels))
+
+        merged = merge_norm_stats(stats(pixels[:10]), stats(pixels[10:]))
+        self.assertEqual(merged['count'], 50)
+        np.testing.assert_allclose(merged['mean'], stats(pixels)['mean'])
+        np.testing.assert_allclose(merged['m2'], stats(pixels)['m2'])
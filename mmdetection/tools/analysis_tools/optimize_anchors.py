@@ -5,6 +5,11 @@ This script provides two method to optimize YOLO anchors including k-means
 anchor cluster and differential evolution. You can use ``--algorithm k-means``
 and ``--algorithm differential_evolution`` to switch two method.
 
+The scales and ratios of an ``AnchorGenerator`` (e.g. of an RPN) are
+optimized with ``--algorithm anchor_generator``, which reads the boxes
+straight from the COCO annotation file of the train dataset and writes the
+resulting ``anchor_generator`` config fragment.
+
 Example:
     Use k-means anchor cluster::
 
@@ -17,6 +22,12 @@ Example:
         --algorithm differential_evolution \
         --input-shape ${INPUT_SHAPE [WIDTH HEIGHT]} \
         --output-dir ${OUTPUT_DIR}
+    Optimize the scales and ratios of an AnchorGenerator::
+
+        python tools/analysis_tools/optimize_anchors.py ${CONFIG} \
+        --algorithm anchor_generator \
+        --input-shape ${INPUT_SHAPE [WIDTH HEIGHT]} \
+        --output-dir ${OUTPUT_DIR}
 """
 import argparse
 import os.path as osp
@@ -24,7 +35,7 @@ import os.path as osp
 import numpy as np
 import torch
 from mmengine.config import Config
-from mmengine.fileio import dump
+from mmengine.fileio import dump, load
 from mmengine.logging import MMLogger
 from mmengine.registry import init_default_scope
 from mmengine.utils import ProgressBar
@@ -51,12 +62,25 @@ def parse_args():
         '--algorithm',
         default='differential_evolution',
         help='Algorithm used for anchor optimizing.'
-        'Support k-means and differential_evolution for YOLO.')
+        'Support k-means and differential_evolution for YOLO, and '
+        'anchor_generator for the scales and ratios of AnchorGenerator.')
     parser.add_argument(
         '--iters',
         default=1000,
         type=int,
         help='Maximum iterations for optimizer.')
+    parser.add_argument(
+        '--num-scales',
+        type=int,
+        default=None,
+        help='Number of AnchorGenerator scales. Defaults to the number in '
+        'the config.')
+    parser.add_argument(
+        '--num-ratios',
+        type=int,
+        default=None,
+        help='Number of AnchorGenerator ratios. Defaults to the number in '
+        'the config.')
     parser.add_argument(
         '--output-dir',
         default=None,
@@ -324,6 +348,164 @@ class YOLODEAnchorOptimizer(BaseAnchorOptimizer):
         return cost
 
 
+class AnchorGeneratorOptimizer(BaseAnchorOptimizer):
+    """Scales and ratios optimizer of ``AnchorGenerator`` using differential
+    evolution.
+
+    The anchors of an ``AnchorGenerator`` at stride ``s`` with scale ``k``
+    and ratio ``r`` are ``s * k / sqrt(r)`` wide and ``s * k * sqrt(r)``
+    high. The scales and ratios, which are shared by all strides, are
+    optimized in log space for the average of the best IoU of every box with
+    any anchor (both centered at the origin). The boxes are read straight
+    from the COCO annotation file, and the IoUs of all boxes and anchors are
+    computed at once with NumPy broadcasting.
+
+    Args:
+        ann_file (str): Path of the COCO annotation file.
+        strides (list[int] | list[tuple[int, int]]): Strides of the
+            anchor generator. Only the first value of a tuple is used.
+        num_scales (int): Number of scales.
+        num_ratios (int): Number of ratios.
+        iters (int): Maximum iterations for differential evolution.
+        max_boxes (int): Number of randomly sampled boxes the cost is
+            computed on while optimizing. Default: 10000.
+        base_anchors (dict, optional): ``scales`` and ``ratios`` of the
+            current anchor generator, whose IoUs are logged for comparison.
+            Default: None.
+        head (str): Name of the head in the written config fragment.
+            Default: 'rpn_head'.
+    """
+
+    def __init__(self,
+                 ann_file,
+                 strides,
+                 num_scales,
+                 num_ratios,
+                 iters,
+                 max_boxes=10000,
+                 base_anchors=None,
+                 head='rpn_head',
+                 **kwargs):
+        self.ann_file = ann_file
+        super(AnchorGeneratorOptimizer, self).__init__(dataset=None, **kwargs)
+        self.strides = [
+            stride[0] if isinstance(stride, (list, tuple)) else stride
+            for stride in strides
+        ]
+        self.num_scales = num_scales
+        self.num_ratios = num_ratios
+        self.iters = iters
+        self.max_boxes = max_boxes
+        self.base_anchors = base_anchors
+        self.head = head
+
+    def get_whs_and_shapes(self):
+        """Get widths and heights of bboxes and shapes of images from the
+        COCO annotation file.
+
+        Returns:
+            tuple[np.ndarray]: Array of bbox shapes and array of image
+            shapes with shape (num_bboxes, 2) in [width, height] format.
+        """
+        self.logger.info(f'Collecting bboxes from {self.ann_file}...')
+        coco = load(self.ann_file)
+        img_shapes = {
+            img['id']: (img['width'], img['height'])
+            for img in coco['images']
+        }
+        anns = [
+            ann for ann in coco['annotations'] if not ann.get('iscrowd', 0)
+        ]
+        bbox_whs = np.array([ann['bbox'][2:4] for ann in anns],
+                            dtype=np.float64).reshape(-1, 2)
+        img_shapes = np.array([img_shapes[ann['image_id']] for ann in anns],
+                              dtype=np.float64).reshape(-1, 2)
+        valid = (bbox_whs > 0).all(1)
+        self.logger.info(f'Collected {valid.sum()} bboxes.')
+        return bbox_whs[valid], img_shapes[valid]
+
+    def anchor_whs(self, scales, ratios):
+        """Widths and heights of the anchors of all strides, scales and
+        ratios with shape (num_anchors, 2)."""
+        sizes = (np.array(self.strides)[:, None] *
+                 np.asarray(scales)[None, :]).reshape(-1, 1)
+        h_ratios = np.sqrt(np.asarray(ratios))[None, :]
+        return np.stack([sizes / h_ratios, sizes * h_ratios],
+                        axis=-1).reshape(-1, 2)
+
+    @staticmethod
+    def best_ious(bbox_whs, anchor_whs):
+        """IoU of every box with its best matching anchor, both centered at
+        the origin."""
+        inter = np.minimum(bbox_whs[:, None, :],
+                           anchor_whs[None, :, :]).prod(2)
+        union = bbox_whs.prod(1)[:, None] + anchor_whs.prod(1)[None, :] - inter
+        return (inter / union).max(1)
+
+    def log_ious(self, name, scales, ratios):
+        ious = self.best_ious(self.bbox_whs, self.anchor_whs(scales, ratios))
+        self.logger.info(f'{name}: average IOU {ious.mean():.4f}, '
+                         f'IOU >= 0.5: {(ious >= 0.5).mean():.2%}, '
+                         f'IOU >= 0.7: {(ious >= 0.7).mean():.2%}')
+
+    def optimize(self):
+        if self.base_anchors is not None:
+            self.log_ious('Current anchors', **self.base_anchors)
+        scales, ratios = self.differential_evolution()
+        self.log_ious('Optimized anchors', scales, ratios)
+        self.save_result(scales, ratios, self.out_dir)
+
+    def differential_evolution(self):
+        bbox_whs = self.bbox_whs
+        if len(bbox_whs) > self.max_boxes:
+            rng = np.random.default_rng(0)
+            bbox_whs = bbox_whs[rng.choice(
+                len(bbox_whs), self.max_boxes, replace=False)]
+
+        log_sizes = np.log(np.sqrt(bbox_whs.prod(1)))
+        log_ratios = np.log(bbox_whs[:, 1] / bbox_whs[:, 0])
+        scale_bounds = (log_sizes.min() - np.log(max(self.strides)),
+                        log_sizes.max() - np.log(min(self.strides)))
+        ratio_bounds = (log_ratios.min(), log_ratios.max() + 1e-6)
+        bounds = [scale_bounds] * self.num_scales + \
+            [ratio_bounds] * self.num_ratios
+
+        result = differential_evolution(
+            func=self.avg_iou_cost,
+            bounds=bounds,
+            args=(bbox_whs, ),
+            maxiter=self.iters,
+            updating='immediate',
+            seed=0,
+            disp=True)
+        scales = np.sort(np.exp(result.x[:self.num_scales]))
+        ratios = np.sort(np.exp(result.x[self.num_scales:]))
+        return scales, ratios
+
+    def avg_iou_cost(self, anchor_params, bbox_whs):
+        scales = np.exp(anchor_params[:self.num_scales])
+        ratios = np.exp(anchor_params[self.num_scales:])
+        return 1 - self.best_ious(bbox_whs, self.anchor_whs(scales,
+                                                            ratios)).mean()
+
+    def save_result(self, scales, ratios, path=None):
+        scales = [float(f'{scale:.3g}') for scale in scales]
+        ratios = [float(f'{ratio:.3g}') for ratio in ratios]
+        fragment = (f'model = dict(\n'
+                    f'    {self.head}=dict(\n'
+                    f'        anchor_generator=dict(\n'
+                    f"            type='AnchorGenerator',\n"
+                    f'            scales={scales},\n'
+                    f'            ratios={ratios},\n'
+                    f'            strides={self.strides})))\n')
+        self.logger.info(f'Anchor optimize result:\n{fragment}')
+        if path:
+            cfg_path = osp.join(path, 'anchor_optimize_result.py')
+            with open(cfg_path, 'w') as f:
+                f.write(fragment)
+            self.logger.info(f'Result saved in {cfg_path}')
+
+
 def main():
     logger = MMLogger.get_current_instance()
     args = parse_args()
@@ -340,6 +522,45 @@ def main():
     input_shape = args.input_shape
     assert len(input_shape) == 2
 
+    train_data_cfg = cfg.train_dataloader
+    while 'dataset' in train_data_cfg:
+        train_data_cfg = train_data_cfg['dataset']
+
+    if args.algorithm == 'anchor_generator':
+        head = 'rpn_head' if 'rpn_head' in cfg.model else 'bbox_head'
+        anchor_cfg = cfg.model[head].anchor_generator
+        assert anchor_cfg.type == 'AnchorGenerator', \
+            f'Only support optimize AnchorGenerator, but get ' \
+            f'{anchor_cfg.type}.'
+        if anchor_cfg.get('scales') is not None:
+            base_anchors = dict(
+                scales=anchor_cfg.scales, ratios=anchor_cfg.ratios)
+        else:
+            base_anchors = dict(
+                scales=[
+                    anchor_cfg.octave_base_scale *
+                    2**(i / anchor_cfg.scales_per_octave)
+                    for i in range(anchor_cfg.scales_per_octave)
+                ],
+                ratios=anchor_cfg.ratios)
+        ann_file = train_data_cfg['ann_file']
+        if train_data_cfg.get('data_root') and not osp.isabs(ann_file):
+            ann_file = osp.join(train_data_cfg['data_root'], ann_file)
+        optimizer = AnchorGeneratorOptimizer(
+            ann_file=ann_file,
+            strides=anchor_cfg.strides,
+            num_scales=args.num_scales or len(base_anchors['scales']),
+            num_ratios=args.num_ratios or len(base_anchors['ratios']),
+            iters=args.iters,
+            base_anchors=base_anchors,
+            head=head,
+            input_shape=input_shape,
+            device=args.device,
+            logger=logger,
+            out_dir=args.output_dir)
+        optimizer.optimize()
+        return
+
     anchor_type = cfg.model.bbox_head.anchor_generator.type
     assert anchor_type == 'YOLOAnchorGenerator', \
         f'Only support optimize YOLOAnchor, but get {anchor_type}.'
@@ -347,9 +568,6 @@ def main():
     base_sizes = cfg.model.bbox_head.anchor_generator.base_sizes
     num_anchors = sum([len(sizes) for sizes in base_sizes])
 
-    train_data_cfg = cfg.train_dataloader
-    while 'dataset' in train_data_cfg:
-        train_data_cfg = train_data_cfg['dataset']
     dataset = DATASETS.build(train_data_cfg)
 
     if args.algorithm == 'k-means':
@@ -372,8 +590,8 @@ def main():
             out_dir=args.output_dir)
     else:
         raise NotImplementedError(
-            f'Only support k-means and differential_evolution, '
-            f'but get {args.algorithm}')
+            f'Only support k-means, differential_evolution and '
+            f'anchor_generator, but get {args.algorithm}')
 
     optimizer.optimize()
 
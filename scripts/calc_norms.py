@@ -1,78 +1,142 @@
 """
 This script calculates the mean and standard deviation of the pixel values for all images in specified subdirectories
-(train, test, val) within a given directory. It reads images in color (BGR format), extracts pixel values for each 
-channel (Red, Green, and Blue), and computes the mean and standard deviation for each channel.
+(train, test, val) within a given directory. It reads images in color (BGR format), or single-channel float .npy
+spectrograms, and computes the mean and standard deviation for each channel.
+
+The statistics are streamed: every image is reduced to its per-channel count, mean and sum of squared deviations in
+float64, and these are merged with Chan's parallel update, so memory use does not grow with the size of the dataset.
+Images are read in parallel worker processes.
 
 Usage:
-    python calc_norms.py <image_directory>
+    python calc_norms.py <image_directory> [--workers N] [--sample N] [--seed S] [--subdirs train test val]
 
 Arguments:
     <image_directory>: Directory containing the subdirectories train, test, and val.
+    --workers:         (Optional) Number of worker processes. Defaults to the CPU count.
+    --sample:          (Optional) Estimate the values from this many randomly chosen images instead of all of them.
+    --seed:            (Optional) Seed of the random sample.
+    --subdirs:         (Optional) Subdirectories to include. Defaults to train, test and val; pass only train to
+                       get statistics that do not leak information from the evaluation sets.
 
 Output:
-    Prints the mean and standard deviation of the pixel values for each color channel (Red, Green, Blue).
-
-Note:
-    This may take a while to run
+    Prints the mean and standard deviation of the pixel values for each color channel (Red, Green, Blue), or for the
+    single channel of .npy images.
 """
 
+import argparse
 import os
+import random
 import sys
-import numpy as np
-import cv2
+from concurrent.futures import ProcessPoolExecutor
 
-def calculate_mean_and_std(image_dir):
-    pixel_values_r = []
-    pixel_values_g = []
-    pixel_values_b = []
+import cv2
+import numpy as np
 
-    subdirs = ['train', 'test', 'val']
+def parse_args():
+    parser = argparse.ArgumentParser(description='Calculate the per-channel mean and std of a dataset.')
+    parser.add_argument('image_directory', help='Directory containing the subdirectories train, test, and val')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the CPU count)')
+    parser.add_argument('--sample', type=int, default=None, help='Number of randomly chosen images to estimate the values from')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the random sample')
+    parser.add_argument('--subdirs', nargs='+', default=['train', 'test', 'val'], help='Subdirectories to include')
+    return parser.parse_args()
+
+def read_image(image_path):
+    # Read an image as (height, width, channels); color images in BGR, .npy arrays as stored
+    if image_path.endswith('.npy'):
+        image = np.load(image_path)
+        return image[..., None] if image.ndim == 2 else image
+    return cv2.imread(image_path, cv2.IMREAD_COLOR)  # Read in color (BGR)
+
+def image_stats(image):
+    # Per-channel pixel count, mean and sum of squared deviations of one image
+    pixels = image.reshape(-1, image.shape[-1]).astype(np.float64)
+    mean = pixels.mean(axis=0)
+    m2 = ((pixels - mean) ** 2).sum(axis=0)
+    return len(pixels), mean, m2
+
+def merge_stats(a, b):
+    # Chan et al.'s parallel update of two (count, mean, M2) triples, as merge_norm_stats in mmdet.utils does for norms.json
+    if a is None:
+        return b
+    if b is None:
+        return a
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (n_b / n)
+    m2 = m2_a + m2_b + delta ** 2 * (n_a * n_b / n)
+    return n, mean, m2
+
+def chunk_stats(image_paths):
+    # Merged statistics of a chunk of images, computed in a worker process
+    stats = None
+    for image_path in image_paths:
+        image = read_image(image_path)
+        if image is None:
+            print(f"Failed to read image {image_path}. Skipping.")
+            continue
+        stats = merge_stats(stats, image_stats(image))
+    return stats
 
+def list_images(image_dir, subdirs=('train', 'test', 'val')):
+    image_paths = []
     for subdir in subdirs:
         subdir_path = os.path.join(image_dir, subdir)
         if not os.path.isdir(subdir_path):
             print(f"Subdirectory {subdir_path} does not exist.")
             continue
 
-        for image_name in os.listdir(subdir_path):
-            image_path = os.path.join(subdir_path, image_name)
-            image = cv2.imread(image_path, cv2.IMREAD_COLOR)  # Read in color (BGR)
+        for image_name in sorted(os.listdir(subdir_path)):
+            image_paths.append(os.path.join(subdir_path, image_name))
+    return image_paths
+
+def calculate_mean_and_std(image_dir, subdirs=('train', 'test', 'val'), workers=None, sample=None, seed=None):
+    image_paths = list_images(image_dir, subdirs)
+    if sample is not None and sample < len(image_paths):
+        image_paths = random.Random(seed).sample(image_paths, sample)
+
+    # A few chunks per worker keeps the load balanced without pickling one result per image
+    n_chunks = max(1, min(len(image_paths), 4 * (workers or os.cpu_count() or 1)))
+    chunks = [image_paths[i::n_chunks] for i in range(n_chunks)]
+    stats = None
+    if workers == 1:
+        for chunk in chunks:
+            stats = merge_stats(stats, chunk_stats(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_result in executor.map(chunk_stats, chunks):
+                stats = merge_stats(stats, chunk_result)
+    if stats is None:
+        return None, None
+
+    n, mean, m2 = stats
+    std = np.sqrt(m2 / n)
+    if len(mean) == 3:
+        # BGR to (Red, Green, Blue)
+        mean, std = mean[::-1], std[::-1]
+    means = tuple(float(value) for value in mean)
+    stds = tuple(float(value) for value in std)
 
-            if image is None:
-                print(f"Failed to read image {image_path}. Skipping.")
-                continue
-
-            pixel_values_r.extend(image[:, :, 2].flatten())  # Red channel
-            pixel_values_g.extend(image[:, :, 1].flatten())  # Green channel
-            pixel_values_b.extend(image[:, :, 0].flatten())  # Blue channel
-
-    mean_r = np.mean(pixel_values_r)
-    std_r = np.std(pixel_values_r)
-    mean_g = np.mean(pixel_values_g)
-    std_g = np.std(pixel_values_g)
-    mean_b = np.mean(pixel_values_b)
-    std_b = np.std(pixel_values_b)
-
-    means = (mean_r, mean_g, mean_b)
-    stds = (std_r, std_g, std_b)
-    
     return means, stds
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python script_name.py <image_directory>")
-        sys.exit(1)
+    args = parse_args()
+
+    image_directory = args.image_directory
 
-    image_directory = sys.argv[1]
-    
     if not os.path.isdir(image_directory):
         print(f"The path {image_directory} is not a valid directory.")
         sys.exit(1)
 
-    means, stds = calculate_mean_and_std(image_directory)
+    means, stds = calculate_mean_and_std(image_directory, args.subdirs, args.workers, args.sample, args.seed)
+    if means is None:
+        print("No images could be read.")
+        sys.exit(1)
     means_rounded = [round(mean, 2) for mean in means]
     stds_rounded = [round(std, 2) for std in stds]
-    
+
     print(f"normalization_values = {{")
     print(f"    'mean': {means_rounded},")
     print(f"    'std': {stds_rounded}")
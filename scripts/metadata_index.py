@@ -0,0 +1,200 @@
+"""
+This script builds a SQLite index of the metadata of every HDF5 capture in a directory, so that tools which only need
+the capture parameters (split_data.py, analysis) can query one small database instead of opening every file.
+
+Each capture is opened once, in parallel, and one row is stored per file with its n_blades, prop_size, tilt, throttle,
+propeller, fill_factor, data shape, timestamps and average propeller frequencies. On later runs only files whose size
+or modification time changed are read again, and rows of deleted files are dropped.
+
+Usage:
+    python metadata_index.py --data_dir /path/to/raw/data --index /path/to/metadata.sqlite --workers 8
+
+Arguments:
+    --data_dir:       (Required) Directory where the raw HDF5 captures are stored.
+    --index:          (Optional) Path of the index. Defaults to 'metadata.sqlite' in data_dir.
+    --workers:        (Optional) Number of worker processes used to read new captures. Defaults to the CPU count.
+
+Output:
+    Prints the number of captures for every n_blades/prop_size/propeller combination.
+
+Example query:
+    sqlite3 metadata.sqlite "SELECT file FROM captures WHERE n_blades = 2 AND tilt > 10"
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import h5py
+import numpy as np
+
+INDEX_NAME = 'metadata.sqlite'
+PROPELLERS = {
+    'fr': 'front_right',
+    'br': 'back_right',
+    'fl': 'front_left',
+    'bl': 'back_left'
+}
+COLUMNS = [
+    ('file', 'TEXT PRIMARY KEY'),
+    ('size', 'INTEGER'),
+    ('mtime_ns', 'INTEGER'),
+    ('drone_name', 'TEXT'),
+    ('time_stamp', 'TEXT'),
+    ('propeller', 'TEXT'),
+    ('throttle', 'REAL'),
+    ('tilt', 'REAL'),
+    ('n_blades', 'INTEGER'),
+    ('prop_size', 'TEXT'),
+    ('fill_factor', 'REAL'),
+    ('data_shape', 'TEXT'),  # JSON list
+    ('n_range_bins', 'INTEGER'),
+    ('n_samples', 'INTEGER'),
+    ('t_start', 'REAL'),  # Seconds
+    ('t_end', 'REAL'),
+    ('sampling_freq', 'REAL'),
+    ('prop_frequency', 'TEXT'),  # JSON object of the first 'avg' value per propeller
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build a metadata index of the HDF5 captures in a directory.')
+    parser.add_argument('--data_dir', required=True, help='Directory where raw data is stored')
+    parser.add_argument('--index', default=None, help="Path of the index (defaults to 'metadata.sqlite' in data_dir)")
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (defaults to the CPU count)')
+    return parser.parse_args()
+
+def _scalar(value):
+    """Plain Python value of an HDF5 scalar (bytes are decoded)."""
+    if isinstance(value, np.ndarray):
+        value = value.reshape(-1)[0] if value.size else None
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _number(value):
+    """Numeric value or None for strings that are not numbers."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def read_capture_metadata(file_path):
+    """Read the metadata row of one capture with a single file open."""
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    parts = base_name.split('-')
+    stat = os.stat(file_path)
+    row = dict.fromkeys(name for name, _ in COLUMNS)
+    row.update({
+        'file': os.path.basename(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'drone_name': '-'.join(parts[:len(parts) - 7]) if len(parts) >= 8 else None,
+        'time_stamp': '-'.join(parts[-7:-4]) if len(parts) >= 8 else None,
+        'propeller': parts[-2] if len(parts) >= 2 else None,
+        'throttle': _number(parts[-1]),
+        'tilt': _number(parts[-3]) if len(parts) >= 3 else None,
+    })
+
+    with h5py.File(file_path, 'r') as f:
+        parameters = f['parameters'] if 'parameters' in f else {}
+        for name in ('n_blades', 'prop_size', 'tilt', 'fill_factor', 'throttle'):
+            if name in parameters:
+                row[name] = _scalar(parameters[name][()])
+        if 'prop_frequency' in parameters:
+            prop_frequency = {}
+            for propeller, group in parameters['prop_frequency'].items():
+                if isinstance(group, h5py.Group) and 'avg' in group:
+                    prop_frequency[propeller] = _scalar(group['avg'][()])
+            row['prop_frequency'] = json.dumps(prop_frequency)
+        if 'data/data' in f:
+            shape = f['data/data'].shape
+            row['data_shape'] = json.dumps(list(shape))
+            if len(shape) >= 2:
+                row['n_range_bins'], row['n_samples'] = shape[-2], shape[-1]
+        if 'data/timestamps' in f:
+            timestamps = f['data/timestamps']
+            # Only the first row is needed for the start, end and sampling rate
+            first_row = timestamps[0] if timestamps.ndim == 2 else timestamps[()]
+            if len(first_row):
+                first_row = first_row / 1e9
+                row['t_start'], row['t_end'] = float(first_row[0]), float(first_row[-1])
+            if len(first_row) > 1:
+                row['sampling_freq'] = float(1 / np.mean(np.diff(first_row)))
+    if row['n_blades'] is not None:
+        row['n_blades'] = int(row['n_blades'])
+    return row
+
+def connect(index_path):
+    """Open the index, creating the captures table if needed."""
+    connection = sqlite3.connect(index_path)
+    connection.row_factory = sqlite3.Row
+    columns = ', '.join(f'{name} {kind}' for name, kind in COLUMNS)
+    connection.execute(f'CREATE TABLE IF NOT EXISTS captures ({columns})')
+    return connection
+
+def build_index(data_dir, index_path=None, workers=None, extensions=('.h5', '.hdf5')):
+    """Bring the index of data_dir up to date and return its path.
+
+    Captures whose size and modification time match their row are not
+    opened again; new or changed captures are read in parallel.
+    """
+    if index_path is None:
+        index_path = os.path.join(data_dir, INDEX_NAME)
+    filenames = sorted(f for f in os.listdir(data_dir) if f.endswith(extensions))
+
+    connection = connect(index_path)
+    with connection:
+        known = {row['file']: (row['size'], row['mtime_ns'])
+                 for row in connection.execute('SELECT file, size, mtime_ns FROM captures')}
+        pending = []
+        for filename in filenames:
+            stat = os.stat(os.path.join(data_dir, filename))
+            if known.get(filename) != (stat.st_size, stat.st_mtime_ns):
+                pending.append(os.path.join(data_dir, filename))
+
+        removed = set(known) - set(filenames)
+        connection.executemany('DELETE FROM captures WHERE file = ?', [(filename,) for filename in removed])
+
+        names = [name for name, _ in COLUMNS]
+        insert = f"INSERT OR REPLACE INTO captures ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        if workers == 1 or len(pending) <= 1:
+            for row in map(read_capture_metadata, pending):
+                connection.execute(insert, [row[name] for name in names])
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for row in executor.map(read_capture_metadata, pending, chunksize=16):
+                    connection.execute(insert, [row[name] for name in names])
+    connection.close()
+    return index_path
+
+def load_index(index_path, where=None, parameters=()):
+    """Return the rows of the index as dicts in filename order.
+
+    `where` is an optional SQL condition, e.g. 'n_blades = ?' with
+    parameters (2,).
+    """
+    connection = connect(index_path)
+    query = 'SELECT * FROM captures'
+    if where:
+        query += f' WHERE {where}'
+    rows = [dict(row) for row in connection.execute(query + ' ORDER BY file', parameters)]
+    connection.close()
+    return rows
+
+def main():
+    args = parse_args()
+    index_path = build_index(args.data_dir, args.index, args.workers)
+    connection = connect(index_path)
+    print(f"Index: {index_path}")
+    for row in connection.execute('SELECT n_blades, prop_size, propeller, COUNT(*) AS n FROM captures '
+                                  'GROUP BY n_blades, prop_size, propeller ORDER BY n_blades, prop_size, propeller'):
+        print(f"n_blades={row['n_blades']} prop_size={row['prop_size']} "
+              f"propeller={PROPELLERS.get(row['propeller'], row['propeller'])}: {row['n']} captures")
+    connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,20 @@ Arguments:
     --train_split:    (Required) Percentage of data for training set.
     --val_split:      (Optional) Percentage of data for validation set. Defaults to 0 if not provided.
     --test_split:     (Required) Percentage of data for test set.
+    --index:          (Optional) Path of the metadata index. Defaults to 'metadata.sqlite' in data_dir.
+    --workers:        (Optional) Number of worker processes used to index new captures. Defaults to the CPU count.
+    --link-mode:      (Optional) How the splits are materialized: 'copy' (default) copies the files into train/val/test,
+                      'hardlink' and 'symlink' link them there without copying data, 'manifest' only writes the lists
+                      train.txt, val.txt and test.txt of absolute file paths to the output directory.
+    --seed:           (Optional) Seed of the random split. Unseeded by default.
 
 Note:
     The sum of train_split, val_split, and test_split must equal 100.
+    Only the train/val/test folders and lists of previous runs are replaced, other files in the output directory are
+    kept. The lists written in manifest mode can be passed to gen_spec.py instead of a folder and used as the ann_file
+    of SpectrogramDataset, so re-splitting takes seconds and no capture is duplicated on disk.
+    The n_blades/prop_size of the captures come from the metadata index (see metadata_index.py), which is built or
+    updated first, so each capture is opened at most once and not at all on later runs.
 """
 
 # Optional todo: modify this to support cross fold validation and split correctly
@@ -23,9 +34,12 @@ Note:
 import argparse
 import os
 import shutil
-import h5py
 import numpy as np
 import logging
+from metadata_index import build_index, load_index
+
+SPLITS = ['train', 'val', 'test']
+LINK_MODES = ['copy', 'hardlink', 'symlink', 'manifest']
 
 def parse_args():
     # Set up argument parser
@@ -35,6 +49,10 @@ def parse_args():
     parser.add_argument('--train_split', type=int, required=True, help='Percentage of data for training set')
     parser.add_argument('--val_split', type=int, default=0, help='Percentage of data for validation set')
     parser.add_argument('--test_split', type=int, required=True, help='Percentage of data for test set')
+    parser.add_argument('--index', default=None, help="Path of the metadata index (defaults to 'metadata.sqlite' in data_dir)")
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes used to index new captures')
+    parser.add_argument('--link-mode', choices=LINK_MODES, default='copy', help="How the splits are materialized: copy files, hardlink or symlink them, or write file lists (manifest)")
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the random split')
     return parser.parse_args()
 
 def validate_splits(train_split, val_split, test_split):
@@ -43,37 +61,50 @@ def validate_splits(train_split, val_split, test_split):
     if total != 100:
         raise ValueError('Sum of train, val, and test splits must be 100')
 
-def create_output_folders(output_dir):
-    # Delete the output directory if it exists
-    if os.path.exists(output_dir):
-        shutil.rmtree(output_dir)
-    # Create output directory
-    os.makedirs(output_dir)
-    # Create train, val, test directories
-    for prop in ['train', 'val', 'test']:
-        os.makedirs(os.path.join(output_dir, prop), exist_ok=True)
-
-def get_unique_combos(files):
-    # Get unique combinations of n_blades and size from the files
-    combos = set()
-    for file in files:
-        with h5py.File(file, 'r') as f:
-            n_blades = int(f['parameters/n_blades'][()])
-            size = str(f['parameters/prop_size'][()], 'utf-8')
-            combos.add(f'{n_blades}_{size}')
+def create_output_folders(output_dir, link_mode='copy'):
+    # Remove the splits of previous runs, whichever link mode wrote them
+    os.makedirs(output_dir, exist_ok=True)
+    for prop in SPLITS:
+        split_dir = os.path.join(output_dir, prop)
+        if os.path.isdir(split_dir) and not os.path.islink(split_dir):
+            shutil.rmtree(split_dir)
+        elif os.path.lexists(split_dir):
+            os.remove(split_dir)
+        if os.path.exists(split_dir + '.txt'):
+            os.remove(split_dir + '.txt')
+        # Create train, val, test directories
+        if link_mode != 'manifest':
+            os.makedirs(split_dir)
+
+def materialize_file(file, split_dir, link_mode):
+    # Put one file into a split directory without copying its data unless asked to
+    destination = os.path.join(split_dir, os.path.basename(file))
+    if link_mode == 'symlink':
+        os.symlink(os.path.abspath(file), destination)
+    elif link_mode == 'hardlink':
+        try:
+            os.link(file, destination)
+        except OSError as e:
+            # Hard links cannot cross file systems
+            logging.warning(f'Could not hardlink {file} ({e}), copying it instead')
+            shutil.copy(file, destination)
+    else:
+        shutil.copy(file, destination)
+
+def write_split_list(files, list_path):
+    # Write the absolute paths of a split's files, one per line
+    with open(list_path, 'w') as list_file:
+        for file in sorted(files):
+            list_file.write(os.path.abspath(file) + '\n')
+
+def group_files_by_combo(data_dir, rows):
+    # Group the indexed files by their n_blades and prop_size combination in one pass
+    combos = {}
+    for row in rows:
+        combo = f"{row['n_blades']}_{row['prop_size']}"
+        combos.setdefault(combo, []).append(os.path.join(data_dir, row['file']))
     return combos
 
-def filter_files_by_combo(files, combo):
-    # Filter files by their property combinations
-    filtered_files = []
-    for file in files:
-        with h5py.File(file, 'r') as f:
-            n_blades = int(f['parameters/n_blades'][()])
-            size = str(f['parameters/prop_size'][()], 'utf-8')
-            if f'{n_blades}_{size}' == combo:
-                filtered_files.append(file)
-    return filtered_files
-
 def split_data(files, train_split, val_split, test_split):
     # Randomly shuffle and split the files according to the specified splits
     np.random.shuffle(files)
@@ -95,48 +126,41 @@ def main():
         base_output_dir = os.path.dirname(os.path.abspath(args.data_dir))
         args.output_dir = os.path.join(base_output_dir, 'splits')
     
-    # List all HDF5 files in the data directory
-    h5_files = [os.path.join(args.data_dir, f) for f in os.listdir(args.data_dir) if f.endswith('.hdf5')]
-    
-    # Get unique property combinations from the HDF5 files
-    prop_combos = get_unique_combos(h5_files)
-    # Create output folders for each property combination
-    create_output_folders(args.output_dir)
-    
     # Initialize logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
-    # Initialize file counters
-    train_counter = 0
-    val_counter = 0
-    test_counter = 0
-    
-    # Process each property combination
-    for combo in prop_combos:
-        # Get files that match the current property combination
-        combo_files = filter_files_by_combo(h5_files, combo)
-        # Split files into train, val, and test sets
+    # Index the HDF5 files in the data directory; unchanged files are not opened again
+    index_path = build_index(args.data_dir, args.index, args.workers)
+    logging.info(f"Metadata index up to date: {index_path}")
+
+    # Get the files of every property combination from the index
+    prop_combos = group_files_by_combo(args.data_dir, load_index(index_path, "file LIKE '%.hdf5'"))
+    # Create output folders for each property combination
+    create_output_folders(args.output_dir, args.link_mode)
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    # Split every property combination into train, val, and test sets
+    split_files = {prop: [] for prop in SPLITS}
+    for combo, combo_files in prop_combos.items():
         train_files, val_files, test_files = split_data(combo_files, args.train_split, args.val_split, args.test_split)
-        
-        # Copy files to their respective directories and log progress
-        for file in train_files:
-            shutil.copy(file, os.path.join(args.output_dir, 'train'))
-            train_counter += 1
-            if train_counter % 50 == 0:
-                logging.info(f'{train_counter} files copied to train folder')
-
-        for file in val_files:
-            shutil.copy(file, os.path.join(args.output_dir, 'val'))
-            val_counter += 1
-            if val_counter % 50 == 0:
-                logging.info(f'{val_counter} files copied to val folder')
-
-        for file in test_files:
-            shutil.copy(file, os.path.join(args.output_dir, 'test'))
-            test_counter += 1
-            if test_counter % 50 == 0:
-                logging.info(f'{test_counter} files copied to test folder')
-    
+        split_files['train'].extend(train_files)
+        split_files['val'].extend(val_files)
+        split_files['test'].extend(test_files)
+
+    for prop in SPLITS:
+        if args.link_mode == 'manifest':
+            list_path = os.path.join(args.output_dir, f'{prop}.txt')
+            write_split_list(split_files[prop], list_path)
+            logging.info(f'{len(split_files[prop])} files listed in {list_path}')
+            continue
+        # Copy or link files to their respective directories and log progress
+        split_dir = os.path.join(args.output_dir, prop)
+        for counter, file in enumerate(split_files[prop], 1):
+            materialize_file(file, split_dir, args.link_mode)
+            if counter % 50 == 0:
+                logging.info(f'{counter} files added to {prop} folder')
+
     # Print completion message
     logging.info(f"Data split completed. Output saved in {args.output_dir}")
 
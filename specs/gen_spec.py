@@ -4,9 +4,56 @@ import scipy.io
 import h5py
 import os
 import json
+import hashlib
 import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 from PIL import Image
-from scipy.signal import butter, filtfilt
+
+def load_spectrogram_utils():
+    """Load mmdetection/mmdet/datasets/spectrogram_utils.py of this repository by its path.
+
+    The module holds the STFT, high-pass filter, colormap and box code that SpectrogramDataset and
+    LoadSpectrogramFromHDF5 share with this script, so images computed on the fly match the PNGs written here. It
+    only needs numpy, scipy, PIL and matplotlib; loading it by path instead of importing mmdet needs neither the
+    vendored mmdetection on PYTHONPATH nor torch and mmcv in every worker.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'mmdetection', 'mmdet', 'datasets', 'spectrogram_utils.py')
+    spec = importlib.util.spec_from_file_location('spectrogram_utils', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+spectrogram_utils = load_spectrogram_utils()
+band_bbox = spectrogram_utils.band_bbox
+colormap_lut = spectrogram_utils.colormap_lut
+high_pass_filter = spectrogram_utils.high_pass_filter
+raw_image_size = spectrogram_utils.raw_image_size
+spectrogram_image = spectrogram_utils.spectrogram_image
+spectrogram_psd = spectrogram_utils.spectrogram_psd
+
+NFFT = 256
+MANIFEST_NAME = 'manifest.jsonl'
+NORMS_NAME = 'norms.json'
+MEMMAP_NAME = 'spectrograms.npy'
+MEMMAP_INDEX_NAME = 'spectrograms_index.json'
+SHARD_FOLDER = 'annotation_shards'
+# Generation parameters that only change the boxes, which --relabel can update without rendering the images again
+BOX_PARAMETERS = ('band_hz', 'n_pixels', 'bbox_units')
+PROPELLERS = {
+    'fr': 'front_right',
+    'br': 'back_right',
+    'fl': 'front_left',
+    'bl': 'back_left'
+}
+CATEGORIES = [
+    {
+        "id": 1,
+        "name": "drone_frequency",
+        "supercategory": "object"
+    }
+]
 
 def parse_filename(filename):
     """Extract details from the filename."""
@@ -21,158 +68,613 @@ def parse_filename(filename):
     }
     return details
 
-def read_tilt_angle(file_path):
-    """Read the tilt angle from the HDF5 file."""
-    with h5py.File(file_path, 'r') as hdf5_file:
-        if 'parameters/tilt' in hdf5_file:
-            tilt_angle = hdf5_file['parameters/tilt'][()]
-            return tilt_angle
-    return None
-
-def read_fill_factor(file_path):
-    """Read the fill factor from the HDF5 file."""
-    with h5py.File(file_path, 'r') as hdf5_file:
-        if 'parameters/fill_factor' in hdf5_file:
-            fill_factor = hdf5_file['parameters/fill_factor'][()]
-            return fill_factor
-    return None
-
-def high_pass_filter(data, cutoff, fs, order=1):
-    """Apply a high-pass filter to the data."""
-    nyquist = 0.5 * fs
-    normal_cutoff = cutoff / nyquist
-    b, a = butter(order, normal_cutoff, btype='high', analog=False)
-    y = filtfilt(b, a, data)
-    return y
-
-def create_spectrogram(file_path, labeled_folder, raw_folder, range_bins, n_pixels, coco_output, details, dimensions, image_id, filter_order):
-    file_extension = os.path.splitext(file_path)[1].lower()
-    if file_extension == '.mat':
-        mat_file = scipy.io.loadmat(file_path)
-        full_data = mat_file.get('full_data')
-        if full_data is None:
-            print(f"No 'full_data' key found in {file_path}. Skipping...")
-            return dimensions, image_id
-        data_array = full_data[0, 0][0]
-    elif file_extension in ['.h5', '.hdf5']:
-        with h5py.File(file_path, 'r') as hdf5_file:
-            if 'data' not in hdf5_file:
-                print(f"No 'data' group found in {file_path}. Skipping...")
-                return dimensions, image_id
-            data_group = hdf5_file['data']
-            if 'data' not in data_group:
-                print(f"No 'data/data' dataset found in {file_path}. Skipping...")
-                return dimensions, image_id
-            data = data_group['data'][:]
-            timestamps = hdf5_file['data/timestamps'][:]
-            timestamps = timestamps / 1e9
-            data_array = np.array(data)
-            if len(data_array.shape) == 3:
-                data_array = data_array[0, :, :]
-            elif len(data_array.shape) != 2:
-                print(f"Unexpected data shape {data_array.shape} in {file_path}. Skipping...")
-                return dimensions, image_id
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            NFFT = 256
-            pad_to = 1024
-            sampling_period = np.mean(np.diff(timestamps[0,:]))
-            sampling_freq =  1 / sampling_period
-            noverlap = int(NFFT * 3/4)
-            cutoff_frequency = 50  # Hz
-
-            for range_bin in range_bins:
-                if range_bin < 0 or range_bin >= data_array.shape[0]:
-                    print(f"Range bin {range_bin} is out of bounds for file {file_path}. Skipping this range bin.")
-                    continue
-                data_array_transposed = data_array[range_bin, :]
-                
-                # Apply high-pass filter if order is specified
-                if filter_order:
-                    data_array_transposed = high_pass_filter(data_array_transposed, cutoff_frequency, sampling_freq, filter_order)
-
-                plt.figure(figsize=(10, 6))
-                Pxx, freqs, bins, im = plt.specgram(data_array_transposed, NFFT=NFFT, Fs=sampling_freq, noverlap=noverlap)
-                plt.colorbar(label='Intensity')
-                plt.xlabel('Time (s)')
-                plt.ylabel('Frequency (Hz)')
-                propeller_mapping = {
-                    'fr': 'front_right',
-                    'br': 'back_right',
-                    'fl': 'front_left',
-                    'bl': 'back_left'
-                }
-                propeller = propeller_mapping.get(details['propeller'], '')
-                if propeller:
-                    hdf5_path = f'parameters/prop_frequency/{propeller}/avg'
-                    with h5py.File(file_path, 'r') as hdf5_file:
-                        exp_freq = hdf5_file[hdf5_path][:]
-                        exp_freq_first = round(exp_freq[0])
-                    freq_index = np.abs(freqs - exp_freq_first).argmin()
-                    bbox_y = freqs[freq_index] - n_pixels
-                    bbox_height = 2 * n_pixels
-                    bbox = [0, int(bbox_y), len(bins), int(bbox_height)]
-                    annotation = {
-                        "id": len(coco_output["annotations"]) + 1,
-                        "image_id": image_id,
-                        "category_id": 1,
-                        "bbox": [int(coord) for coord in bbox],
-                        "area": int(bbox[2] * bbox[3]),
-                        "iscrowd": 0
-                    }
-                    coco_output["annotations"].append(annotation)
-                    
-                    # Plot the labeled spectrogram with bounding box in orange
-                    plt.axhline(y=exp_freq_first, color='r', linestyle='--')
-                    plt.gca().add_patch(plt.Rectangle((0, bbox_y), len(bins), bbox_height, linewidth=1, edgecolor='orange', facecolor='none'))
-                    fill_factor = read_fill_factor(file_path)
-                    text_str = (f"Drone Name: {details['drone_name']}\n"
-                                f"Time Stamp: {details['time_stamp']}\n"
-                                f"Tilt Angle: {details['tilt_angle']} degrees\n"
-                                f"Propeller: {propeller}\n"
-                                f"Throttle: {details['throttle']}\n"
-                                f"Actual Frequency: {exp_freq_first}\n"
-                                f"Fill Factor: {fill_factor}\n"
-                                f"Range Bin: {range_bin}")
-                    plt.gcf().text(0.98, 0.95, text_str, fontsize=10, verticalalignment='top', horizontalalignment='right', bbox=dict(facecolor='white', alpha=0.5))
-                    details['actual_frequency'] = int(exp_freq_first)
-                output_image_path_labeled = os.path.join(labeled_folder, f"{base_name}_range_bin={range_bin}.png")
-                plt.savefig(output_image_path_labeled)
-                plt.close()
-                
-                # Plot the raw spectrogram without bounding box
-                plt.figure(figsize=(10, 6))
-                plt.specgram(data_array_transposed, NFFT=NFFT, Fs=sampling_freq, noverlap=noverlap)
-                plt.axis('off')
-                plt.gca().xaxis.set_visible(False)
-                plt.gca().yaxis.set_visible(False)
-                plt.gca().set_frame_on(False)
-                output_image_path_raw = os.path.join(raw_folder, f"{base_name}_range_bin={range_bin}.png")
-                plt.savefig(output_image_path_raw, bbox_inches='tight', pad_inches=0)
-                plt.close()
-            
-                if dimensions is None:
-                    img = Image.open(output_image_path_raw)
-                    dimensions = img.size
-                
-                # Add image information to COCO output
-                image_info = {
-                    "id": image_id,
-                    "file_name": os.path.basename(output_image_path_labeled),
-                    "height": dimensions[1],
-                    "width": dimensions[0]
-                }
-                coco_output["images"].append(image_info)
-                image_id += 1
-            
+def plan_range_bin_reads(range_bins, chunk_size=None):
+    """Group range bins into contiguous (start, stop) slabs to read.
+
+    Neighbouring bins are always read together. For a chunked dataset,
+    bins that fall in the same chunk along the range-bin axis are merged
+    too, since HDF5 reads the whole chunk either way.
+    """
+    reads = []
+    for range_bin in sorted(set(range_bins)):
+        if reads:
+            start, stop = reads[-1]
+            same_chunk = chunk_size and range_bin // chunk_size == (stop - 1) // chunk_size
+            if range_bin == stop or same_chunk:
+                reads[-1] = (start, range_bin + 1)
+                continue
+        reads.append((range_bin, range_bin + 1))
+    return reads
+
+class CaptureReader:
+    """Everything needed from one capture, read with a single file open.
+
+    For HDF5 files this loads `data/timestamps`, every dataset under
+    `parameters` (keyed by its path relative to the group, e.g. 'tilt' or
+    'prop_frequency/front_right/avg') and, from `data/data`, only the rows
+    of the requested range bins (all of them if range_bins is None). For
+    .mat files only `full_data` is available.
+    """
+
+    def __init__(self, file_path, range_bins=None):
+        self.file_path = file_path
+        self.data = None
+        self.data_shape = None
+        self.timestamps = None
+        self.parameters = {}
+        self._rows = {}
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == '.mat':
+            full_data = scipy.io.loadmat(file_path).get('full_data')
+            if full_data is not None:
+                data = full_data[0, 0][0]
+                self.data_shape = data.shape
+                if data.ndim in (2, 3):
+                    self.data = data[0] if data.ndim == 3 else data
+                    self._rows = {range_bin: range_bin for range_bin in range(self.data.shape[0])}
+        else:
+            with h5py.File(file_path, 'r') as hdf5_file:
+                if 'data/data' in hdf5_file:
+                    self._read_data(hdf5_file['data/data'], range_bins)
+                if 'data/timestamps' in hdf5_file:
+                    self.timestamps = hdf5_file['data/timestamps'][()]
+                if 'parameters' in hdf5_file:
+                    hdf5_file['parameters'].visititems(self._read_parameter)
+
+    def _read_data(self, dataset, range_bins):
+        """Read the rows of the requested range bins with hyperslab selections."""
+        self.data_shape = dataset.shape
+        if dataset.ndim not in (2, 3):
+            return
+        n_range_bins = dataset.shape[-2]
+        if range_bins is None:
+            range_bins = range(n_range_bins)
+        range_bins = [range_bin for range_bin in range_bins if 0 <= range_bin < n_range_bins]
+        chunk_size = dataset.chunks[-2] if dataset.chunks else None
+
+        slabs = []
+        offset = 0
+        for start, stop in plan_range_bin_reads(range_bins, chunk_size):
+            selection = (0, slice(start, stop)) if dataset.ndim == 3 else (slice(start, stop),)
+            slabs.append(dataset[selection])
+            for range_bin in range(start, stop):
+                self._rows[range_bin] = offset + range_bin - start
+            offset += stop - start
+        if slabs:
+            self.data = np.concatenate(slabs) if len(slabs) > 1 else slabs[0]
+        else:
+            self.data = np.empty((0, dataset.shape[-1]), dtype=dataset.dtype)
+
+    def range_bin_data(self, range_bins):
+        """Return the signals of the given range bins as a 2-D array, one row per bin."""
+        return self.data[[self._rows[range_bin] for range_bin in range_bins]]
+
+    def _read_parameter(self, name, item):
+        if isinstance(item, h5py.Dataset):
+            self.parameters[name] = item[()]
+
+    @property
+    def tilt_angle(self):
+        """The tilt angle from the capture parameters, or None."""
+        return self.parameters.get('tilt')
+
+    @property
+    def sampling_freq(self):
+        """The sampling rate in Hz, from the mean spacing of the timestamps (in ns)."""
+        return spectrogram_utils.sampling_freq(self.timestamps)
+
+    @property
+    def fill_factor(self):
+        """The fill factor from the capture parameters, or None."""
+        return self.parameters.get('fill_factor')
+
+def plot_spectrogram(Pxx, freqs, bins, NFFT, Fs, noverlap):
+    """Draw a precomputed spectrogram on the current axes like plt.specgram."""
+    Z = np.flipud(10. * np.log10(Pxx))
+    pad_xextent = (NFFT - noverlap) / Fs / 2
+    extent = np.min(bins) - pad_xextent, np.max(bins) + pad_xextent, freqs[0], freqs[-1]
+    im = plt.imshow(Z, extent=extent, origin='upper')
+    plt.axis('auto')
+    return im
+
+def render_raw_spectrogram(Pxx, output_path, size, cmap=None):
+    """Write a spectrogram straight to an RGB PNG without building a figure.
+
+    The dB-scaled array is resampled to `size` (width, height) and mapped
+    through the same colormap lookup table imshow uses, scaled to the
+    data's own min/max.
+    """
+    image = spectrogram_image(Pxx, size, colormap_lut(cmap))
+    Image.fromarray(image).save(output_path)
+    return image
+
+def save_raw_spectrogram(Pxx, output_path, size):
+    """Write the single-channel dB spectrogram as a float16 .npy array.
+
+    The array has the same (height, width) geometry as the raw PNGs, so the
+    COCO boxes are unchanged, but it keeps the dB values instead of 8-bit
+    colormap indices and has one channel instead of three.
+    """
+    image = spectrogram_image(Pxx, size).astype(np.float16)
+    np.save(output_path, image)
+    return image
+
+def image_stats(image):
+    """Per-channel pixel count, mean and sum of squared deviations of an (H, W[, C]) image, in float64."""
+    pixels = image.reshape(image.shape[0] * image.shape[1], -1).astype(np.float64)
+    mean = pixels.mean(axis=0)
+    return {"count": len(pixels), "mean": mean.tolist(), "m2": ((pixels - mean) ** 2).sum(axis=0).tolist()}
+
+def merge_stats(a, b):
+    """Chan et al.'s parallel update of two image_stats results (either may be None).
+
+    This is the same update as merge_norm_stats in mmdet.utils, which load_norms uses to merge norms.json files;
+    it is repeated here so the script runs without importing mmdet.
+    """
+    if a is None or b is None:
+        return a if b is None else b
+    n = a["count"] + b["count"]
+    mean_a, mean_b = np.asarray(a["mean"]), np.asarray(b["mean"])
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (b["count"] / n)
+    m2 = np.asarray(a["m2"]) + np.asarray(b["m2"]) + delta ** 2 * (a["count"] * b["count"] / n)
+    return {"count": n, "mean": mean.tolist(), "m2": m2.tolist()}
+
+def band_annotation(annotation_id, image_id, bbox):
+    """COCO annotation record of a band_bbox."""
+    return {
+        "id": annotation_id,
+        "image_id": image_id,
+        "category_id": 1,
+        "bbox": bbox,
+        "area": bbox[2] * bbox[3],
+        "iscrowd": 0
+    }
+
+def create_spectrogram(capture, labeled_folder, raw_folder, range_bins, band_hz, n_pixels, coco_output, details, dimensions, image_id, filter_order, raw_renderer='direct', filter_sos=False, raw_format='png'):
+    file_path = capture.file_path
+    if capture.data_shape is None or capture.timestamps is None:
+        print(f"No 'data/data' and 'data/timestamps' datasets found in {file_path}. Skipping...")
+        return dimensions, image_id
+    if len(capture.data_shape) not in (2, 3):
+        print(f"Unexpected data shape {capture.data_shape} in {file_path}. Skipping...")
+        return dimensions, image_id
+    n_range_bins = capture.data_shape[-2]
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    sampling_freq = capture.sampling_freq
+    noverlap = int(NFFT * 3/4)
+    cutoff_frequency = 50  # Hz
+
+    valid_bins = []
+    for range_bin in range_bins:
+        if range_bin < 0 or range_bin >= n_range_bins:
+            print(f"Range bin {range_bin} is out of bounds for file {file_path}. Skipping this range bin.")
+            continue
+        valid_bins.append(range_bin)
+    if not valid_bins:
+        return dimensions, image_id
+
+    signals = capture.range_bin_data(valid_bins)
+    # Apply high-pass filter to all range bins at once if order is specified
+    if filter_order:
+        signals = high_pass_filter(signals, cutoff_frequency, sampling_freq, filter_order, sos=filter_sos)
+
+    # Compute the spectrograms of all range bins at once and share them between renderers
+    Pxx_all, freqs, bins = spectrogram_psd(signals, sampling_freq, NFFT, noverlap)
+
+    propeller = PROPELLERS.get(details['propeller'], '')
+    if propeller:
+        exp_freq = capture.parameters[f'prop_frequency/{propeller}/avg']
+        exp_freq_first = round(exp_freq[0])
+        details['actual_frequency'] = int(exp_freq_first)
+
+    for range_bin, Pxx in zip(valid_bins, Pxx_all):
+        # Plot the raw spectrogram without bounding box
+        output_image_path_raw = os.path.join(raw_folder, f"{base_name}_range_bin={range_bin}.{raw_format}")
+        if raw_format == 'npy':
+            dimensions = raw_image_size(figsize=(10, 6))
+            raw_image = save_raw_spectrogram(Pxx, output_image_path_raw, dimensions)
+        elif raw_renderer == 'direct':
+            raw_image = render_raw_spectrogram(Pxx, output_image_path_raw, raw_image_size(figsize=(10, 6)))
+        else:
+            plt.figure(figsize=(10, 6))
+            plot_spectrogram(Pxx, freqs, bins, NFFT, sampling_freq, noverlap)
+            plt.axis('off')
+            plt.gca().xaxis.set_visible(False)
+            plt.gca().yaxis.set_visible(False)
+            plt.gca().set_frame_on(False)
+            plt.savefig(output_image_path_raw, bbox_inches='tight', pad_inches=0)
+            plt.close()
+            raw_image = np.asarray(Image.open(output_image_path_raw).convert('RGB'))
+        # Normalization statistics of the raw images, gathered while they are still in memory
+        coco_output["stats"] = merge_stats(coco_output.get("stats"), image_stats(raw_image))
+
+        if dimensions is None:
+            img = Image.open(output_image_path_raw)
+            dimensions = img.size
+
+        # Add image information to COCO output
+        image_info = {
+            "id": image_id,
+            "file_name": os.path.basename(output_image_path_raw),
+            "height": dimensions[1],
+            "width": dimensions[0]
+        }
+        coco_output["images"].append(image_info)
+
+        plt.figure(figsize=(10, 6))
+        plot_spectrogram(Pxx, freqs, bins, NFFT, sampling_freq, noverlap)
+        plt.colorbar(label='Intensity')
+        plt.xlabel('Time (s)')
+        plt.ylabel('Frequency (Hz)')
+        if propeller:
+            # The box is given in pixels of the raw image, which has its own size
+            bbox = band_bbox(freqs, exp_freq_first, dimensions, band_hz, n_pixels)
+            coco_output["annotations"].append(band_annotation(len(coco_output["annotations"]) + 1, image_id, bbox))
+
+            # Plot the labeled spectrogram with bounding box in orange, converted back to Hz over the whole time axis
+            hz_per_pixel = (freqs[-1] - freqs[0]) / dimensions[1]
+            band_y = freqs[-1] - (bbox[1] + bbox[3]) * hz_per_pixel
+            x_min, x_max = plt.xlim()
+            plt.axhline(y=exp_freq_first, color='r', linestyle='--')
+            plt.gca().add_patch(plt.Rectangle((x_min, band_y), x_max - x_min, bbox[3] * hz_per_pixel, linewidth=1, edgecolor='orange', facecolor='none'))
+            fill_factor = capture.fill_factor
+            text_str = (f"Drone Name: {details['drone_name']}\n"
+                        f"Time Stamp: {details['time_stamp']}\n"
+                        f"Tilt Angle: {details['tilt_angle']} degrees\n"
+                        f"Propeller: {propeller}\n"
+                        f"Throttle: {details['throttle']}\n"
+                        f"Actual Frequency: {exp_freq_first}\n"
+                        f"Fill Factor: {fill_factor}\n"
+                        f"Range Bin: {range_bin}")
+            plt.gcf().text(0.98, 0.95, text_str, fontsize=10, verticalalignment='top', horizontalalignment='right', bbox=dict(facecolor='white', alpha=0.5))
+        output_image_path_labeled = os.path.join(labeled_folder, f"{base_name}_range_bin={range_bin}.png")
+        plt.savefig(output_image_path_labeled)
+        plt.close()
+        coco_output.setdefault("outputs", []).extend([output_image_path_labeled, output_image_path_raw])
+        image_id += 1
+
     return dimensions, image_id
 
+def process_file(file_path, output_folder, range_bins, range_bins_str, band_hz, n_pixels, filter_order, raw_renderer='direct', filter_sos=False, raw_format='png'):
+    """Generate the spectrograms of one capture.
+
+    Returns the file's COCO images and annotations with IDs local to the
+    file (starting at 1) and the paths of the files it wrote under
+    "outputs", or None if the file was skipped. This runs in
+    worker processes, so it only touches the file's own output folder.
+    """
+    details = parse_filename(file_path)
+    if not details:
+        return None
+
+    capture = CaptureReader(file_path, range_bins)
+
+    # Update tilt angle from the HDF5 file
+    tilt_angle = capture.tilt_angle
+    if tilt_angle is not None:
+        details['tilt_angle'] = int(tilt_angle)
+
+    drone_folder = f"{details['drone_name']}-{details['time_stamp']}-{details['tilt_angle']}-{details['propeller']}-{details['throttle']}"
+    drone_output_folder = os.path.join(output_folder, drone_folder)
+    labeled_folder = os.path.join(drone_output_folder, 'Labeled')
+    raw_folder = os.path.join(drone_output_folder, 'Raw')
+    os.makedirs(labeled_folder, exist_ok=True)
+    os.makedirs(raw_folder, exist_ok=True)
+
+    file_output = {"images": [], "annotations": []}
+    create_spectrogram(capture, labeled_folder, raw_folder, range_bins, band_hz, n_pixels, file_output, details, None, 1, filter_order, raw_renderer, filter_sos, raw_format)
+
+    # Write details.txt
+    details_file_path = os.path.join(drone_output_folder, 'details.txt')
+    with open(details_file_path, 'w') as details_file:
+        for key, value in details.items():
+            if key != 'actual_frequency':
+                details_file.write(f"{key}: {value}\n")
+        details_file.write(f"Range Bins: {range_bins_str}\n")
+        if 'actual_frequency' in details:
+            details_file.write(f"Actual Frequency: {details['actual_frequency']}\n")
+    file_output.setdefault("outputs", []).append(details_file_path)
+
+    return file_output
+
+def file_hash(file_path, block_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def load_manifest(manifest_path):
+    """Read the manifest entries keyed by the capture's path relative to the input folder; later lines win."""
+    entries = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            for line in manifest_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crashed run
+                    continue
+                entries[entry['file']] = entry
+    return entries
+
+def is_up_to_date(entry, file_path, parameters, output_folder, verify=False):
+    """Check whether a manifest entry still describes the file's output.
+
+    The annotation shard and the capture's details.txt, which is written
+    after its images, must still exist. With verify, every image the entry
+    lists is checked too, which costs one file system call per image.
+    Size and mtime are checked first; the content hash is only computed
+    when they changed, e.g. after the capture was copied.
+    """
+    if entry is None or entry['parameters'] != parameters:
+        return False
+    if 'shard' not in entry or not os.path.exists(os.path.join(output_folder, SHARD_FOLDER, entry['shard'])):
+        return False
+    if 'stats' not in entry or 'outputs' not in entry:
+        return False
+    outputs = entry['outputs'] if verify else [path for path in entry['outputs'] if os.path.basename(path) == 'details.txt']
+    if not all(os.path.exists(os.path.join(output_folder, path)) for path in outputs):
+        return False
+    stat = os.stat(file_path)
+    if entry['size'] != stat.st_size:
+        return False
+    if entry['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if entry['sha256'] == file_hash(file_path):
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+    return False
+
+def write_annotation_shard(shard_path, file_output):
+    """Write one file's COCO records as JSON Lines, replacing the shard atomically."""
+    shard_tmp_path = shard_path + '.tmp'
+    with open(shard_tmp_path, 'w') as shard_file:
+        if file_output is not None:
+            for image_info in file_output["images"]:
+                shard_file.write(json.dumps({"image": image_info}) + "\n")
+            for annotation in file_output["annotations"]:
+                shard_file.write(json.dumps({"annotation": annotation}) + "\n")
+    os.replace(shard_tmp_path, shard_path)
+
+def iter_coco_records(output_folder, kind):
+    """Stream the 'image' or 'annotation' records of all shards with global IDs.
+
+    Shards are read in the manifest's (relative path) order and the file-local
+    IDs are shifted by the number of images/annotations before them, so
+    the IDs are contiguous. Only one record is held in memory at a time,
+    which also makes this usable as a loader for the shards themselves.
+    """
+    image_offset = 0
+    annotation_offset = 0
+    for entry in load_manifest(os.path.join(output_folder, MANIFEST_NAME)).values():
+        shard_path = os.path.join(output_folder, SHARD_FOLDER, entry["shard"])
+        with open(shard_path) as shard_file:
+            for line in shard_file:
+                item = json.loads(line)
+                if kind not in item:
+                    continue
+                record = item[kind]
+                if kind == "image":
+                    record["id"] += image_offset
+                else:
+                    record["id"] += annotation_offset
+                    record["image_id"] += image_offset
+                yield record
+        image_offset += entry["n_images"]
+        annotation_offset += entry["n_annotations"]
+
+def same_images(entry_parameters, parameters):
+    """Whether two sets of generation parameters only differ in how the boxes are computed."""
+    def image_parameters(params):
+        return {key: value for key, value in params.items() if key not in BOX_PARAMETERS}
+    return image_parameters(entry_parameters) == image_parameters(parameters)
+
+def relabel_entry(entry, file_path, parameters, output_folder):
+    """Rewrite the annotations in an entry's shard from the capture's metadata, without rendering it again.
+
+    This is for entries whose images are still valid but whose boxes were computed with other box parameters, such
+    as output folders written before the boxes were given in raw image pixels (with y and height in Hz and the width
+    of the STFT). The boxes are recomputed as create_spectrogram computes them now, from the capture's timestamps
+    and propeller frequency and the image sizes in the shard. Returns the entry with the current parameters.
+    """
+    shard_path = os.path.join(output_folder, SHARD_FOLDER, entry["shard"])
+    with open(shard_path) as shard_file:
+        images = [item["image"] for item in map(json.loads, shard_file) if "image" in item]
+    file_output = {"images": images, "annotations": []}
+    propeller = PROPELLERS.get(parse_filename(file_path)['propeller'], '')
+    if propeller and images:
+        capture = CaptureReader(file_path, range_bins=[])
+        freqs = np.fft.rfftfreq(NFFT, 1 / capture.sampling_freq)
+        exp_freq_first = round(capture.parameters[f'prop_frequency/{propeller}/avg'][0])
+        for image_info in images:
+            size = (image_info["width"], image_info["height"])
+            bbox = band_bbox(freqs, exp_freq_first, size, parameters["band_hz"], parameters["n_pixels"])
+            file_output["annotations"].append(band_annotation(len(file_output["annotations"]) + 1, image_info["id"], bbox))
+    write_annotation_shard(shard_path, file_output)
+    return dict(entry, parameters=parameters, n_annotations=len(file_output["annotations"]))
+
+def write_coco_annotations(output_folder, coco_file_path):
+    """Assemble a compact COCO JSON file from the annotation shards without loading them all."""
+    coco_tmp_path = coco_file_path + '.tmp'
+    with open(coco_tmp_path, 'w') as coco_file:
+        for i, kind in enumerate(["image", "annotation"]):
+            coco_file.write('{"images": [' if i == 0 else '], "annotations": [')
+            for j, record in enumerate(iter_coco_records(output_folder, kind)):
+                if j:
+                    coco_file.write(',')
+                coco_file.write(json.dumps(record, separators=(',', ':')))
+        coco_file.write('], "categories": ' + json.dumps(CATEGORIES, separators=(',', ':')) + '}')
+    os.replace(coco_tmp_path, coco_file_path)
+
+def list_input_files(input_path):
+    """Map every input capture's path relative to the input root to its path, in that order.
+
+    `input_path` is a folder of .mat/HDF5 files or a text file listing one
+    capture per line, such as the split lists written by
+    `split_data.py --link-mode manifest`. Relative paths in a list are
+    resolved against the list's folder, which is the root their keys are
+    relative to, so captures with the same name in different folders are
+    kept apart.
+    """
+    if os.path.isfile(input_path):
+        root = os.path.dirname(os.path.abspath(input_path))
+        with open(input_path) as list_file:
+            file_paths = [os.path.join(root, line.strip()) for line in list_file if line.strip()]
+    else:
+        root = input_path
+        file_paths = [os.path.join(input_path, f) for f in os.listdir(input_path)]
+    file_paths = [path for path in file_paths if path.endswith(('.mat', '.h5', '.hdf5'))]
+    return dict(sorted((os.path.relpath(path, root), path) for path in file_paths))
+
+def shard_name(key):
+    """File name of the annotation shard of the capture with the given manifest key."""
+    return key.replace('%', '%25').replace(os.sep, '%2F') + '.jsonl'
+
+def generate_manifest_entry(key, file_path, parameters, output_folder, **kwargs):
+    """Process one file with process_file, write its annotation shard and describe it as a manifest entry.
+
+    `key` is the file's path relative to the input root, see list_input_files.
+    """
+    stat = os.stat(file_path)
+    entry = {
+        "file": key,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(file_path),
+        "parameters": parameters,
+        "shard": shard_name(key),
+    }
+    file_output = process_file(file_path, output_folder=output_folder, **kwargs)
+    write_annotation_shard(os.path.join(output_folder, SHARD_FOLDER, entry["shard"]), file_output)
+    entry["n_images"] = len(file_output["images"]) if file_output else 0
+    entry["n_annotations"] = len(file_output["annotations"]) if file_output else 0
+    entry["stats"] = file_output.get("stats") if file_output else None
+    entry["outputs"] = [os.path.relpath(path, output_folder) for path in file_output.get("outputs", [])] if file_output else []
+    return entry
+
+def write_norms(output_folder, split, raw_format):
+    """Merge the raw image statistics of all manifest entries into norms.json.
+
+    The file holds the per-channel mean/std of this output folder's raw
+    images (RGB order for PNGs, the dB value for .npy) under the name of
+    its split, plus the pixel count and M2 needed to merge it with the
+    statistics of other splits.
+    """
+    stats = None
+    n_images = 0
+    for entry in load_manifest(os.path.join(output_folder, MANIFEST_NAME)).values():
+        stats = merge_stats(stats, entry.get("stats"))
+        n_images += entry["n_images"]
+    norms = {"split": split, "channels": ["dB"] if raw_format == 'npy' else ["R", "G", "B"], "n_images": n_images}
+    if stats is not None:
+        norms.update({
+            "mean": stats["mean"],
+            "std": np.sqrt(np.asarray(stats["m2"]) / stats["count"]).tolist(),
+            "count": stats["count"],
+            "m2": stats["m2"],
+        })
+    with open(os.path.join(output_folder, NORMS_NAME), 'w') as norms_file:
+        json.dump(norms, norms_file, indent=4)
+    return norms
+
+def read_raw_image(image_path):
+    """Read a raw image as an (height, width, channels) array: RGB uint8 for PNGs, float16 for .npy."""
+    if image_path.endswith('.npy'):
+        image = np.load(image_path)
+        return image[..., None] if image.ndim == 2 else image
+    return np.asarray(Image.open(image_path).convert('RGB'))
+
+def fill_memmap_rows(memmap_path, rows):
+    """Write (row, image path) pairs into an existing memmap; runs in worker processes."""
+    images = np.lib.format.open_memmap(memmap_path, mode='r+')
+    for row, image_path in rows:
+        image = read_raw_image(image_path)
+        if image.shape != images.shape[1:]:
+            raise ValueError(f"{image_path} has shape {image.shape}, but the memmap holds images of shape "
+                             f"{images.shape[1:]}. Only fixed-size raw images (--raw_renderer direct or "
+                             "--raw_format npy) can be packed.")
+        images[row] = image
+    images.flush()
+    del images
+    return len(rows)
+
+def write_memmap(output_folder, workers=1):
+    """Pack all raw images of the output folder into one memory-mapped .npy array and write its index.
+
+    The array has shape (n_images, height, width, channels), uint8 for PNGs
+    and float16 for .npy spectrograms, with the images in the order of
+    annotations.json. The index lists, per row, the image's COCO id,
+    file_name, capture folder and range bin, so LoadImageFromMemmap can
+    find the row of an image by its file name.
+    """
+    raw_paths = {}
+    for capture_folder in sorted(os.listdir(output_folder)):
+        raw_folder = os.path.join(output_folder, capture_folder, 'Raw')
+        if os.path.isdir(raw_folder):
+            for image_name in os.listdir(raw_folder):
+                raw_paths[image_name] = (capture_folder, os.path.join(raw_folder, image_name))
+
+    records = []
+    for image_info in iter_coco_records(output_folder, "image"):
+        capture_folder, image_path = raw_paths[image_info["file_name"]]
+        range_bin = int(os.path.splitext(image_info["file_name"])[0].rsplit('range_bin=', 1)[-1])
+        records.append((image_info, capture_folder, range_bin, image_path))
+    if not records:
+        return None
+
+    first_image = read_raw_image(records[0][3])
+    shape = (len(records),) + first_image.shape
+    memmap_path = os.path.join(output_folder, MEMMAP_NAME)
+    memmap_tmp_path = memmap_path + '.tmp.npy'
+    np.lib.format.open_memmap(memmap_tmp_path, mode='w+', dtype=first_image.dtype, shape=shape).flush()
+
+    # Every worker fills its own rows of the file in place
+    rows = [(row, record[3]) for row, record in enumerate(records)]
+    n_chunks = 4 * max(1, workers)
+    chunks = [rows[i::n_chunks] for i in range(n_chunks)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(fill_memmap_rows, [memmap_tmp_path] * len(chunks), chunks))
+    else:
+        for chunk in chunks:
+            fill_memmap_rows(memmap_tmp_path, chunk)
+    os.replace(memmap_tmp_path, memmap_path)
+
+    index = {
+        "file": MEMMAP_NAME,
+        "shape": list(shape),
+        "dtype": str(first_image.dtype),
+        "images": [{"row": row, "id": image_info["id"], "file_name": image_info["file_name"],
+                    "capture": capture_folder, "range_bin": range_bin}
+                   for row, (image_info, capture_folder, range_bin, _) in enumerate(records)]
+    }
+    index_tmp_path = os.path.join(output_folder, MEMMAP_INDEX_NAME + '.tmp')
+    with open(index_tmp_path, 'w') as index_file:
+        json.dump(index, index_file, separators=(',', ':'))
+    os.replace(index_tmp_path, os.path.join(output_folder, MEMMAP_INDEX_NAME))
+    return memmap_path
+
 def main():
     parser = argparse.ArgumentParser(description="Generate spectrograms from .mat or HDF5 files in a specified folder.")
-    parser.add_argument('input_folder', type=str, help="Path to the folder containing .mat or HDF5 files.")
-    parser.add_argument('--n_pixels', type=int, default=40, help="Number of pixels around the ground truth frequency for the bounding box.")
+    parser.add_argument('input_folder', type=str, help="Path to the folder containing .mat or HDF5 files, or to a text file listing them one per line (e.g. a split list from split_data.py --link-mode manifest).")
+    parser.add_argument('--band_hz', type=float, default=40, help="Frequency range (Hz) above and below the ground truth frequency covered by the bounding box. Default is 40.")
+    parser.add_argument('--n_pixels', type=int, default=None, help="Number of raw image pixels (rows) above and below the ground truth frequency covered by the bounding box, instead of --band_hz.")
     parser.add_argument('--range_bins', type=str, default="0", help="Specify a single range bin or a range of range bins (e.g., 120 or 120-130).")
     parser.add_argument('--output_folder', type=str, default=None, help="Path to the output folder where spectrograms will be saved. Default is './spectrograms'.")
     parser.add_argument('--filter_order', type=int, help="Order of the high-pass filter. If not specified, the filter will not be applied.")
+    parser.add_argument('--filter_sos', action='store_true', help="Run the high-pass filter as second-order sections (sosfiltfilt), which is more stable at higher filter orders.")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes used to process files in parallel. Default is 1 (serial).")
+    parser.add_argument('--force', action='store_true', help="Regenerate every file, even those the manifest in the output folder marks as up to date.")
+    parser.add_argument('--verify', action='store_true', help="Also regenerate files any of whose images are missing from the output folder. This checks every image, so it is slow for large output folders on network file systems.")
+    parser.add_argument('--annotations', choices=['json', 'shards'], default='json', help="'json' assembles a compact annotations.json from the per-file annotation shards, 'shards' only leaves the shards. Default is 'json'.")
+    parser.add_argument('--raw_renderer', choices=['direct', 'matplotlib'], default='direct', help="How raw images are rendered: 'direct' writes the colormapped array with PIL, 'matplotlib' saves a figure. Default is 'direct'.")
+    parser.add_argument('--split', type=str, default=None, help="Name of the split the input belongs to, recorded in norms.json. Default is the name of the input folder or list (e.g. 'train' for train.txt).")
+    parser.add_argument('--raw_format', choices=['png', 'npy'], default='png', help="'png' writes colormapped RGB raw images, 'npy' writes the single-channel dB spectrogram as float16 arrays (--raw_renderer is ignored). Default is 'png'.")
+    parser.add_argument('--relabel', action='store_true', help="Rewrite the boxes of files generated with other box parameters (--band_hz, --n_pixels, or before the boxes were given in raw image pixels) from their metadata, instead of rendering them again. The Labeled images are not redrawn.")
+    parser.add_argument('--memmap', action='store_true', help="Also pack all raw images of the output folder into one memory-mapped spectrograms.npy (uint8 for PNGs, float16 for npy) with a per-image index in spectrograms_index.json, for LoadImageFromMemmap.")
 
     args = parser.parse_args()
     input_folder = args.input_folder
@@ -184,58 +686,87 @@ def main():
     else:
         range_bins = [int(args.range_bins)]
 
-    all_annotations = {
-        "images": [],
-        "annotations": [],
-        "categories": [
-            {
-                "id": 1,
-                "name": "drone_frequency",
-                "supercategory": "object"
-            }
-        ]
+    os.makedirs(os.path.join(output_folder, SHARD_FOLDER), exist_ok=True)
+
+    file_paths = list_input_files(input_folder)
+    filenames = list(file_paths)
+    basenames = [os.path.basename(filename) for filename in filenames]
+    duplicates = sorted({name for name in basenames if basenames.count(name) > 1})
+    if duplicates:
+        print(f"Warning: {len(duplicates)} capture names appear in more than one input folder (e.g. {duplicates[0]}); "
+              "their images are written to the same output folder and overwrite each other.")
+    parameters = {
+        "NFFT": NFFT,
+        "filter_order": args.filter_order,
+        "filter_sos": args.filter_sos,
+        "band_hz": args.band_hz,
+        "n_pixels": args.n_pixels,
+        "range_bins": range_bins,
+        "raw_renderer": args.raw_renderer,
+        "raw_format": args.raw_format,
+        "bbox_units": "pixels"
     }
-    
-    dimensions = None
-    image_id = 1
-
-    for filename in os.listdir(input_folder):
-        file_path = os.path.join(input_folder, filename)
-        if filename.endswith('.mat') or filename.endswith('.h5') or filename.endswith('.hdf5'):
-            details = parse_filename(filename)
-            if not details:
-                continue
-            
-            # Update tilt angle from the HDF5 file
-            tilt_angle = read_tilt_angle(file_path)
-            if tilt_angle is not None:
-                details['tilt_angle'] = int(tilt_angle)
-            
-            drone_folder = f"{details['drone_name']}-{details['time_stamp']}-{details['tilt_angle']}-{details['propeller']}-{details['throttle']}"
-            drone_output_folder = os.path.join(output_folder, drone_folder)
-            labeled_folder = os.path.join(drone_output_folder, 'Labeled')
-            raw_folder = os.path.join(drone_output_folder, 'Raw')
-            os.makedirs(labeled_folder, exist_ok=True)
-            os.makedirs(raw_folder, exist_ok=True)
-
-            dimensions, image_id = create_spectrogram(file_path, labeled_folder, raw_folder, range_bins, args.n_pixels, all_annotations, details, dimensions, image_id, args.filter_order)
-
-            # Write details.txt
-            details_file_path = os.path.join(drone_output_folder, 'details.txt')
-            with open(details_file_path, 'w') as details_file:
-                for key, value in details.items():
-                    if key != 'actual_frequency':
-                        details_file.write(f"{key}: {value}\n")
-                details_file.write(f"Range Bins: {args.range_bins}\n")
-                if 'actual_frequency' in details:
-                    details_file.write(f"Actual Frequency: {details['actual_frequency']}\n")
-
-            print(f"Processed {filename}")
-
-    # Write combined annotations.json
-    combined_coco_file_path = os.path.join(output_folder, 'annotations.json')
-    with open(combined_coco_file_path, 'w') as coco_file:
-        json.dump(all_annotations, coco_file, indent=4)
+
+    # Reuse the output of files that are unchanged since they were last processed
+    manifest_path = os.path.join(output_folder, MANIFEST_NAME)
+    manifest = {} if args.force else load_manifest(manifest_path)
+    pending = []
+    relabel = []
+    for filename in filenames:
+        entry = manifest.get(filename)
+        if is_up_to_date(entry, file_paths[filename], parameters, output_folder, args.verify):
+            print(f"Skipped {filename} (up to date)")
+        elif (args.relabel and entry is not None and same_images(entry['parameters'], parameters)
+              and is_up_to_date(dict(entry, parameters=parameters), file_paths[filename], parameters, output_folder, args.verify)):
+            relabel.append(filename)
+        else:
+            manifest.pop(filename, None)
+            pending.append(filename)
+
+    worker = partial(generate_manifest_entry, parameters=parameters, output_folder=output_folder, range_bins=range_bins,
+                     range_bins_str=args.range_bins, band_hz=args.band_hz, n_pixels=args.n_pixels, filter_order=args.filter_order,
+                     raw_renderer=args.raw_renderer, filter_sos=args.filter_sos, raw_format=args.raw_format)
+
+    # Entries are appended as files finish, so a crashed run resumes where it stopped
+    with open(manifest_path, 'a') as manifest_file:
+        def record(entry):
+            manifest_file.write(json.dumps(entry) + "\n")
+            manifest_file.flush()
+            manifest[entry["file"]] = entry
+            print(f"Processed {entry['file']}")
+
+        for filename in relabel:
+            record(relabel_entry(manifest[filename], file_paths[filename], parameters, output_folder))
+
+        if args.workers > 1:
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                futures = [executor.submit(worker, filename, file_paths[filename]) for filename in pending]
+                for future in as_completed(futures):
+                    record(future.result())
+        else:
+            for filename in pending:
+                record(worker(filename, file_paths[filename]))
+
+    # Compact the manifest down to the current input files
+    manifest_tmp_path = manifest_path + '.tmp'
+    with open(manifest_tmp_path, 'w') as manifest_file:
+        for filename in filenames:
+            manifest_file.write(json.dumps(manifest[filename]) + "\n")
+    os.replace(manifest_tmp_path, manifest_path)
+
+    # Normalization statistics of the raw images, merged from the per-file statistics in the manifest
+    split = args.split or os.path.splitext(os.path.basename(os.path.normpath(input_folder)))[0]
+    write_norms(output_folder, split, args.raw_format)
+
+    # Assemble annotations.json from the shards in filename order so IDs do not depend on which files were regenerated
+    if args.annotations == 'json':
+        write_coco_annotations(output_folder, os.path.join(output_folder, 'annotations.json'))
+
+    # One contiguous array of all raw images, rebuilt from the raw files so it always matches the annotations
+    if args.memmap:
+        memmap_path = write_memmap(output_folder, args.workers)
+        if memmap_path:
+            print(f"Packed the raw images into {memmap_path}")
 
 if __name__ == "__main__":
     main()
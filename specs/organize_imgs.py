@@ -0,0 +1,114 @@
+"""
+Gather the raw spectrograms of each split into one Raw folder per split for model training.
+
+For every split (train, test, val) in the base directory, which holds one gen_spec.py output folder per split, the
+raw images of all captures are moved, hard-linked, symlinked or copied into <dest_dir>/<split>/Raw/ by a thread pool.
+Each capture keeps its own subfolder there, and the file_name of every image in the split's annotations.json is
+rewritten to that relative path, so images of different captures can never overwrite each other. The rewritten
+annotations.json and the split's norms.json are written next to the Raw folder, along with the
+spectrograms.npy memmap and its index if gen_spec.py --memmap wrote them.
+
+Usage:
+    python organize_imgs.py --base_dir split_specs --dest_dir raw_splits --mode hardlink --workers 16
+"""
+
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = ['move', 'hardlink', 'symlink', 'copy']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gather the raw spectrograms of each split for model training.")
+    parser.add_argument('--base_dir', default='split_specs', help="Directory with one gen_spec.py output folder per split. Default is 'split_specs'.")
+    parser.add_argument('--dest_dir', default='raw_splits', help="Directory the raw images and annotations are written to. Default is 'raw_splits'.")
+    parser.add_argument('--subdirs', nargs='+', default=['train', 'test', 'val'], help="Splits to organize. Default is train, test and val.")
+    parser.add_argument('--mode', choices=MODES, default='hardlink', help="How images get into the destination: 'move' and 'hardlink' need no extra space (hardlink falls back to copying across file systems), 'symlink' points to the originals, 'copy' duplicates them. Default is 'hardlink'.")
+    parser.add_argument('--workers', type=int, default=16, help="Number of threads doing the file operations. Default is 16.")
+    return parser.parse_args()
+
+def find_raw_images(split_dir):
+    """Map each raw image name to its path relative to split_dir, e.g. '<capture folder>/Raw/<name>.png'."""
+    raw_images = {}
+    for capture_folder in sorted(os.listdir(split_dir)):
+        raw_dir = os.path.join(split_dir, capture_folder, 'Raw')
+        if not os.path.isdir(raw_dir):
+            continue
+        for image_name in os.listdir(raw_dir):
+            if image_name in raw_images:
+                raise ValueError(f"{image_name} exists in both {raw_images[image_name]} and {raw_dir}; "
+                                 "annotations.json cannot tell them apart.")
+            raw_images[image_name] = os.path.join(capture_folder, 'Raw', image_name)
+    return raw_images
+
+def place_file(source, destination, mode):
+    """Move, link or copy one file, replacing an existing destination."""
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if mode == 'move':
+        shutil.move(source, destination)
+    elif mode == 'symlink':
+        os.symlink(os.path.abspath(source), destination)
+    elif mode == 'hardlink':
+        try:
+            os.link(source, destination)
+        except OSError:
+            # Hard links cannot cross file systems
+            shutil.copyfile(source, destination)
+    else:
+        shutil.copyfile(source, destination)
+
+def organize_split(split_dir, dest_split_dir, mode, executor):
+    """Place one split's raw images and write its annotations with rewritten file names."""
+    with open(os.path.join(split_dir, 'annotations.json')) as coco_file:
+        coco = json.load(coco_file)
+    raw_images = find_raw_images(split_dir)
+    raw_dest_dir = os.path.join(dest_split_dir, 'Raw')
+
+    jobs = []
+    capture_folders = set()
+    for image_info in coco['images']:
+        image_name = os.path.basename(image_info['file_name'])
+        if image_name not in raw_images:
+            raise FileNotFoundError(f"Raw image {image_name} of {split_dir}/annotations.json not found (moved by an earlier run?)")
+        relative_path = raw_images[image_name]
+        capture_folder = relative_path.split(os.sep)[0]
+        capture_folders.add(capture_folder)
+        # Relative to the Raw folder, which configs use as the image prefix
+        image_info['file_name'] = f"{capture_folder}/{os.path.basename(relative_path)}"
+        jobs.append((os.path.join(split_dir, relative_path), os.path.join(raw_dest_dir, capture_folder, os.path.basename(relative_path))))
+
+    for capture_folder in capture_folders:
+        os.makedirs(os.path.join(raw_dest_dir, capture_folder), exist_ok=True)
+    # list() waits for all of them and re-raises the first error
+    list(executor.map(lambda job: place_file(*job, mode), jobs))
+
+    coco_tmp_path = os.path.join(dest_split_dir, 'annotations.json.tmp')
+    with open(coco_tmp_path, 'w') as coco_file:
+        json.dump(coco, coco_file, separators=(',', ':'))
+    os.replace(coco_tmp_path, os.path.join(dest_split_dir, 'annotations.json'))
+    if os.path.exists(os.path.join(split_dir, 'norms.json')):
+        shutil.copyfile(os.path.join(split_dir, 'norms.json'), os.path.join(dest_split_dir, 'norms.json'))
+    # The memmap index refers to images by name only, so it stays valid next to the rewritten annotations
+    for name in ('spectrograms.npy', 'spectrograms_index.json'):
+        if os.path.exists(os.path.join(split_dir, name)):
+            place_file(os.path.join(split_dir, name), os.path.join(dest_split_dir, name), mode)
+    return len(jobs)
+
+def main():
+    args = parse_args()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for subdir in args.subdirs:
+            split_dir = os.path.join(args.base_dir, subdir)
+            if not os.path.isdir(split_dir):
+                print(f"Subdirectory {split_dir} does not exist. Skipping...")
+                continue
+            dest_split_dir = os.path.join(args.dest_dir, subdir)
+            os.makedirs(dest_split_dir, exist_ok=True)
+            n_images = organize_split(split_dir, dest_split_dir, args.mode, executor)
+            print(f"{n_images} raw images and annotations have been placed in {dest_split_dir} ({args.mode}).")
+
+if __name__ == "__main__":
+    main()
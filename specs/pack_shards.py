@@ -0,0 +1,121 @@
+"""
+Pack the images and COCO annotations of a split into a few large tar shards for training on parallel file systems.
+
+Reading hundreds of thousands of small PNGs is slow on Lustre, where every open is a metadata server round trip. This
+script writes the images of a split (as organized by organize_imgs.py: annotations.json next to a Raw/ folder) in
+annotation order into shard-00000.tar, shard-00001.tar, ... of about --shard_size MB each. Like WebDataset, every image
+member is followed by a <file_name>.json member with its COCO image record and annotations, so a shard can also be read
+on its own with any tar tool.
+
+The annotations.json written next to the shards is the offset index: every image record gets the shard it is in and
+the byte offset and length of its data in that shard. CocoShardDataset and LoadImageFromShard read an image with a
+single positioned read through this index, and the ShardShuffleSampler keeps epoch reads sequential within a shard.
+The split's norms.json is copied along, so the shard folder is all a config needs and can be moved with the Globus
+scripts as a handful of large files.
+
+Usage:
+    python pack_shards.py --split_dir raw_splits/train --out_dir shards/train --shard_size 1024 --workers 16
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import tarfile
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+SHARD_PATTERN = 'shard-{:05d}.tar'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pack the images and annotations of a split into tar shards.")
+    parser.add_argument('--split_dir', required=True, help="Split folder with annotations.json and the Raw/ image folder (see organize_imgs.py).")
+    parser.add_argument('--img_dir', default=None, help="Folder the file names in annotations.json are relative to. Default is <split_dir>/Raw.")
+    parser.add_argument('--out_dir', required=True, help="Folder the shards, annotations.json and norms.json are written to.")
+    parser.add_argument('--shard_size', type=int, default=1024, help="Approximate size of a shard in MB. Default is 1024.")
+    parser.add_argument('--workers', type=int, default=16, help="Number of threads reading the images ahead of the writer. Default is 16.")
+    return parser.parse_args()
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def read_ahead(paths, executor, depth):
+    """Yield the contents of paths in order while up to depth files are read in the pool."""
+    pending = deque()
+    for path in paths:
+        pending.append(executor.submit(read_file, path))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def add_member(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+def index_shard(shard_path):
+    """Map the member names of a shard to the (offset, length) of their data."""
+    with tarfile.open(shard_path, 'r:') as tar:
+        return {member.name: (member.offset_data, member.size) for member in tar}
+
+def pack_split(coco, img_dir, out_dir, shard_size, executor, read_depth=64):
+    """Write the shards and add shard, offset and length to every image record of coco."""
+    annotations = defaultdict(list)
+    for annotation in coco.get('annotations', []):
+        annotations[annotation['image_id']].append(annotation)
+
+    images = coco['images']
+    # Unlike executor.map, this does not hold the whole split in memory
+    contents = read_ahead((os.path.join(img_dir, image_info['file_name']) for image_info in images), executor, read_depth)
+
+    shard_names = []
+    tar = None
+    shard_bytes = 0
+    for image_info, data in zip(images, contents):
+        if tar is None or shard_bytes + len(data) > shard_size:
+            if tar is not None:
+                tar.close()
+            shard_names.append(SHARD_PATTERN.format(len(shard_names)))
+            tar = tarfile.open(os.path.join(out_dir, shard_names[-1]), 'w', format=tarfile.PAX_FORMAT)
+            shard_bytes = 0
+        sample = {'image': image_info, 'annotations': annotations[image_info['id']]}
+        add_member(tar, image_info['file_name'], data)
+        add_member(tar, image_info['file_name'] + '.json', json.dumps(sample, separators=(',', ':')).encode())
+        image_info['shard'] = shard_names[-1]
+        shard_bytes += len(data)
+    if tar is not None:
+        tar.close()
+
+    # The data offsets depend on the header sizes, so they are read back from the finished shards
+    shard_members = dict(zip(shard_names, executor.map(index_shard, (os.path.join(out_dir, name) for name in shard_names))))
+    for image_info in images:
+        image_info['offset'], image_info['length'] = shard_members[image_info['shard']][image_info['file_name']]
+    return shard_names
+
+def main():
+    args = parse_args()
+    img_dir = args.img_dir or os.path.join(args.split_dir, 'Raw')
+    with open(os.path.join(args.split_dir, 'annotations.json')) as coco_file:
+        coco = json.load(coco_file)
+    os.makedirs(args.out_dir, exist_ok=True)
+    # Shards of an earlier, larger packing would otherwise be left behind
+    for file_name in os.listdir(args.out_dir):
+        if file_name.startswith('shard-') and file_name.endswith('.tar'):
+            os.remove(os.path.join(args.out_dir, file_name))
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        shard_names = pack_split(coco, img_dir, args.out_dir, args.shard_size * 1024 ** 2, executor, 4 * args.workers)
+
+    coco_tmp_path = os.path.join(args.out_dir, 'annotations.json.tmp')
+    with open(coco_tmp_path, 'w') as coco_file:
+        json.dump(coco, coco_file, separators=(',', ':'))
+    os.replace(coco_tmp_path, os.path.join(args.out_dir, 'annotations.json'))
+    if os.path.exists(os.path.join(args.split_dir, 'norms.json')):
+        shutil.copyfile(os.path.join(args.split_dir, 'norms.json'), os.path.join(args.out_dir, 'norms.json'))
+    print(f"{len(coco['images'])} images have been packed into {len(shard_names)} shards in {args.out_dir}.")
+
+if __name__ == "__main__":
+    main()